@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from backend.data.store import store, APIKey
+from backend.models import IntentAnalysis
 from typing import List
 from pydantic import BaseModel
 
@@ -13,6 +14,7 @@ class StatsResponse(BaseModel):
     active_users: int
     revenue: float
     history: List[dict]
+    token_usage: dict = {}
 
 @router.get("/keys", response_model=List[APIKey])
 async def get_keys():
@@ -32,23 +34,81 @@ async def revoke_key(key_id: str):
         raise HTTPException(status_code=404, detail="Key not found")
     return {"status": "success"}
 
+@router.post("/inventory/reload")
+async def reload_inventory():
+    """Re-index the partner ad catalog from disk."""
+    from backend.inventory import ad_inventory
+    count = await ad_inventory.reload()
+    return {"status": "success", "ads": count}
+
+class RankingExplainRequest(BaseModel):
+    analysis: IntentAnalysis
+    k: int = 5
+    location: str = "United States"
+
+@router.post("/ranking/explain")
+async def explain_ranking(request: RankingExplainRequest):
+    """Rank candidates for an intent and return the per-feature scoring trace."""
+    from backend.axon_registry import axon_registry
+    ranked = await axon_registry.rank_candidates(
+        request.analysis, location=request.location, k=request.k, trace=True
+    )
+    return [
+        {
+            "product": ad.result.get("title"),
+            "vendor": ad.result.get("source"),
+            "source": ad.source,
+            "relevance": round(ad.relevance, 4),
+            "trace": ad.trace,
+        }
+        for ad in ranked
+    ]
+
+@router.get("/popularity")
+async def get_popularity(n: int = 20):
+    """Cluster-wide head of the SERP query popularity sketch."""
+    from backend.popularity import serp_popularity
+    return {
+        "serp_queries": [
+            {"query": payload[0], "location": payload[1], "count": round(count, 2)}
+            for _, count, payload in await serp_popularity.shared_top(n)
+            if payload
+        ],
+    }
+
+@router.post("/cache/warm")
+async def warm_cache():
+    """Run one cache warm-up pass now."""
+    from backend.cache_warmer import cache_warmer
+    refreshed = await cache_warmer.run_once()
+    return {"status": "success", "refreshed": refreshed}
+
 @router.get("/stats", response_model=StatsResponse)
 async def get_stats():
     """
     Get system statistics from Redis.
     """
-    from backend.redis_client import RedisClient
-    redis = RedisClient.get_instance()
-    
-    total_requests = int(await redis.get("stats:total_requests") or 0)
-    # active_users could be a set of IPs seen in the last hour, but for now just scard
-    active_users = int(await redis.scard("stats:active_users") or 0)
-    revenue = float(await redis.get("stats:total_revenue") or 0.0)
-    
-    # Retrieve history from a Redis list (assuming a background worker populates this)
-    # For now, return empty if no history implementation exists yet, avoiding mock data.
-    # We could implement a simple daily snapshot later.
-    history_raw = await redis.lrange("stats:history", 0, 6)
+    from backend.redis_client import fail_open
+
+    async def read(redis) -> list:
+        pipe = redis.pipeline(transaction=False)
+        pipe.get("stats:total_requests")
+        # active_users could be a set of IPs seen in the last hour, but for now just scard
+        pipe.scard("stats:active_users")
+        pipe.get("stats:total_revenue")
+        # Retrieve history from a Redis list (assuming a background worker populates this)
+        # For now, return empty if no history implementation exists yet, avoiding mock data.
+        # We could implement a simple daily snapshot later.
+        pipe.lrange("stats:history", 0, 6)
+        return await pipe.execute()
+
+    # Redis down: zeros rather than a 500, so the dashboard still renders token usage
+    raw_requests, raw_users, raw_revenue, history_raw = await fail_open(
+        "admin_stats", read, default=(None, None, None, []),
+    )
+    total_requests = int(raw_requests or 0)
+    active_users = int(raw_users or 0)
+    revenue = float(raw_revenue or 0.0)
     history = []
     import json
     for h in history_raw:
@@ -62,9 +122,12 @@ async def get_stats():
         # Return at least empty structure if needed by frontend
         history = []
         
+    from backend.usage import usage_tracker
+
     return StatsResponse(
         total_requests=total_requests,
         active_users=active_users,
         revenue=revenue,
-        history=history
+        history=history,
+        token_usage=usage_tracker.snapshot(),
     )
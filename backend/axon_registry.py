@@ -1,17 +1,25 @@
 """
 Project AXON — AXON Registry
-Bridges detected intent with ad inventory using SERP API.
+Bridges detected intent with ad inventory: the local partner catalog first,
+then the SERP API on a miss.
 Fetches relevant ads and products based on user intent.
 """
 
 from typing import Optional
+from backend.config import settings
 from backend.models import IntentAnalysis, Nudge
 from backend.serp_client import serp_client
-from backend.gemini_client import gemini as gemini_client
+from backend.inventory import ad_inventory
+from backend.semantic_index import semantic_index
+from backend.ranking import ad_ranker, RankedAd
+from backend.frequency_cap import frequency_capper, CapState
+from backend.popularity import serp_popularity
+from backend.search_cache import normalize_query
+from backend.metrics import FALLBACKS, CACHE_HITS, CACHE_MISSES
 
 class AXONRegistry:
     """
-    Real-time bridge to advertising data via SERP API.
+    Real-time bridge to advertising data via the local catalog and SERP API.
     Matches user intent to relevant commercial opportunities.
     """
     
@@ -22,6 +30,9 @@ class AXONRegistry:
         self,
         analysis: IntentAnalysis,
         location: str = "United States",
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        prefetched: Optional[list[tuple[dict, str, float]]] = None,
     ) -> Optional[Nudge]:
         """
         Find the best matching ad/product for the detected intent.
@@ -29,6 +40,10 @@ class AXONRegistry:
         Args:
             analysis: Intent analysis from Pulse Monitor
             location: User's location for local results
+            session_id: Session for frequency capping
+            user_id: User for cross-session frequency capping
+            prefetched: Candidates gathered ahead of time by the prefetcher;
+                re-ranked against this analysis without any upstream call
             
         Returns:
             Nudge with product recommendation or None
@@ -36,73 +51,155 @@ class AXONRegistry:
         if not analysis.detected_entities:
             return None
         
-        # Build search query from detected entities
-        query = " ".join(analysis.detected_entities[:3])
-        
-        # Add commercial intent modifiers based on struggle state
-        if analysis.intent_bucket.value == "educational" or analysis.struggle_state.value == "high":
-             # For educational struggles, suggest courses or tutoring
-             query += " online course tutoring"
-        elif analysis.struggle_state.value in ["moderate", "high"]:
-            query += " best buy"
-        
         try:
-            # Use shared SerpClient for the actual API call
-            data = await serp_client.search(query, search_type="shopping", location=location)
+            # One Redis read answers every cap check before any upstream call
+            cap = await frequency_capper.load(session_id, user_id)
             
-            # Extract shopping data (text and images)
-            shopping_data = serp_client.extract_shopping_data(data=data)
-            shopping_text = shopping_data.get("text", "")
-            real_images = shopping_data.get("images", [])
+            if prefetched:
+                allowed = [c for c in prefetched if cap.allows(c[0].get("title", ""), c[0].get("source", ""))]
+                ranked = ad_ranker.rank(allowed, analysis, k=1)
+                if ranked and ranked[0].relevance >= settings.MIN_RELEVANCE_SCORE:
+                    return self._create_nudge(ranked[0].result, analysis, ranked[0].relevance)
             
-            # Check for valid results
-            if not data or "error" in data:
-                # Fallback to mock data if API fails or not configured
-                mock_result = self._get_mock_result(query, analysis)
-                return self._create_nudge(mock_result, analysis)
-                
-            shopping_results = data.get("shopping_results", [])
+            ranked = await self.rank_candidates(analysis, location=location, k=1, cap=cap)
+            if not ranked:
+                return None
             
-            if shopping_results:
-                # Use the top result
-                best_match = shopping_results[0]
-                
-                # Use only real images from SERP
-                best_match["images"] = real_images
-                
-                return self._create_nudge(best_match, analysis)
-            
-            return None
+            # Fallback rankings (SERP down, query capped) can be weak; better no nudge than an off-topic one
+            best = ranked[0]
+            if best.relevance < settings.MIN_RELEVANCE_SCORE:
+                return None
+            return self._create_nudge(best.result, analysis, best.relevance)
             
         except Exception as e:
             print(f"AXON Registry error: {e}")
             return None
     
-    def _create_nudge(
+    async def rank_candidates(
         self,
-        result: dict,
         analysis: IntentAnalysis,
-    ) -> Nudge:
-        """Convert SERP result to Nudge object."""
-        # Calculate relevance based on intent match
-        base_relevance = 0.6
+        location: str = "United States",
+        k: int = 3,
+        trace: bool = False,
+        cap: Optional[CapState] = None,
+    ) -> list[RankedAd]:
+        """
+        Gather candidates and rank them in one pass.
         
-        # Boost for commercial/transactional intent
-        if analysis.intent_bucket.value in ["commercial", "transactional"]:
-            base_relevance += 0.15
+        Local inventory is tried first; SERP is only called when no local ad
+        clears MIN_RELEVANCE_SCORE, and then SERP and local candidates are
+        ranked together.
         
-        # Boost for high struggle state
-        if analysis.struggle_state.value == "high":
-            base_relevance += 0.15
-        elif analysis.struggle_state.value == "moderate":
-            base_relevance += 0.10
+        Args:
+            analysis: Intent analysis from Pulse Monitor
+            location: User's location for local results
+            k: Number of ranked ads to return
+            trace: Attach the per-feature scoring trace to each result
+            cap: Frequency cap state; capped products/vendors are dropped and
+                a capped query skips the SERP call
+        """
+        if not analysis.detected_entities:
+            return []
         
-        relevance = min(base_relevance, 1.0)
+        local = await self._local_candidates(analysis)
+        if cap:
+            local = [c for c in local if cap.allows(c[0].get("title", ""), c[0].get("source", ""))]
+        if local:
+            ranked = ad_ranker.rank(local, analysis, k=k, trace=trace)
+            if ranked[0].relevance >= settings.MIN_RELEVANCE_SCORE:
+                CACHE_HITS.inc("inventory")
+                return ranked
+        CACHE_MISSES.inc("inventory")
         
-        # Handle Nudge object (if passed from mock) or Dictionary (from SERP)
-        if isinstance(result, Nudge):
-            return result
-
+        if cap and not cap.query_allowed(analysis.detected_entities):
+            return ad_ranker.rank(local, analysis, k=k, trace=trace)
+        
+        serp = await self._serp_candidates(analysis, location)
+        if serp and cap:
+            serp = [c for c in serp if cap.allows(c[0].get("title", ""), c[0].get("source", ""))]
+        if serp is None:
+            # SERP unavailable: weak local matches are all we have
+            FALLBACKS.inc("axon_registry")
+            return ad_ranker.rank(local, analysis, k=k, trace=trace)
+        
+        return ad_ranker.rank(serp + local, analysis, k=k, trace=trace)
+    
+    async def _local_candidates(self, analysis: IntentAnalysis) -> list[tuple[dict, str, float]]:
+        """Keyword (BM25) and semantic matches from the partner catalog."""
+        await ad_inventory.refresh_if_changed()
+        await semantic_index.ensure_synced(ad_inventory)
+        
+        limit = settings.RANKING_CANDIDATES
+        retrieval: dict[str, float] = {}
+        
+        keyword_hits = ad_inventory.search(analysis.detected_entities, k=limit)
+        if keyword_hits:
+            top_score = keyword_hits[0][0]
+            for score, item in keyword_hits:
+                retrieval[item.id] = score / top_score
+        
+        for similarity, item_id in semantic_index.search(" ".join(analysis.detected_entities), k=limit):
+            retrieval[item_id] = max(retrieval.get(item_id, 0.0), similarity)
+        
+        candidates = []
+        for item_id, score in retrieval.items():
+            item = ad_inventory.get(item_id)
+            if item:
+                result = item.to_result()
+                result["keywords"] = item.keywords
+                result["category"] = item.category
+                candidates.append((result, "inventory", score))
+        return candidates
+    
+    async def _serp_candidates(
+        self,
+        analysis: IntentAnalysis,
+        location: str,
+    ) -> Optional[list[tuple[dict, str, float]]]:
+        """All shopping results for the intent, or None if SERP failed."""
+        query = self.serp_query(analysis)
+        serp_popularity.record(f"{normalize_query(query)}|{location.lower()}", (query, location))
+        
+        try:
+            # Use shared SerpClient for the actual API call
+            data = await serp_client.search(query, search_type="shopping", location=location)
+        except Exception as e:
+            print(f"AXON Registry error: {e}")
+            return None
+        
+        # Check for valid results
+        if not data or "error" in data:
+            return None
+        
+        shopping_results = data.get("shopping_results", [])
+        candidates = []
+        for position, item in enumerate(shopping_results):
+            result = dict(item)
+            # Use only real images from SERP
+            result["images"] = [item["thumbnail"]] if item.get("thumbnail") else []
+            candidates.append((result, "serp", 1.0 - position / len(shopping_results)))
+        return candidates
+    
+    def serp_query(self, analysis: IntentAnalysis) -> str:
+        """Shopping query for an intent."""
+        # Build search query from detected entities
+        query = " ".join(analysis.detected_entities[:3])
+        
+        # Add commercial intent modifiers based on struggle state
+        if analysis.intent_bucket.value == "educational" or analysis.struggle_state.value == "high":
+             # For educational struggles, suggest courses or tutoring
+             query += " online course tutoring"
+        elif analysis.struggle_state.value in ["moderate", "high"]:
+            query += " best buy"
+        return query
+    
+    def _create_nudge(
+        self,
+        result: dict,
+        analysis: IntentAnalysis,
+        relevance: float,
+    ) -> Nudge:
+        """Convert a SERP (or inventory) result to a Nudge object."""
         # Extract link
         link = result.get("product_link") or result.get("link")
         
@@ -112,7 +209,7 @@ class AXONRegistry:
         return Nudge(
             product_name=result.get("title", "Recommended Product"),
             vendor_name=result.get("source", "Online Retailer"),
-            relevance_score=relevance,
+            relevance_score=min(max(relevance, 0.0), 1.0),
             nudge_text=nudge_text,
             link=link,
             call_to_action=f"Check it out at {result.get('source', 'the store')}",
@@ -168,51 +265,6 @@ class AXONRegistry:
         
         return nudge
 
-    def _get_mock_result(self, query: str, intent: IntentAnalysis) -> Nudge:
-        """
-        Return mock shopping data for demo purposes if API fails/missing.
-        """
-        query_lower = query.lower()
-        
-        if any(word in query_lower for word in ["calculus", "math", "tutoring", "study"]):
-            return Nudge(
-                id="nudge_demo_math",
-                product_name="Calculus Done Right",
-                vendor_name="Brilliant.org",
-                price=12.99,
-                currency="USD",
-                rationale="Learn calculus interactively.",
-                relevance_score=0.95,
-                link="https://brilliant.org/courses/calculus-done-right/",
-                images=[]
-            )
-        
-        if any(word in query_lower for word in ["laptop", "computer", "macbook", "coding"]):
-            return Nudge(
-                id="nudge_demo_laptop",
-                product_name="MacBook Air M3 - 15 inch",
-                vendor_name="Apple Store",
-                price=1299.00,
-                currency="USD",
-                rationale="Perfect for coding and creative work.",
-                relevance_score=0.92,
-                link="https://www.apple.com/macbook-air/",
-                images=[]
-            )
-        
-        # Generic fallback
-        return Nudge(
-            id="nudge_generic",
-            product_name=f"Top Rated {query.title()} Solution",
-            vendor_name="Trusted Partner",
-            price=29.99,
-            currency="USD",
-            rationale="Highly relevant to your search.",
-            relevance_score=0.85,
-            link=f"https://www.google.com/search?q={urllib.parse.quote(query)}",
-            images=[]
-        )
-
 
 # Singleton instance
 axon_registry = AXONRegistry()
@@ -0,0 +1,91 @@
+"""
+Project AXON — Cache Warmer
+Scheduled job that re-fetches the most popular SERP shopping queries
+shortly before their cached responses expire, and keeps the local catalog
+and semantic index synced, so the head of the nudge traffic never pays an
+upstream round trip.
+"""
+
+import asyncio
+from typing import Optional
+
+from backend.config import settings
+from backend.inventory import ad_inventory
+from backend.metrics import metrics
+from backend.popularity import serp_popularity
+from backend.search_cache import search_cache
+from backend.semantic_index import semantic_index
+from backend.serp_client import serp_client
+
+
+CACHE_WARMS = metrics.counter(
+    "axon_cache_warm_total",
+    "Head queries visited by the cache warmer, by outcome.",
+    ["outcome"],
+)
+
+
+class CacheWarmer:
+    """Refreshes the shared head of `serp_popularity` every CACHE_WARM_INTERVAL seconds."""
+
+    def __init__(self):
+        self.interval = settings.CACHE_WARM_INTERVAL
+        self.top_n = settings.CACHE_WARM_TOP_N
+        self.ahead = settings.CACHE_WARM_AHEAD
+        self.min_count = settings.CACHE_WARM_MIN_COUNT
+        self._semaphore = asyncio.Semaphore(settings.CACHE_WARM_CONCURRENCY)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _refresh(self, query: str, location: str) -> bool:
+        async with self._semaphore:
+            if await search_cache.remaining_ttl(query, location) > self.ahead:
+                CACHE_WARMS.inc("fresh")
+                return False
+            if await search_cache.is_negative(query, location):
+                CACHE_WARMS.inc("negative")
+                return False
+
+            data = await serp_client.search(query, search_type="shopping", location=location, refresh=True)
+            if "error" in data:
+                CACHE_WARMS.inc("failed")
+                return False
+            CACHE_WARMS.inc("refreshed")
+            return True
+
+    async def run_once(self) -> int:
+        """One warm-up pass; returns the number of SERP entries refreshed."""
+        # Registry tier: pick up catalog edits now rather than on the next lookup
+        await ad_inventory.refresh_if_changed()
+        await semantic_index.ensure_synced(ad_inventory)
+
+        # The shared head includes lookups made by queue workers, not just this process
+        head = [
+            payload for _, count, payload in await serp_popularity.shared_top(self.top_n)
+            if payload and count >= self.min_count
+        ]
+        results = await asyncio.gather(*(self._refresh(query, location) for query, location in head))
+        return sum(results)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Cache warmer error: {e}")
+
+    def start(self) -> None:
+        """Schedule the warm-up loop (no-op when disabled or SERP is not configured)."""
+        if self._task or self.interval <= 0 or not settings.SERP_API_KEY:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+# Singleton instance
+cache_warmer = CacheWarmer()
@@ -0,0 +1,145 @@
+"""
+Project AXON — Circuit Breaker
+Counts consecutive failures of one upstream. Once failure_threshold calls in
+a row have failed the circuit opens and callers are refused at once
+(CircuitOpenError) instead of each waiting out its own timeout. After
+reset_timeout seconds a limited number of probe calls are let through
+(half-open): a successful probe closes the circuit, a failed one re-opens it.
+"""
+
+import time
+from typing import Awaitable, Callable, TypeVar
+
+from backend.metrics import metrics
+
+
+T = TypeVar("T")
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+BREAKER_STATE = metrics.gauge(
+    "axon_circuit_breaker_state",
+    "Circuit state per upstream (0 closed, 1 half-open, 2 open).",
+    ["breaker"],
+)
+BREAKER_TRANSITIONS = metrics.counter(
+    "axon_circuit_breaker_transitions_total",
+    "Circuit state changes per upstream, by the state entered.",
+    ["breaker", "state"],
+)
+BREAKER_REJECTED = metrics.counter(
+    "axon_circuit_breaker_rejected_total",
+    "Calls refused without contacting the upstream because its circuit was open.",
+    ["breaker"],
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} circuit open (next probe in {retry_in:.1f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with half-open probing."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+        failures: tuple[type[BaseException], ...] = (Exception,),
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self.failures = failures  # Exception types that count against the upstream
+        self.state = CLOSED
+        self._consecutive = 0
+        self._opened_at = 0.0
+        self._probes = 0  # Probe calls in flight while half-open
+        BREAKER_STATE.set(_STATE_VALUES[CLOSED], name)
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+        self.state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        BREAKER_STATE.set(_STATE_VALUES[state], self.name)
+        BREAKER_TRANSITIONS.inc(self.name, state)
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 otherwise)."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def available(self) -> bool:
+        """Whether a call would be let through right now (does not claim a probe slot)."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return self.retry_in() == 0.0
+        return self._probes < self.half_open_max
+
+    def allow(self) -> bool:
+        """Claim permission for one call; record_success/record_failure must follow."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.retry_in() > 0:
+                BREAKER_REJECTED.inc(self.name)
+                return False
+            self._transition(HALF_OPEN)
+        if self._probes >= self.half_open_max:
+            BREAKER_REJECTED.inc(self.name)
+            return False
+        self._probes += 1
+        return True
+
+    def record_success(self) -> None:
+        self._consecutive = 0
+        if self.state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._consecutive += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self._consecutive >= self.failure_threshold):
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a probe slot whose call ended without an outcome (e.g. cancelled)."""
+        if self.state == HALF_OPEN and self._probes:
+            self._probes -= 1
+
+    async def call(self, fn: Callable[..., Awaitable[T]], *args, **kwargs) -> T:
+        """Await fn through the breaker; raises CircuitOpenError when the circuit is open."""
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+        try:
+            result = await fn(*args, **kwargs)
+        except self.failures:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not the upstream's fault (cancelled, or a caller error type)
+            self.release()
+            raise
+        self.record_success()
+        return result
+
+    def to_dict(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._consecutive,
+            "retry_in": round(self.retry_in(), 1),
+        }
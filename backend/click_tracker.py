@@ -0,0 +1,238 @@
+"""
+Project AXON — Click Tracking
+Every nudge impression gets a compact signed token (msgpack payload plus a
+truncated HMAC-SHA256, base64url) pointing at /r/{token}. The redirect
+endpoint verifies the token and answers with a 302 at once; the click only
+goes into an in-memory buffer. A background flusher dedupes clicks per
+impression and writes them to the revenue stream in batches, where the
+aggregator joins them with impressions for click-through rates.
+
+Tokens are signed with CLICK_SIGNING_KEY, or else with a key derived from
+GOOGLE_API_KEY, so they verify on every worker and instance and survive
+restarts. A token that fails verification but still names an http(s)
+destination is redirected untracked rather than answered with a 404.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+import urllib.parse
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+import msgpack
+
+from backend.config import settings
+from backend.metrics import metrics
+from backend.models import Nudge, RevenueEvent
+from backend.redis_client import RedisClient
+from backend.revenue_stream import revenue_stream
+
+
+TOKEN_VERSION = 1
+_SIG_BYTES = 12
+
+CLICKS = metrics.counter(
+    "axon_clicks_total",
+    "Nudge click redirects by outcome (redirected, invalid, unverified, expired, duplicate, recorded, dropped).",
+    ["outcome"],
+)
+CLICK_BUFFER = metrics.gauge(
+    "axon_click_buffer_size",
+    "Clicks waiting for the next batched write.",
+)
+
+
+class Click:
+    """A verified click, waiting in the buffer."""
+
+    __slots__ = ("impression_id", "session_id", "intent_bucket", "url", "issued_at", "clicked_at", "marked")
+
+    def __init__(self, impression_id: str, session_id: str, intent_bucket: Optional[str], url: str, issued_at: int):
+        self.impression_id = impression_id
+        self.session_id = session_id
+        self.intent_bucket = intent_bucket
+        self.url = url
+        self.issued_at = issued_at  # Epoch seconds
+        self.clicked_at = datetime.now()
+        self.marked = False  # Dedupe marker already claimed (set when a write is retried)
+
+
+def signing_key() -> bytes:
+    """CLICK_SIGNING_KEY, else a key derived from the Gemini key every instance already shares."""
+    if settings.CLICK_SIGNING_KEY:
+        return settings.CLICK_SIGNING_KEY.encode()
+    if settings.GOOGLE_API_KEY:
+        return hmac.new(settings.GOOGLE_API_KEY.encode(), b"axon-click-signing-v1", hashlib.sha256).digest()
+    print("Warning: no CLICK_SIGNING_KEY or GOOGLE_API_KEY; click links only verify in this process")
+    return secrets.token_bytes(32)
+
+
+class ClickTracker:
+    """Issues and verifies redirect tokens and batches click writes."""
+
+    CLICK_PREFIX = "click"
+
+    def __init__(self, key: Optional[bytes] = None):
+        self._key = key or signing_key()
+        self.base_url = settings.CLICK_BASE_URL.rstrip("/")
+        self.token_ttl = settings.CLICK_TOKEN_TTL
+        self.revenue = settings.CLICK_REVENUE
+        self.flush_interval = settings.CLICK_FLUSH_INTERVAL
+        self.batch = settings.CLICK_FLUSH_BATCH
+        self._buffer: deque[Click] = deque(maxlen=settings.CLICK_BUFFER_MAX)
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Tokens
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._key, payload, hashlib.sha256).digest()[:_SIG_BYTES]
+
+    def issue(self, impression_id: str, session_id: str, link: str, intent_bucket: Optional[str] = None) -> str:
+        payload = msgpack.packb([TOKEN_VERSION, impression_id, int(time.time()), session_id, intent_bucket, link])
+        return base64.urlsafe_b64encode(payload + self._sign(payload)).rstrip(b"=").decode()
+
+    @staticmethod
+    def _unpack(token: str) -> Optional[tuple[bytes, bytes, list]]:
+        """(payload, signature, fields) of a well-formed token, signature unchecked."""
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload, signature = raw[:-_SIG_BYTES], raw[-_SIG_BYTES:]
+            fields = msgpack.unpackb(payload)
+        except Exception:
+            return None
+        if not isinstance(fields, list) or len(fields) != 6 or fields[0] != TOKEN_VERSION:
+            return None
+        return payload, signature, fields
+
+    def verify(self, token: str) -> Optional[Click]:
+        """The click a token stands for, or None if it is malformed or forged."""
+        unpacked = self._unpack(token)
+        if unpacked is None or not hmac.compare_digest(unpacked[1], self._sign(unpacked[0])):
+            CLICKS.inc("invalid")
+            return None
+        _, impression_id, issued_at, session_id, intent_bucket, link = unpacked[2]
+        return Click(impression_id, session_id, intent_bucket, link, issued_at)
+
+    def destination(self, token: str) -> Optional[str]:
+        """
+        The merchant link of a token that failed verify() (e.g. signed under an
+        old key), for an untracked redirect; None unless it is an http(s) URL.
+        """
+        unpacked = self._unpack(token)
+        link = unpacked[2][5] if unpacked else None
+        if not isinstance(link, str) or urllib.parse.urlsplit(link).scheme not in ("http", "https"):
+            return None
+        CLICKS.inc("unverified")
+        return link
+
+    def track(self, nudge: Nudge, session_id: str, intent_bucket: Optional[str] = None) -> Nudge:
+        """Give a nudge an impression id and point its links at the redirect endpoint."""
+        if not nudge.link:
+            return nudge
+        impression_id = secrets.token_urlsafe(8)
+        url = f"{self.base_url}/r/{self.issue(impression_id, session_id, nudge.link, intent_bucket)}"
+        # _generate_nudge_text embeds the quoted merchant link as Markdown
+        quoted = urllib.parse.quote(nudge.link, safe=":/=&?%+")
+        return nudge.model_copy(update={
+            "impression_id": impression_id,
+            "tracking_link": url,
+            "nudge_text": nudge.nudge_text.replace(f"]({quoted})", f"]({url})"),
+        })
+
+    # Buffered writes
+
+    def record(self, click: Click) -> None:
+        """Queue a click for the next batch; never touches the network."""
+        CLICKS.inc("redirected")
+        if time.time() - click.issued_at > self.token_ttl:
+            CLICKS.inc("expired")
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            CLICKS.inc("dropped")
+        self._buffer.append(click)
+        CLICK_BUFFER.set(len(self._buffer))
+        if len(self._buffer) >= self.batch and self._wake:
+            self._wake.set()
+
+    async def flush(self) -> int:
+        """Write up to one batch of buffered clicks; returns the unique clicks written."""
+        batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.batch))]
+        CLICK_BUFFER.set(len(self._buffer))
+        if not batch:
+            return 0
+
+        checked = False
+        try:
+            redis = RedisClient.get_instance()
+            unmarked = [click for click in batch if not click.marked]
+            if unmarked:
+                pipe = redis.pipeline(transaction=False)
+                for click in unmarked:
+                    pipe.set(f"{self.CLICK_PREFIX}:{click.impression_id}", 1, nx=True, ex=self.token_ttl)
+                claimed = await pipe.execute()
+                for click, new in zip(unmarked, claimed):
+                    click.marked = bool(new)
+                CLICKS.inc("duplicate", amount=sum(1 for new in claimed if not new))
+            checked = True
+
+            unique = [click for click in batch if click.marked]
+            await revenue_stream.publish_batch([
+                RevenueEvent(
+                    amount=self.revenue,
+                    source="nudge_click",
+                    timestamp=click.clicked_at,
+                    intent_bucket=click.intent_bucket,
+                    session_id=click.session_id,
+                    impression_id=click.impression_id,
+                )
+                for click in unique
+            ])
+        except Exception as e:
+            print(f"Click flush error: {e}")
+            # Retry on the next flush; clicks already claimed skip the dedupe check
+            retry = [click for click in batch if click.marked] if checked else batch
+            self._buffer.extendleft(reversed(retry))
+            CLICK_BUFFER.set(len(self._buffer))
+            raise
+        CLICKS.inc("recorded", amount=len(unique))
+        return len(unique)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                while len(self._buffer) >= self.batch:
+                    await self.flush()
+            except Exception:
+                await asyncio.sleep(self.flush_interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            while self._buffer:
+                await self.flush()
+        except Exception:
+            pass
+
+
+# Singleton instance
+click_tracker = ClickTracker()
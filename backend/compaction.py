@@ -0,0 +1,175 @@
+"""
+Project AXON — Conversation Compaction
+Folds the older turns of long sessions into a rolling summary on the
+ConversationState so pulse and synthesis prompts stay a constant size.
+Runs in a single background worker that only starts a job when no chat
+request is in flight, keeping summarization off the request path.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from backend.config import settings
+from backend.context_window import truncate
+from backend.gemini_client import gemini
+from backend.metrics import metrics
+from backend.redis_client import RedisClient
+from backend.session_state import ConversationState, MessageLog
+
+
+COMPACTIONS = metrics.counter(
+    "axon_compactions_total",
+    "Conversation compaction jobs by outcome.",
+    ["outcome"],
+)
+
+
+COMPACTION_SYSTEM = """
+You maintain a running summary of a conversation between a user and an AI
+assistant. The summary replaces the older messages, so it must keep what a
+later turn may need: topics asked about and roughly how many times, specific
+problems or products mentioned, where the user struggled, preferences and
+decisions. Write compact plain prose, at most 150 words. Output only the summary.
+"""
+
+
+COMPACTION_PROMPT = """
+CURRENT SUMMARY:
+{summary}
+
+OLDER MESSAGES TO FOLD IN:
+{messages}
+
+Write the updated summary.
+"""
+
+
+class Compactor:
+    """Deduplicated queue of sessions to compact, drained by one idle-time worker."""
+
+    ARCHIVE_PREFIX = "archive"
+
+    def __init__(self):
+        self.trigger = settings.COMPACTION_TRIGGER_MESSAGES
+        self.keep_recent = settings.COMPACTION_KEEP_RECENT
+        self.model = settings.COMPACTION_MODEL
+        self.idle_delay = settings.COMPACTION_IDLE_DELAY
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: set[str] = set()
+        self._worker: Optional[asyncio.Task] = None
+        self._active_requests = 0
+        self._idle: Optional[asyncio.Event] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._idle = self._idle or asyncio.Event()
+            if self._active_requests == 0:
+                self._idle.set()
+            self._worker = asyncio.create_task(self._run())
+
+    @asynccontextmanager
+    async def request(self):
+        """Mark a chat request in flight; compaction waits until none are."""
+        self._active_requests += 1
+        if self._idle:
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            self._active_requests -= 1
+            if self._active_requests == 0 and self._idle:
+                self._idle.set()
+
+    def schedule(self, session: ConversationState) -> bool:
+        """Queue a session once it passes the trigger length."""
+        if len(session.messages) < self.trigger or session.session_id in self._pending:
+            return False
+        self._ensure_worker()
+        self._pending.add(session.session_id)
+        self._queue.put_nowait(session)
+        return True
+
+    async def _wait_for_idle(self) -> None:
+        # Idle must hold for idle_delay, so bursts of chat traffic go first
+        while True:
+            await self._idle.wait()
+            await asyncio.sleep(self.idle_delay)
+            if self._idle.is_set():
+                return
+
+    async def _run(self) -> None:
+        while True:
+            session = await self._queue.get()
+            try:
+                await self._wait_for_idle()
+                await self.compact(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Compaction error: {e}")
+                COMPACTIONS.inc("failed")
+            finally:
+                self._pending.discard(session.session_id)
+
+    async def compact(self, session: ConversationState) -> bool:
+        """Fold all but the most recent turns into the session's summary."""
+        cut = len(session.messages) - self.keep_recent
+        if cut <= 0:
+            return False
+        folded = session.messages[:cut]
+
+        transcript = "\n".join(
+            f"{'USER' if m.role == 'user' else 'ASSISTANT'}: {truncate(m.content, 200)}"
+            for m in folded
+        )
+        summary = await gemini.generate(
+            prompt=COMPACTION_PROMPT.format(summary=session.summary or "(none)", messages=transcript),
+            model=self.model,
+            system_instruction=COMPACTION_SYSTEM,
+            temperature=0.2,
+            max_tokens=settings.COMPACTION_MAX_TOKENS,
+            stage="compaction",
+        )
+        summary = summary.strip()
+        if not summary:
+            COMPACTIONS.inc("empty")
+            return False
+
+        # Messages may only have been appended while we waited on the model
+        if len(session.messages) < cut or session.messages.content_at(cut - 1) is not folded.content_at(-1):
+            COMPACTIONS.inc("conflict")
+            return False
+
+        await self._archive(session.session_id, folded)
+        session.summary = summary
+        session.compacted_messages += cut
+        session.messages = session.messages[cut:]
+        COMPACTIONS.inc("compacted")
+        return True
+
+    async def _archive(self, session_id: str, messages: MessageLog) -> None:
+        ttl = settings.COMPACTION_ARCHIVE_TTL
+        if ttl <= 0:
+            return
+        key = f"{self.ARCHIVE_PREFIX}:{session_id}"
+        try:
+            redis = RedisClient.get_instance()
+            pipe = redis.pipeline(transaction=False)
+            pipe.rpush(key, *(json.dumps({"role": m.role, "content": m.content, "ts": m.ts}) for m in messages))
+            pipe.expire(key, ttl)
+            await pipe.execute()
+        except Exception as e:
+            print(f"Compaction archive error: {e}")
+
+    async def stop(self) -> None:
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+
+
+# Singleton instance
+compactor = Compactor()
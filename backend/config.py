@@ -3,7 +3,9 @@ Project AXON Configuration
 Loads environment variables and defines model settings.
 """
 
+import json
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -22,19 +24,199 @@ class Settings:
     # Model Configuration
     PULSE_MONITOR_MODEL: str = "gemini-2.0-flash"  # Using 2.0 Flash as stable base for "3-flash" request
     SYNTHESIZER_MODEL: str = "gemini-2.0-flash"
+    SPLICE_MODEL: str = "gemini-2.0-flash-lite"  # Short call that bridges answer -> nudge
+    GEMINI_TIMEOUT: float = float(os.getenv("GEMINI_TIMEOUT", "30"))  # Seconds per Gemini request
+    
+    # Upstream circuit breakers (see circuit_breaker.py): consecutive failures
+    # before a circuit opens, and seconds before it lets a probe through
+    GEMINI_BREAKER_THRESHOLD: int = 5
+    GEMINI_BREAKER_RESET: float = 30.0
+    SERP_BREAKER_THRESHOLD: int = 3
+    SERP_BREAKER_RESET: float = 60.0
+    
+    # Synthesis mode:
+    #   woven    - one generation with the nudge inside the prompt
+    #   splice   - plain answer, then a short call writes the nudge transition
+    #   template - plain answer + Nudge.nudge_text, no extra call
+    SYNTHESIS_MODE: str = os.getenv("SYNTHESIS_MODE", "splice")
+    SPLICE_MAX_TOKENS: int = 120
+    
+    # Context windows per consumer (token estimates; see context_window.py)
+    #   budget: total tokens; max_message_tokens / assistant_tokens: per-message caps
+    #   truncate: "tail" keeps the start of a long message, "middle" keeps start and end
+    CONTEXT_POLICIES: dict = {
+        "pulse": {"budget": 2000, "max_message_tokens": 125, "max_messages": 20, "truncate": "tail", "numbered": True},
+        "synthesis": {"budget": 1200, "max_message_tokens": 400, "assistant_tokens": 200, "max_messages": 10, "truncate": "middle"},
+    }
+    
+    # Conversation Compaction (rolling summary of older turns)
+    COMPACTION_TRIGGER_MESSAGES: int = int(os.getenv("COMPACTION_TRIGGER_MESSAGES", "40"))
+    COMPACTION_KEEP_RECENT: int = 12  # Raw messages kept after compaction
+    COMPACTION_MODEL: str = "gemini-2.0-flash-lite"
+    COMPACTION_MAX_TOKENS: int = 400
+    COMPACTION_IDLE_DELAY: float = 0.5  # Seconds with no chat in flight before a job runs
+    COMPACTION_ARCHIVE_TTL: int = 7 * 86400  # Seconds to keep archived raw turns in Redis (0 = drop)
+    
+    # Session snapshots for warm restarts (empty path disables)
+    SESSION_SNAPSHOT_PATH: str = os.getenv(
+        "SESSION_SNAPSHOT_PATH", str(Path(__file__).parent / "data" / "sessions.snap")
+    )
+    SESSION_SNAPSHOT_INTERVAL: float = float(os.getenv("SESSION_SNAPSHOT_INTERVAL", "30"))  # Seconds between snapshots (0 = shutdown only)
+    SESSION_SNAPSHOT_MAX_GARBAGE: float = 0.5  # Rewrite the file once superseded records pass this fraction
+    
+    # Response Cache (plain answers, before nudge splicing)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_TTL: int = 3600  # Seconds
+    RESPONSE_CACHE_MAX_BYTES: int = 8 * 1024 * 1024  # Local byte budget
+    RESPONSE_CACHE_MAX_ENTRIES: int = 4096  # Rows in the near-duplicate index
+    RESPONSE_CACHE_MIN_SIMILARITY: float = 0.92  # Cosine needed for a near-duplicate hit
+    
+    # Token pricing (USD per 1M tokens): input, cached input, output
+    MODEL_PRICING: dict = {
+        "gemini-2.0-flash": (0.10, 0.025, 0.40),
+        "gemini-2.0-flash-lite": (0.075, 0.01875, 0.30),
+        "gemini-2.5-flash": (0.30, 0.075, 2.50),
+        "gemini-2.5-pro": (1.25, 0.31, 10.00),
+    }
+    USAGE_MAX_SESSIONS: int = 10000  # Per-session usage rollups kept in memory (least recently used dropped)
+    API_KEY_CACHE_TTL: float = 60.0  # Seconds a resolved key id is trusted; bounds revocation lag across instances
     
     # Server
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
+    WARM_UP_ON_STARTUP: bool = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"  # Build lazy clients before serving
+    IMPORT_TIME_BUDGET_MS: float = float(os.getenv("IMPORT_TIME_BUDGET_MS", "900"))  # Checked by benchmarks/bench_startup.py
     
     # AXON Thresholds
     CONVERSION_THRESHOLD: int = 70  # 0-100 score to trigger nudge
     MIN_RELEVANCE_SCORE: float = 0.7  # Minimum ad relevance (70%)
     
+    # Image Ingestion (multimodal turns)
+    MAX_IMAGE_BYTES: int = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+    UPLOAD_FORM_OVERHEAD: int = 64 * 1024  # Multipart body allowance beyond the image (message, boundaries)
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", "1024"))  # Longest side sent to Gemini
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_WORKERS: int = int(os.getenv("IMAGE_WORKERS", "2"))
+    
+    # Multimodal analysis cache (exact + perceptual hash)
+    MULTIMODAL_CACHE_TTL: int = int(os.getenv("MULTIMODAL_CACHE_TTL", "86400"))  # Seconds
+    MULTIMODAL_CACHE_MAX_DISTANCE: int = int(os.getenv("MULTIMODAL_CACHE_MAX_DISTANCE", "5"))  # Hamming bits, max 7
+    MULTIMODAL_CACHE_BAND_MAX: int = int(os.getenv("MULTIMODAL_CACHE_BAND_MAX", "1000"))  # Newest phashes kept per band
+    MULTIMODAL_CACHE_LOCAL_SIZE: int = 512  # In-process LRU entries in front of Redis
+    
+    # Local Ad Inventory (partner catalog, JSONL or Parquet)
+    INVENTORY_PATH: str = os.getenv(
+        "INVENTORY_PATH", str(Path(__file__).parent / "data" / "inventory.jsonl")
+    )
+    INVENTORY_MIN_SCORE: float = float(os.getenv("INVENTORY_MIN_SCORE", "2.0"))  # BM25 score
+    INVENTORY_RELOAD_INTERVAL: float = 5.0  # Seconds between catalog mtime checks
+    
+    # Semantic ad matching (hashing-trick embeddings, memory-mapped float32 matrix)
+    # Written from a background task; outside the source tree so a read-only deploy still starts
+    SEMANTIC_INDEX_PATH: str = os.getenv(
+        "SEMANTIC_INDEX_PATH", os.path.join(tempfile.gettempdir(), "axon", "inventory.embeddings.npy")
+    )  # Empty disables persistence
+    SEMANTIC_DIM: int = 256
+    SEMANTIC_MIN_SIMILARITY: float = float(os.getenv("SEMANTIC_MIN_SIMILARITY", "0.25"))
+    SEMANTIC_COMPACT_THRESHOLD: int = 1024  # Pending inserts before rewriting the matrix file
+    
+    # Ad Ranking (linear model + logistic calibration)
+    RANKING_WEIGHTS: dict = json.loads(os.getenv("RANKING_WEIGHTS", "null")) or {
+        "entity_overlap": 3.0,
+        "retrieval": 1.0,
+        "price_fit": 0.5,
+        "rating": 0.8,
+        "reviews": 0.4,
+        "struggle_fit": 0.6,
+        "bid": 0.5,
+    }
+    RANKING_BIAS: float = -2.5
+    RANKING_CALIBRATION: tuple = (0.6, 0.0)  # relevance = sigmoid(scale * score + offset)
+    RANKING_DEFAULT_BID: float = 1.0  # Bid assumed for SERP results without a partner bid
+    RANKING_CANDIDATES: int = 5  # Local candidates pulled per retriever
+    
+    # Nudge Frequency Caps (impressions allowed per rolling window)
+    FREQ_CAP_SESSION_WINDOW: int = 3600  # Seconds
+    FREQ_CAP_SESSION_PRODUCT: int = 1
+    FREQ_CAP_SESSION_VENDOR: int = 2
+    FREQ_CAP_SESSION_QUERY: int = 2  # Same entities nudged this often -> skip lookup entirely
+    FREQ_CAP_USER_WINDOW: int = 86400  # Seconds
+    FREQ_CAP_USER_PRODUCT: int = 3
+    FREQ_CAP_USER_VENDOR: int = 6
+    
+    # Predictive Prefetch (rank candidates while propensity climbs towards the threshold)
+    PREFETCH_MIN_PROPENSITY: int = 45
+    PREFETCH_CONCURRENCY: int = 4  # Max prefetches in flight across all sessions
+    PREFETCH_TTL: int = 300  # Seconds a prefetched candidate set stays usable
+    PREFETCH_MIN_OVERLAP: float = 0.5  # Entity Jaccard overlap needed to reuse a prefetch
+    
+    # Popularity Sketch + Cache Warmer
+    POPULARITY_TOP_K: int = 64  # Heavy hitters tracked per sketch
+    POPULARITY_HALF_LIFE: float = 3600.0  # Seconds for counts to decay by half
+    POPULARITY_FLUSH_INTERVAL: float = 10.0  # Seconds between pushes of local counts to the shared Redis head
+    CACHE_WARM_INTERVAL: float = float(os.getenv("CACHE_WARM_INTERVAL", "60"))  # Seconds between warm-up runs (0 disables)
+    CACHE_WARM_TOP_N: int = 20  # Head queries refreshed per run
+    CACHE_WARM_AHEAD: float = 180.0  # Refresh entries expiring within this many seconds
+    CACHE_WARM_MIN_COUNT: float = 3.0  # Ignore keys seen fewer times than this
+    CACHE_WARM_CONCURRENCY: int = 2
+    
     SERP_API_KEY: str = os.getenv("SERP_API_KEY", "")
+    SERP_TIMEOUT: float = float(os.getenv("SERP_TIMEOUT", "5.0"))  # Seconds per SerpApi request
+    SERP_CACHE_TTL: int = int(os.getenv("SERP_CACHE_TTL", "900"))  # Seconds to reuse a shopping response
+    SERP_NEGATIVE_TTL: int = int(os.getenv("SERP_NEGATIVE_TTL", "600"))  # Seconds to remember empty shopping searches
+    SEARCH_CACHE_LOCAL_SIZE: int = 2048
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
     
+    # Redis Connection Pool (see redis_client.py)
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+    REDIS_BLOCKING_MAX_CONNECTIONS: int = int(os.getenv("REDIS_BLOCKING_MAX_CONNECTIONS", "256"))  # Separate pool for reply waits
+    REDIS_POOL_TIMEOUT: float = 1.0  # Seconds to wait for a free pooled connection
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+    REDIS_SOCKET_TIMEOUT: float = 2.0  # Request-path commands; a hung server costs at most this per attempt
+    REDIS_BLOCKING_SOCKET_TIMEOUT: float = 30.0  # Blocking pool: must exceed the longest BLPOP / XREADGROUP BLOCK
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30  # Seconds idle before a pooled connection is PINGed on checkout
+    REDIS_RETRIES: int = 2  # Retries of a command after a connection error or timeout
+    REDIS_BACKOFF_BASE: float = 0.05  # Seconds; exponential backoff between retries
+    REDIS_BACKOFF_CAP: float = 0.5
+    REDIS_BREAKER_THRESHOLD: int = 5  # Consecutive failed fail-open commands before the circuit opens
+    REDIS_BREAKER_RESET: float = 10.0  # Seconds before an open circuit lets a probe through
+    REDIS_FAIL_OPEN_TIMEOUT: float = 0.25  # Seconds a cache read or best-effort write may hold up its caller
+    
+    # Revenue Event Stream (Redis Stream + consumer groups; see revenue_stream.py)
+    REVENUE_STREAM_KEY: str = "events:revenue"
+    REVENUE_STREAM_MAXLEN: int = int(os.getenv("REVENUE_STREAM_MAXLEN", "100000"))  # Approximate trim length
+    REVENUE_STREAM_GROUP: str = "aggregator"
+    REVENUE_STREAM_BATCH: int = 100  # Entries read per XREADGROUP
+    REVENUE_STREAM_BLOCK_MS: int = 5000
+    REVENUE_STREAM_CLAIM_IDLE_MS: int = 60000  # Pending entries idle this long are reclaimed from dead consumers
+    REVENUE_STREAM_DEDUPE_TTL: int = 86400  # Seconds an applied entry id is remembered
+    REVENUE_STREAM_LAG_INTERVAL: float = 15.0  # Seconds between consumer-lag gauge refreshes
+    
+    # Work Queue (offload pulse / nudge / prefetch jobs to `python -m backend.worker`; see work_queue.py)
+    WORK_QUEUE_MODE: str = os.getenv("WORK_QUEUE_MODE", "inline")  # inline | queue
+    WORK_QUEUE_PREFIX: str = "jobs"  # Streams are jobs:<kind>, dead letters go to jobs:dead
+    WORK_QUEUE_GROUP: str = "workers"
+    WORK_QUEUE_TIMEOUTS: dict = {"pulse": 8.0, "nudge": 6.0, "prefetch": 20.0}  # Seconds the API waits for a reply
+    CHAT_REQUEST_BUDGET: float = float(os.getenv("CHAT_REQUEST_BUDGET", "10"))  # Seconds queued /chat steps may wait in total
+    WORK_QUEUE_CONCURRENCY: dict = json.loads(os.getenv("WORK_QUEUE_CONCURRENCY", "null")) or {
+        "pulse": 16, "nudge": 16, "prefetch": 4,
+    }  # Jobs in flight per worker process
+    WORK_QUEUE_MAX_ATTEMPTS: int = 3  # Attempts before a job is dead-lettered
+    WORK_QUEUE_RETRY_BACKOFF: float = 0.1  # Seconds between in-worker retries of a failed job
+    WORK_QUEUE_CLAIM_IDLE_MS: int = 15000  # Pending jobs idle this long are reclaimed from dead workers
+    WORK_QUEUE_MAXLEN: int = 10000  # Approximate trim length per job stream
+    WORK_QUEUE_REPLY_TTL: int = 60  # Seconds a reply list outlives an abandoned caller
+    
+    # Click Tracking (signed /r/{token} redirects; see click_tracker.py)
+    CLICK_BASE_URL: str = os.getenv("CLICK_BASE_URL", "http://localhost:8000")
+    CLICK_SIGNING_KEY: str = os.getenv("CLICK_SIGNING_KEY", "")  # Unset: derived from GOOGLE_API_KEY
+    CLICK_TOKEN_TTL: int = 30 * 86400  # Seconds a click is still attributed (the redirect always works)
+    CLICK_REVENUE: float = float(os.getenv("CLICK_REVENUE", "0.0"))  # Credited per unique click
+    CLICK_FLUSH_INTERVAL: float = 0.5  # Seconds between buffered click writes
+    CLICK_FLUSH_BATCH: int = 200  # Clicks per write; a full batch flushes early
+    CLICK_BUFFER_MAX: int = 50000  # Oldest clicks are dropped beyond this
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate required settings are present."""
@@ -42,6 +224,8 @@ class Settings:
             raise ValueError("GOOGLE_API_KEY is required. Set it in .env file.")
         if not cls.SERP_API_KEY:
             print("Warning: SERP_API_KEY not found. Search grounding will be disabled.")
+        if not cls.CLICK_SIGNING_KEY:
+            print("Warning: CLICK_SIGNING_KEY not set. Click links are signed with a key derived from GOOGLE_API_KEY.")
         return True
 
 
@@ -0,0 +1,185 @@
+"""
+Project AXON — Context Window Builder
+Per-session transcript buffer shared by Pulse Monitor and Synthesizer.
+Messages are appended incrementally with their token estimate cached, and
+each consumer gets a window under its own token budget (CONTEXT_POLICIES)
+instead of a fixed message count. A rolling summary of compacted turns
+(see compaction.py) leads the window when present.
+"""
+
+import math
+from typing import Iterable, Optional, Sequence
+
+from backend.config import settings
+from backend.metrics import metrics
+from backend.session_state import MessageRecord
+
+
+CONTEXT_TOKENS = metrics.histogram(
+    "axon_context_window_tokens",
+    "Estimated tokens in each built context window.",
+    ["consumer"],
+    buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+
+# Gemini averages roughly four characters per token for English text
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def truncate(text: str, max_tokens: int, mode: str = "tail") -> str:
+    """
+    Cut text to about max_tokens.
+    "tail" keeps the beginning; "middle" keeps the beginning and the end
+    (questions often end with the actual ask).
+    """
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    if mode == "middle":
+        head = limit * 2 // 3
+        return f"{text[:head].rstrip()} … {text[-(limit - head):].lstrip()}"
+    return text[:limit - 1].rstrip() + "…"
+
+
+class ContextPolicy:
+    """Budget and truncation rules for one consumer."""
+
+    __slots__ = (
+        "name", "budget", "max_message_tokens", "assistant_tokens", "max_messages",
+        "truncate", "numbered", "summary_tokens",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        budget: int,
+        max_message_tokens: int,
+        assistant_tokens: Optional[int] = None,
+        max_messages: int = 50,
+        truncate: str = "tail",
+        numbered: bool = False,
+        summary_tokens: int = 300,
+    ):
+        self.name = name
+        self.budget = budget
+        self.max_message_tokens = max_message_tokens
+        # A smaller cap for assistant turns gives user messages priority
+        self.assistant_tokens = assistant_tokens or max_message_tokens
+        self.max_messages = max_messages
+        self.truncate = truncate
+        self.numbered = numbered
+        self.summary_tokens = summary_tokens
+
+    @classmethod
+    def named(cls, name: str) -> "ContextPolicy":
+        return cls(name, **settings.CONTEXT_POLICIES[name])
+
+    def cap(self, role: str) -> int:
+        return self.max_message_tokens if role == "user" else self.assistant_tokens
+
+
+class _Line:
+    """A transcript entry with its truncated renderings cached per cap."""
+
+    __slots__ = ("role", "content", "_cuts")
+
+    def __init__(self, role: str, content: str):
+        self.role = role
+        self.content = content
+        self._cuts: dict[tuple[int, str], tuple[str, int]] = {}
+
+    def render(self, cap: int, mode: str) -> tuple[str, int]:
+        key = (cap, mode)
+        cut = self._cuts.get(key)
+        if cut is None:
+            text = truncate(self.content, cap, mode)
+            label = "USER" if self.role == "user" else "ASSISTANT"
+            body = f"{label}: {text}"
+            cut = (body, estimate_tokens(body))
+            self._cuts[key] = cut
+        return cut
+
+
+class TranscriptBuffer:
+    """
+    Incrementally maintained transcript for one session.
+    Windows are cached per policy until the transcript changes.
+    """
+
+    def __init__(self, messages: Iterable[MessageRecord] = ()):
+        self._lines: list[_Line] = []
+        self._summary: Optional[str] = None
+        self._version = 0
+        self._windows: dict[str, tuple[int, str]] = {}
+        self._policies: dict[str, ContextPolicy] = {}
+        for message in messages:
+            self.append(message)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def append(self, message: MessageRecord) -> None:
+        self._lines.append(_Line(message.role, message.content))
+        self._version += 1
+
+    def sync(self, messages: Sequence[MessageRecord], summary: Optional[str] = None) -> None:
+        """Catch up with a message list that was appended to (or rewritten) elsewhere."""
+        if summary != self._summary:
+            self._summary = summary
+            self._version += 1
+        if len(messages) < len(self._lines) or (
+            self._lines and messages[len(self._lines) - 1].content != self._lines[-1].content
+        ):
+            self._lines = []
+            self._version += 1
+        for message in messages[len(self._lines):]:
+            self.append(message)
+
+    def _policy(self, name: str) -> ContextPolicy:
+        policy = self._policies.get(name)
+        if policy is None:
+            policy = self._policies[name] = ContextPolicy.named(name)
+        return policy
+
+    def window(self, policy: str | ContextPolicy) -> str:
+        """
+        Newest messages that fit the policy's budget, in chronological order.
+        The latest message is always included (truncated to its cap).
+        """
+        if isinstance(policy, str):
+            policy = self._policy(policy)
+
+        cached = self._windows.get(policy.name)
+        if cached and cached[0] == self._version:
+            return cached[1]
+
+        header = None
+        used = 0
+        if self._summary:
+            header = "EARLIER CONVERSATION (summary): " + truncate(self._summary, policy.summary_tokens)
+            used = estimate_tokens(header)
+
+        selected: list[str] = []
+        for line in reversed(self._lines[-policy.max_messages:]):
+            body, tokens = line.render(policy.cap(line.role), policy.truncate)
+            if policy.numbered:
+                tokens += 2  # "[n] " prefix
+            if selected and used + tokens > policy.budget:
+                break
+            selected.append(body)
+            used += tokens
+        selected.reverse()
+
+        if policy.numbered:
+            selected = [f"[{i}] {body}" for i, body in enumerate(selected, 1)]
+        if header:
+            selected.insert(0, header)
+        text = "\n".join(selected)
+
+        self._windows[policy.name] = (self._version, text)
+        CONTEXT_TOKENS.observe(used, policy.name)
+        return text
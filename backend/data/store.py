@@ -1,8 +1,10 @@
 import secrets
 import json
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 from pydantic import BaseModel
+from backend.config import settings
 from backend.redis_client import RedisClient
 
 class APIKey(BaseModel):
@@ -16,7 +18,8 @@ class APIKey(BaseModel):
 
 class KeyStore:
     def __init__(self):
-        pass
+        # token -> (expiry, key id), so per-request attribution avoids a Redis round-trip
+        self._token_cache: Dict[str, tuple] = {}
 
     async def _get_redis(self):
         return RedisClient.get_instance()
@@ -61,9 +64,40 @@ class KeyStore:
         await redis.hset(f"apikey:{key_id}", mapping=new_key)
         # Add to index
         await redis.sadd("apikeys:index", key_id)
+        # Reverse index for resolving the caller's token to a key id
+        await redis.hset("apikeys:by_token", token, key_id)
         
         return APIKey(**new_key)
 
+    async def resolve_key_id(self, token: Optional[str]) -> Optional[str]:
+        """Map a presented API key token to its key id (None if unknown)."""
+        if not token:
+            return None
+        cached = self._token_cache.get(token)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        redis = await self._get_redis()
+        key_id = await redis.hget("apikeys:by_token", token)
+        if key_id:
+            self._token_cache[token] = (time.monotonic() + settings.API_KEY_CACHE_TTL, key_id)
+        else:
+            self._token_cache.pop(token, None)
+        return key_id
+
+    async def backfill_token_index(self) -> int:
+        """Index active keys created before the reverse index existed; returns the number added."""
+        redis = await self._get_redis()
+        indexed = await redis.hgetall("apikeys:by_token")
+        added = 0
+        for kid in await redis.smembers("apikeys:index"):
+            data = await redis.hgetall(f"apikey:{kid}")
+            token = data.get("key")
+            if token and data.get("status", "active") == "active" and token not in indexed:
+                await redis.hset("apikeys:by_token", token, kid)
+                added += 1
+        return added
+
     async def revoke_key(self, key_id: str) -> bool:
         redis = await self._get_redis()
         exists = await redis.exists(f"apikey:{key_id}")
@@ -71,6 +105,11 @@ class KeyStore:
             return False
             
         await redis.hset(f"apikey:{key_id}", "status", "revoked")
+        # Stop attributing usage to the key (other instances follow within API_KEY_CACHE_TTL)
+        token = await redis.hget(f"apikey:{key_id}", "key")
+        if token:
+            await redis.hdel("apikeys:by_token", token)
+            self._token_cache.pop(token, None)
         return True
 
 # Global store instance
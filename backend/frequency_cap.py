@@ -0,0 +1,131 @@
+"""
+Project AXON — Nudge Frequency Capping
+Limits how often the same product, vendor or query is nudged per session
+and per user over rolling windows. Impressions live in one small Redis
+sorted set per scope (score = timestamp), trimmed and TTL'd to the window,
+so a single pipelined read before any SERP lookup answers every cap check.
+"""
+
+import hashlib
+import time
+from collections import Counter
+from typing import Optional
+
+from backend.config import settings
+from backend.inventory import tokenize
+from backend.metrics import metrics
+from backend.redis_client import fail_open
+
+
+FREQUENCY_CAPPED = metrics.counter(
+    "axon_frequency_capped_total",
+    "Nudge candidates or lookups suppressed by frequency caps.",
+    ["reason"],
+)
+
+
+def _key(text: str) -> str:
+    return hashlib.sha1(" ".join(text.lower().split()).encode()).hexdigest()[:12]
+
+
+def query_key(entities: list[str]) -> str:
+    """Order-insensitive signature of the detected entities."""
+    return _key(" ".join(sorted(set(tokenize(" ".join(entities))))))
+
+
+class CapState:
+    """Impression counts for one session/user, loaded once per lookup."""
+
+    def __init__(self, session_counts: Counter = None, user_counts: Counter = None):
+        self.session = session_counts or Counter()
+        self.user = user_counts or Counter()
+
+    def query_allowed(self, entities: list[str]) -> bool:
+        if self.session[("q", query_key(entities))] >= settings.FREQ_CAP_SESSION_QUERY:
+            FREQUENCY_CAPPED.inc("query")
+            return False
+        return True
+
+    def allows(self, product_name: str, vendor_name: str) -> bool:
+        product, vendor = ("p", _key(product_name)), ("v", _key(vendor_name))
+        if self.session[product] >= settings.FREQ_CAP_SESSION_PRODUCT:
+            reason = "session_product"
+        elif self.session[vendor] >= settings.FREQ_CAP_SESSION_VENDOR:
+            reason = "session_vendor"
+        elif self.user[product] >= settings.FREQ_CAP_USER_PRODUCT:
+            reason = "user_product"
+        elif self.user[vendor] >= settings.FREQ_CAP_USER_VENDOR:
+            reason = "user_vendor"
+        else:
+            return True
+        FREQUENCY_CAPPED.inc(reason)
+        return False
+
+
+class FrequencyCapper:
+    """Reads and writes per-session / per-user impression windows."""
+
+    PREFIX = "fcap"
+
+    def _scopes(self, session_id: Optional[str], user_id: Optional[str]) -> list[tuple[str, str, int]]:
+        scopes = []
+        if session_id:
+            scopes.append(("session", f"{self.PREFIX}:s:{session_id}", settings.FREQ_CAP_SESSION_WINDOW))
+        if user_id:
+            scopes.append(("user", f"{self.PREFIX}:u:{user_id}", settings.FREQ_CAP_USER_WINDOW))
+        return scopes
+
+    async def load(self, session_id: Optional[str], user_id: Optional[str] = None) -> CapState:
+        """Fetch the live impression windows (fails open to an empty state)."""
+        scopes = self._scopes(session_id, user_id)
+        if not scopes:
+            return CapState()
+
+        now = time.time()
+
+        async def read(redis) -> list:
+            pipe = redis.pipeline(transaction=False)
+            for _, key, window in scopes:
+                pipe.zremrangebyscore(key, 0, now - window)
+                pipe.zrangebyscore(key, now - window, "+inf")
+            return await pipe.execute()
+
+        results = await fail_open("frequency_cap_load", read)
+        if results is None:
+            return CapState()
+
+        counts = {"session": Counter(), "user": Counter()}
+        for (scope, _, _), members in zip(scopes, results[1::2]):
+            for member in members:
+                kind, item, _ = member.split("|", 2)
+                counts[scope][(kind, item)] += 1
+        return CapState(counts["session"], counts["user"])
+
+    async def record(
+        self,
+        session_id: Optional[str],
+        user_id: Optional[str],
+        product_name: str,
+        vendor_name: str,
+        entities: list[str],
+    ) -> None:
+        """Record one impression against every scope."""
+        scopes = self._scopes(session_id, user_id)
+        if not scopes:
+            return
+
+        now = time.time()
+        items = [("p", _key(product_name)), ("v", _key(vendor_name)), ("q", query_key(entities))]
+
+        async def write(redis) -> None:
+            pipe = redis.pipeline(transaction=False)
+            for _, key, window in scopes:
+                pipe.zadd(key, {f"{kind}|{item}|{now:.6f}": now for kind, item in items})
+                pipe.expire(key, window)
+            await pipe.execute()
+
+        await fail_open("frequency_cap_record", write)
+
+
+# Singleton instance
+frequency_capper = FrequencyCapper()
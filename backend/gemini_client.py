@@ -1,80 +1,217 @@
 """
 Project AXON Gemini 3.0 Client
 Wrapper for Google's Generative AI SDK.
+Every call goes through one circuit breaker for the Gemini API: while it is
+open, generate() and generate_stream() raise CircuitOpenError at once and
+callers take their fallback tier instead of waiting on a timeout.
 """
 
-from google import genai
-from google.genai import types
+from typing import TYPE_CHECKING, AsyncIterator
+
+from backend.circuit_breaker import CircuitBreaker, CircuitOpenError
 from backend.config import settings
+from backend.metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
+from backend.usage import usage_tracker
+
+if TYPE_CHECKING:
+    from google.genai import types
 
 
 class GeminiClient:
     """Client for interacting with Gemini 3.0 models."""
     
     def __init__(self):
-        """Initialize the Gemini client with API key."""
-        self.client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        # The SDK import (~0.5 s) and client construction wait until first use
+        self._client = None
+        self.breaker = CircuitBreaker(
+            "gemini",
+            failure_threshold=settings.GEMINI_BREAKER_THRESHOLD,
+            reset_timeout=settings.GEMINI_BREAKER_RESET,
+        )
+    
+    @property
+    def client(self):
+        """The genai.Client, built on first access."""
+        if self._client is None:
+            from google import genai
+            from google.genai import types
+            self._client = genai.Client(
+                api_key=settings.GOOGLE_API_KEY,
+                http_options=types.HttpOptions(timeout=int(settings.GEMINI_TIMEOUT * 1000)),
+            )
+        return self._client
+    
+    def available(self) -> bool:
+        """False while the circuit is open (calls would fail fast)."""
+        return self.breaker.available()
+    
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.breaker.name, self.breaker.retry_in())
+    
+    def _settle(self, error: BaseException) -> None:
+        """Count a failed call against the breaker unless the request itself was at fault."""
+        code = getattr(error, "code", None)
+        if isinstance(code, int) and 400 <= code < 500 and code not in (408, 429):
+            self.breaker.record_success()  # The API answered; the request was rejected
+        else:
+            self.breaker.record_failure()
+    
+    def _request(
+        self,
+        prompt: str,
+        image_data: bytes,
+        image_mime_type: str,
+        system_instruction: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema,
+    ) -> tuple[list, "types.GenerateContentConfig"]:
+        """Build contents and config shared by generate and generate_stream."""
+        from google.genai import types
+        
+        config = types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+        
+        if system_instruction:
+            config.system_instruction = system_instruction
+        
+        if response_schema is not None:
+            # Schema-constrained JSON output
+            config.response_mime_type = "application/json"
+            config.response_schema = response_schema
+            
+        contents = [prompt]
+        
+        if image_data:
+            # Create a Part object for the image (already decoded off-loop)
+            image_part = types.Part.from_bytes(
+                data=image_data,
+                mime_type=image_mime_type,
+            )
+            contents.append(image_part)
+        
+        return contents, config
     
     async def generate(
         self,
         prompt: str,
-        image_b64: str = None,
+        image_data: bytes = None,
+        image_mime_type: str = "image/jpeg",
         model: str = None,
         system_instruction: str = None,
         temperature: float = 0.7,
         max_tokens: int = 2048,
+        response_schema=None,
+        stage: str = "unknown",
     ) -> str:
         """
         Generate a response from Gemini (Text or Multimodal).
         
         Args:
             prompt: The user prompt
-            image_b64: Optional base64 encoded image string
+            image_data: Optional raw image bytes (see image_pipeline)
+            image_mime_type: MIME type of image_data
             model: Model to use (defaults to PULSE_MONITOR_MODEL)
             system_instruction: Optional system instruction
             temperature: Creativity level (0-1)
             max_tokens: Maximum response length
+            response_schema: Optional pydantic model; constrains output to JSON
+            stage: Pipeline stage, used for token accounting
             
         Returns:
             Generated text response
         """
         model = model or settings.PULSE_MONITOR_MODEL
-        
-        config = types.GenerateContentConfig(
-            temperature=temperature,
-            max_output_tokens=max_tokens,
+        contents, config = self._request(
+            prompt, image_data, image_mime_type, system_instruction,
+            temperature, max_tokens, response_schema,
         )
         
-        if system_instruction:
-            config.system_instruction = system_instruction
-            
-        contents = [prompt]
+        self._admit()
+        try:
+            with UPSTREAM_LATENCY.time("gemini", model):
+                response = await self.client.aio.models.generate_content(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+        except Exception as e:
+            UPSTREAM_ERRORS.inc("gemini", model)
+            self._settle(e)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
         
-        if image_b64:
-            import base64
-            # Handle data URL header if present
-            if "base64," in image_b64:
-                header, image_b64 = image_b64.split("base64,", 1)
-                
-            image_bytes = base64.b64decode(image_b64)
-            
-            # Create a Part object for the image
-            image_part = types.Part.from_bytes(
-                data=image_bytes,
-                mime_type="image/jpeg" # Defaulting to jpeg, but usually works for png too
-            )
-            contents.append(image_part)
+        usage_tracker.record(stage, model, response.usage_metadata)
         
-        response = await self.client.aio.models.generate_content(
-            model=model,
-            contents=contents,
-            config=config,
+        return response.text
+    
+    async def generate_stream(
+        self,
+        prompt: str,
+        image_data: bytes = None,
+        image_mime_type: str = "image/jpeg",
+        model: str = None,
+        system_instruction: str = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2048,
+        response_schema=None,
+        stage: str = "unknown",
+    ) -> AsyncIterator[str]:
+        """
+        Stream response text chunks; same arguments as generate().
+        
+        Consumers may stop early and must then call aclose() on the
+        iterator, which closes the upstream stream and records the tokens
+        reported so far.
+        """
+        model = model or settings.PULSE_MONITOR_MODEL
+        contents, config = self._request(
+            prompt, image_data, image_mime_type, system_instruction,
+            temperature, max_tokens, response_schema,
         )
         
-        return response.text
-
+        self._admit()
+        stream = None
+        usage = None
+        received = False
+        try:
+            with UPSTREAM_LATENCY.time("gemini", model):
+                stream = await self.client.aio.models.generate_content_stream(
+                    model=model,
+                    contents=contents,
+                    config=config,
+                )
+            async for chunk in stream:
+                received = True
+                if chunk.usage_metadata:
+                    usage = chunk.usage_metadata
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            UPSTREAM_ERRORS.inc("gemini", model)
+            self._settle(e)
+            raise
+        except BaseException:
+            # Closed early by the consumer (or cancelled): healthy if chunks arrived
+            if received:
+                self.breaker.record_success()
+            else:
+                self.breaker.release()
+            raise
+        else:
+            self.breaker.record_success()
+        finally:
+            if stream is not None and hasattr(stream, "aclose"):
+                await stream.aclose()
+            if usage is not None:
+                usage_tracker.record(stage, model, usage)
 
-    
     async def test_connection(self) -> dict:
         """Test the Gemini API connection."""
         try:
@@ -82,6 +219,7 @@ class GeminiClient:
                 prompt="Say 'AXON online' if you can hear me.",
                 temperature=0.1,
                 max_tokens=50,
+                stage="health_check",
             )
             return {
                 "status": "connected",
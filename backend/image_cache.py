@@ -0,0 +1,156 @@
+"""
+Project AXON — Multimodal Analysis Cache
+Reuses IntentAnalysis results for repeated or near-duplicate image uploads.
+Exact matches use the content hash; near-duplicates use a 64-bit perceptual
+hash indexed by bands in Redis so every worker shares the same entries.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import settings
+from backend.image_pipeline import IngestedImage
+from backend.metrics import CACHE_HITS, CACHE_MISSES
+from backend.models import IntentAnalysis
+from backend.redis_client import fail_open
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def _normalize_message(message: str) -> str:
+    return " ".join(message.lower().split())
+
+
+class MultimodalCache:
+    """
+    Two-level cache: a bounded in-process LRU in front of Redis.
+
+    Keys are namespaced by the normalized message so the same photo sent
+    with a different question is analyzed again. Near-duplicate lookup uses
+    pigeonhole banding: with B bands, any hash within B-1 bits of a stored
+    hash shares at least one band exactly. Each band is a ZSET scored by
+    insert time, trimmed to the TTL and to band_max members on every put.
+    """
+
+    PREFIX = "mmcache"
+
+    def __init__(self):
+        self.ttl = settings.MULTIMODAL_CACHE_TTL
+        self.max_distance = min(settings.MULTIMODAL_CACHE_MAX_DISTANCE, 7)
+        self.num_bands = 4 if self.max_distance <= 3 else 8
+        self.band_bits = 64 // self.num_bands
+        self.band_max = settings.MULTIMODAL_CACHE_BAND_MAX
+        self.local_size = settings.MULTIMODAL_CACHE_LOCAL_SIZE
+        self._local: OrderedDict[str, IntentAnalysis] = OrderedDict()
+
+    def _namespace(self, message: str) -> str:
+        return hashlib.sha1(_normalize_message(message).encode()).hexdigest()[:12]
+
+    def _bands(self, phash: int) -> list[str]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            f"{i}:{(phash >> (i * self.band_bits)) & mask:x}"
+            for i in range(self.num_bands)
+        ]
+
+    def _local_get(self, key: str) -> Optional[IntentAnalysis]:
+        analysis = self._local.get(key)
+        if analysis is not None:
+            self._local.move_to_end(key)
+        return analysis
+
+    def _local_put(self, key: str, analysis: IntentAnalysis) -> None:
+        self._local[key] = analysis
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    async def get(self, image: IngestedImage, message: str) -> Optional[IntentAnalysis]:
+        """Return a cached analysis for this image (exact or near-duplicate)."""
+        ns = self._namespace(message)
+        exact_key = f"{self.PREFIX}:{ns}:x:{image.sha256}"
+
+        analysis = self._local_get(exact_key)
+        if analysis is not None:
+            CACHE_HITS.inc("multimodal_exact")
+            return analysis
+
+        async def lookup(redis) -> Optional[tuple[str, IntentAnalysis]]:
+            raw = await redis.get(exact_key)
+            if raw:
+                return "multimodal_exact", IntentAnalysis.model_validate_json(raw)
+            if image.phash is not None:
+                analysis = await self._get_near(redis, ns, image.phash)
+                if analysis is not None:
+                    return "multimodal_near", analysis
+            return None
+
+        # Cache is an optimization: an unavailable or hung Redis is a miss, never a stalled turn
+        found = await fail_open("multimodal_cache_get", lookup)
+        if found is not None:
+            kind, analysis = found
+            self._local_put(exact_key, analysis)
+            CACHE_HITS.inc(kind)
+            return analysis
+
+        CACHE_MISSES.inc("multimodal")
+        return None
+
+    async def _get_near(self, redis, ns: str, phash: int) -> Optional[IntentAnalysis]:
+        bands = self._bands(phash)
+        fresh_since = time.time() - self.ttl
+        pipe = redis.pipeline(transaction=False)
+        for band in bands:
+            pipe.zrangebyscore(f"{self.PREFIX}:{ns}:b:{band}", fresh_since, "+inf")
+        band_members = await pipe.execute()
+
+        candidates: dict[str, int] = {}
+        for members in band_members:
+            for candidate_hex in members:
+                distance = hamming_distance(phash, int(candidate_hex, 16))
+                if distance <= self.max_distance:
+                    candidates[candidate_hex] = distance
+
+        for candidate_hex in sorted(candidates, key=candidates.get):
+            raw = await redis.get(f"{self.PREFIX}:{ns}:p:{candidate_hex}")
+            if raw:
+                return IntentAnalysis.model_validate_json(raw)
+            # Entry expired or was evicted: drop the member so later lookups skip it
+            pipe = redis.pipeline(transaction=False)
+            for band in self._bands(int(candidate_hex, 16)):
+                pipe.zrem(f"{self.PREFIX}:{ns}:b:{band}", candidate_hex)
+            await pipe.execute()
+        return None
+
+    async def put(self, image: IngestedImage, message: str, analysis: IntentAnalysis) -> None:
+        """Store an analysis under the content hash and perceptual hash."""
+        ns = self._namespace(message)
+        exact_key = f"{self.PREFIX}:{ns}:x:{image.sha256}"
+        self._local_put(exact_key, analysis)
+
+        payload = analysis.model_dump_json()
+
+        async def store(redis) -> None:
+            pipe = redis.pipeline(transaction=False)
+            pipe.set(exact_key, payload, ex=self.ttl)
+            if image.phash is not None:
+                phash_hex = f"{image.phash:x}"
+                now = time.time()
+                pipe.set(f"{self.PREFIX}:{ns}:p:{phash_hex}", payload, ex=self.ttl)
+                for band in self._bands(image.phash):
+                    band_key = f"{self.PREFIX}:{ns}:b:{band}"
+                    pipe.zadd(band_key, {phash_hex: now})
+                    pipe.zremrangebyscore(band_key, 0, now - self.ttl)
+                    pipe.zremrangebyrank(band_key, 0, -(self.band_max + 1))
+                    pipe.expire(band_key, self.ttl)
+            await pipe.execute()
+
+        await fail_open("multimodal_cache_put", store)
+
+
+# Singleton instance
+multimodal_cache = MultimodalCache()
@@ -0,0 +1,211 @@
+"""
+Project AXON — Image Ingestion Pipeline
+Validates, decodes and downscales user images off the event loop so one
+large upload cannot stall other requests on the same worker.
+"""
+
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, UnidentifiedImageError
+
+from backend.config import settings
+from backend.metrics import metrics
+
+
+# MIME types Gemini accepts as inline image parts
+MODEL_MIME_TYPES = {"image/jpeg", "image/png", "image/webp", "image/heic", "image/heif"}
+# Model-ready types Pillow has no built-in decoder for; forwarded undecoded when it cannot open them
+PASSTHROUGH_MIME_TYPES = {"image/heic", "image/heif"}
+
+IMAGE_BYTES = metrics.counter(
+    "axon_image_bytes_total",
+    "Image bytes received from users and sent to the model.",
+    ["direction"],
+)
+IMAGE_BYTES_SAVED = metrics.counter(
+    "axon_image_bytes_saved_total",
+    "Bytes saved by downscaling/re-encoding user images.",
+)
+
+
+class ImageIngestError(ValueError):
+    """Base class for rejected images."""
+
+
+class ImageTooLargeError(ImageIngestError):
+    """Image exceeds MAX_IMAGE_BYTES."""
+
+
+class UnsupportedImageError(ImageIngestError):
+    """Payload is not a recognizable image."""
+
+
+class IngestedImage:
+    """A compact, model-ready image plus its fingerprints."""
+
+    __slots__ = ("data", "mime_type", "width", "height", "original_size", "sha256", "phash")
+
+    def __init__(
+        self,
+        data: bytes,
+        mime_type: str,
+        width: int,
+        height: int,
+        original_size: int,
+        phash: int | None = None,
+    ):
+        self.data = data
+        self.mime_type = mime_type
+        self.width = width
+        self.height = height
+        self.original_size = original_size
+        self.sha256: str = ""  # Content hash of the original upload
+        self.phash = phash  # 64-bit difference hash (None if undecodable)
+
+
+def perceptual_hash(img: Image.Image) -> int:
+    """64-bit dHash: compares adjacent pixels of a 9x8 grayscale thumbnail."""
+    small = img.convert("L").resize((9, 8), Image.Resampling.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        offset = row * 9
+        for col in range(8):
+            value = (value << 1) | (pixels[offset + col] < pixels[offset + col + 1])
+    return value
+
+
+def sniff_mime_type(data: bytes) -> str | None:
+    """Detect the image MIME type from magic bytes."""
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if data[:2] == b"BM":
+        return "image/bmp"
+    if data[4:8] == b"ftyp":
+        brand = data[8:12]
+        if brand in (b"heic", b"heix", b"hevc", b"hevx"):
+            return "image/heic"
+        if brand in (b"mif1", b"msf1", b"heif"):
+            return "image/heif"
+    return None
+
+
+class ImagePipeline:
+    """
+    Size-bounded ingestion stage for multimodal turns.
+    Decoding and re-encoding run in a dedicated thread pool.
+    """
+
+    def __init__(self):
+        self.max_bytes = settings.MAX_IMAGE_BYTES
+        self.max_dimension = settings.IMAGE_MAX_DIMENSION
+        self.quality = settings.IMAGE_JPEG_QUALITY
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix="axon-image",
+        )
+
+    async def ingest(self, image: str | bytes) -> IngestedImage:
+        """
+        Validate and prepare an image for the model.
+
+        Args:
+            image: Base64 string (optionally a data URL) or raw bytes
+
+        Returns:
+            IngestedImage with downscaled bytes and the detected MIME type
+
+        Raises:
+            ImageTooLargeError / UnsupportedImageError
+        """
+        if isinstance(image, str):
+            if "base64," in image:
+                image = image.split("base64,", 1)[1]
+            # Reject before decoding: base64 inflates by 4/3
+            if len(image) * 3 // 4 > self.max_bytes:
+                raise ImageTooLargeError(f"Image exceeds {self.max_bytes} bytes")
+        elif len(image) > self.max_bytes:
+            raise ImageTooLargeError(f"Image exceeds {self.max_bytes} bytes")
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._process, image)
+
+    def _process(self, payload: str | bytes) -> IngestedImage:
+        """Decode, sniff and downscale (runs in the worker pool)."""
+        if isinstance(payload, str):
+            try:
+                raw = base64.b64decode(payload, validate=False)
+            except (binascii.Error, ValueError) as e:
+                raise UnsupportedImageError(f"Invalid base64 image: {e}")
+        else:
+            raw = bytes(payload)
+
+        original_size = len(raw)
+        if original_size > self.max_bytes:
+            raise ImageTooLargeError(f"Image exceeds {self.max_bytes} bytes")
+
+        mime_type = sniff_mime_type(raw)
+        if mime_type is None:
+            raise UnsupportedImageError("Unrecognized image format")
+
+        IMAGE_BYTES.inc("in", amount=original_size)
+
+        try:
+            result = self._downscale(raw, mime_type)
+        except UnidentifiedImageError as e:
+            # No HEIC/HEIF plugin installed: the model can still read it. Anything
+            # else Pillow cannot identify is corrupt or mislabelled.
+            if mime_type not in PASSTHROUGH_MIME_TYPES:
+                raise UnsupportedImageError(f"Could not decode image: {e}")
+            result = IngestedImage(raw, mime_type, 0, 0, original_size)
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError) as e:
+            # Truncated or corrupt data (plugins also raise ValueError/SyntaxError
+            # on malformed headers), or a decompression bomb
+            raise UnsupportedImageError(f"Could not decode image: {e}")
+
+        result.sha256 = hashlib.sha256(raw).hexdigest()
+        IMAGE_BYTES.inc("out", amount=len(result.data))
+        IMAGE_BYTES_SAVED.inc(amount=max(original_size - len(result.data), 0))
+        return result
+
+    def _downscale(self, raw: bytes, mime_type: str) -> IngestedImage:
+        """Fit the image within max_dimension, re-encoding only when needed."""
+        with Image.open(io.BytesIO(raw)) as img:
+            width, height = img.size
+            needs_resize = max(width, height) > self.max_dimension
+            needs_convert = mime_type not in MODEL_MIME_TYPES
+
+            if not needs_resize and not needs_convert:
+                return IngestedImage(raw, mime_type, width, height, len(raw), perceptual_hash(img))
+
+            # JPEG: let the decoder skip straight to a reduced scale
+            img.draft("RGB", (self.max_dimension, self.max_dimension))
+            img.thumbnail((self.max_dimension, self.max_dimension), Image.Resampling.LANCZOS)
+
+            has_alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+            out = io.BytesIO()
+            if has_alpha:
+                img.save(out, format="PNG", optimize=True)
+                out_mime = "image/png"
+            else:
+                img.convert("RGB").save(out, format="JPEG", quality=self.quality, optimize=True)
+                out_mime = "image/jpeg"
+
+            return IngestedImage(
+                out.getvalue(), out_mime, img.width, img.height, len(raw), perceptual_hash(img)
+            )
+
+
+# Singleton instance
+image_pipeline = ImagePipeline()
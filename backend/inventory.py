@@ -0,0 +1,252 @@
+"""
+Project AXON — Local Ad Inventory
+Partner catalog loaded into an in-memory inverted index with BM25 scoring.
+Lets the AXON Registry match detected entities to ads without a SERP call.
+"""
+
+import asyncio
+import heapq
+import json
+import math
+import os
+import re
+import time
+from typing import Iterable, Optional
+
+from backend.config import settings
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    "a", "an", "and", "the", "for", "of", "to", "in", "on", "with", "at", "by",
+    "from", "or", "is", "it", "this", "that", "my", "your", "best", "buy",
+})
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Title and keywords count more than the free-text description
+TITLE_WEIGHT = 3
+KEYWORD_WEIGHT = 2
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens with stopwords removed and plurals folded."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class AdItem:
+    """A single partner ad from the catalog."""
+
+    __slots__ = (
+        "id", "title", "vendor", "category", "description", "keywords",
+        "price", "rating", "reviews", "link", "images", "local_availability", "bid",
+    )
+
+    def __init__(self, record: dict):
+        self.id = str(record["id"])
+        self.title = record["title"]
+        self.vendor = record.get("vendor", "Trusted Partner")
+        self.category = record.get("category", "")
+        self.description = record.get("description", "")
+        self.keywords = list(record.get("keywords") or [])
+        self.price = record.get("price", "")
+        self.rating = record.get("rating", "")
+        self.reviews = record.get("reviews", "")
+        self.link = record.get("link")
+        self.images = list(record.get("images") or [])
+        self.local_availability = record.get("local_availability", "")
+        self.bid = float(record.get("bid", 1.0))
+
+    def text(self) -> str:
+        """Flat text used for embeddings."""
+        return f"{self.title} {' '.join(self.keywords)} {self.category} {self.description}"
+
+    def weighted_tokens(self) -> list[str]:
+        return (
+            tokenize(self.title) * TITLE_WEIGHT
+            + tokenize(" ".join(self.keywords)) * KEYWORD_WEIGHT
+            + tokenize(f"{self.category} {self.vendor} {self.description}")
+        )
+
+    def to_result(self) -> dict:
+        """Shape the item like a SERP shopping result so Nudge creation is shared."""
+        return {
+            "title": self.title,
+            "source": self.vendor,
+            "price": self.price,
+            "rating": self.rating,
+            "reviews": self.reviews,
+            "product_link": self.link,
+            "images": self.images,
+            "local_availability": self.local_availability,
+            "inventory_id": self.id,
+            "bid": self.bid,
+        }
+
+
+class InventoryIndex:
+    """Immutable BM25 inverted index over a list of AdItems."""
+
+    def __init__(self, items: list[AdItem]):
+        self.items = items
+        self.by_id: dict[str, AdItem] = {item.id: item for item in items}
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        self.doc_lengths: list[int] = []
+
+        for doc_id, item in enumerate(items):
+            tokens = item.weighted_tokens()
+            self.doc_lengths.append(len(tokens))
+            counts: dict[str, int] = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, tf in counts.items():
+                self.postings.setdefault(token, []).append((doc_id, tf))
+
+        n = len(items)
+        self.avg_doc_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            token: math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for token, posting in self.postings.items()
+        }
+
+    def search(self, query_tokens: Iterable[str], k: int = 5) -> list[tuple[float, AdItem]]:
+        """Return the top-k (score, item) pairs for the query tokens."""
+        scores: dict[int, float] = {}
+        avgdl = self.avg_doc_length or 1.0
+        for token in set(query_tokens):
+            posting = self.postings.get(token)
+            if not posting:
+                continue
+            idf = self.idf[token]
+            for doc_id, tf in posting:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        top = heapq.nlargest(k, scores.items(), key=lambda pair: pair[1])
+        return [(score, self.items[doc_id]) for doc_id, score in top]
+
+
+class AdInventory:
+    """
+    Hot-reloadable partner catalog.
+    Nothing is read at import: the first refresh_if_changed() (startup hook or
+    first lookup) builds the index. After that the catalog file is re-checked
+    at most every INVENTORY_RELOAD_INTERVAL seconds; a changed file is
+    re-indexed in a worker thread and swapped in atomically so in-flight
+    searches keep using the old index.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or settings.INVENTORY_PATH
+        self.min_score = settings.INVENTORY_MIN_SCORE
+        self.reload_interval = settings.INVENTORY_RELOAD_INTERVAL
+        self._index = InventoryIndex([])
+        self._mtime: Optional[float] = None
+        self.version = 0  # Bumped on every (re)load so derived indexes can resync
+        self._last_check = 0.0
+        self._reload_lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        return len(self._index.items)
+
+    @property
+    def items(self) -> list[AdItem]:
+        return self._index.items
+
+    def get(self, item_id: str) -> Optional[AdItem]:
+        return self._index.by_id.get(item_id)
+
+    def _read_records(self) -> list[dict]:
+        if self.path.endswith(".parquet"):
+            try:
+                import pyarrow.parquet as pq  # Only needed for Parquet catalogs
+            except ImportError as e:
+                raise RuntimeError(
+                    f"Inventory: {self.path} is a Parquet catalog but pyarrow is not installed "
+                    "(pip install pyarrow, or point INVENTORY_PATH at a .jsonl file)"
+                ) from e
+            return pq.read_table(self.path).to_pylist()
+
+        records = []
+        with open(self.path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    print(f"Inventory: skipping malformed line {line_number}: {e}")
+        return records
+
+    def _build(self) -> tuple[InventoryIndex, Optional[float]]:
+        if not os.path.exists(self.path):
+            return InventoryIndex([]), None
+        mtime = os.path.getmtime(self.path)
+        items = []
+        for record in self._read_records():
+            try:
+                items.append(AdItem(record))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Inventory: skipping invalid record: {e}")
+        return InventoryIndex(items), mtime
+
+    def load(self) -> int:
+        """Synchronously (re)build the index. Returns the number of ads loaded."""
+        self._index, self._mtime = self._build()
+        self._last_check = time.monotonic()
+        self.version += 1
+        return self.size
+
+    async def _swap(self) -> int:
+        self._index, self._mtime = await asyncio.to_thread(self._build)
+        self._last_check = time.monotonic()
+        self.version += 1
+        print(f"Inventory: loaded {self.size} ads from {self.path}")
+        return self.size
+
+    async def reload(self) -> int:
+        """Rebuild the index off the event loop and swap it in."""
+        async with self._reload_lock:
+            return await self._swap()
+
+    async def refresh_if_changed(self) -> None:
+        """Cheap, throttled mtime check; reloads when the catalog file changed."""
+        if not self.version:
+            # First use: load once, concurrent callers wait instead of seeing an empty catalog
+            async with self._reload_lock:
+                if not self.version:
+                    await self._swap()
+            return
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime and not self._reload_lock.locked():
+            await self.reload()
+
+    def search(self, entities: list[str], k: int = 5) -> list[tuple[float, AdItem]]:
+        """Match detected entities against the catalog, dropping weak matches."""
+        tokens = tokenize(" ".join(entities))
+        if not tokens:
+            return []
+        return [(score, item) for score, item in self._index.search(tokens, k) if score >= self.min_score]
+
+
+# Singleton instance
+ad_inventory = AdInventory()
@@ -0,0 +1,147 @@
+"""
+Project AXON — Incremental JSON Parser
+Pulls top-level fields out of a streamed JSON object as soon as each value
+is complete, so callers can act on decisive fields (e.g. is_safe_for_ads)
+before the model has finished generating the rest.
+"""
+
+import json
+from typing import Any, Optional
+
+
+class IncrementalJSONParser:
+    """
+    Feed text chunks; completed top-level (key, value) pairs are returned
+    from feed() and accumulated in `fields`. Anything before the opening
+    brace (e.g. a ```json fence) is skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: Optional[str] = None
+        self.fields: dict[str, Any] = {}
+        self.complete = False
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        self._buffer += chunk
+        emitted: list[tuple[str, Any]] = []
+        while self._step(emitted):
+            pass
+        return emitted
+
+    def result(self) -> dict[str, Any]:
+        """The full object; raises ValueError if the stream ended early."""
+        if not self.complete:
+            raise ValueError(f"Truncated JSON object after {len(self.fields)} fields")
+        return dict(self.fields)
+
+    def _skip_whitespace(self) -> bool:
+        while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+            self._pos += 1
+        return self._pos < len(self._buffer)
+
+    def _string_end(self, start: int) -> Optional[int]:
+        i = start + 1
+        while i < len(self._buffer):
+            char = self._buffer[i]
+            if char == "\\":
+                i += 2
+                continue
+            if char == '"':
+                return i + 1
+            i += 1
+        return None
+
+    def _value_end(self, start: int) -> Optional[int]:
+        first = self._buffer[start]
+        if first == '"':
+            return self._string_end(start)
+
+        if first in "{[":
+            depth, i = 0, start
+            while i < len(self._buffer):
+                char = self._buffer[i]
+                if char == '"':
+                    end = self._string_end(i)
+                    if end is None:
+                        return None
+                    i = end
+                    continue
+                if char in "{[":
+                    depth += 1
+                elif char in "}]":
+                    depth -= 1
+                    if depth == 0:
+                        return i + 1
+                i += 1
+            return None
+
+        # Scalar: only complete once a delimiter arrives (a number may continue)
+        i = start
+        while i < len(self._buffer):
+            if self._buffer[i] in ",}" or self._buffer[i].isspace():
+                return i
+            i += 1
+        return None
+
+    def _step(self, emitted: list) -> bool:
+        """Advance one token; False when more input is needed."""
+        if self._state == "done":
+            return False
+
+        if self._state == "start":
+            brace = self._buffer.find("{", self._pos)
+            if brace < 0:
+                self._pos = len(self._buffer)
+                return False
+            self._pos = brace + 1
+            self._state = "key"
+            return True
+
+        if not self._skip_whitespace():
+            return False
+        char = self._buffer[self._pos]
+
+        if self._state == "key":
+            if char == "}":
+                self._pos += 1
+                self._state, self.complete = "done", True
+                return True
+            if char != '"':
+                raise ValueError(f"Expected a key at offset {self._pos}, got {char!r}")
+            end = self._string_end(self._pos)
+            if end is None:
+                return False
+            self._key = json.loads(self._buffer[self._pos:end])
+            self._pos, self._state = end, "colon"
+            return True
+
+        if self._state == "colon":
+            if char != ":":
+                raise ValueError(f"Expected ':' at offset {self._pos}, got {char!r}")
+            self._pos += 1
+            self._state = "value"
+            return True
+
+        if self._state == "value":
+            end = self._value_end(self._pos)
+            if end is None:
+                return False
+            value = json.loads(self._buffer[self._pos:end])
+            self.fields[self._key] = value
+            emitted.append((self._key, value))
+            self._pos, self._state = end, "comma"
+            return True
+
+        # After a value: ',' continues the object, '}' closes it
+        if char == ",":
+            self._pos += 1
+            self._state = "key"
+            return True
+        if char == "}":
+            self._pos += 1
+            self._state, self.complete = "done", True
+            return True
+        raise ValueError(f"Expected ',' or '}}' at offset {self._pos}, got {char!r}")
@@ -9,20 +9,50 @@ from typing import Optional
 import asyncio
 import json
 
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    WebSocket,
+    WebSocketDisconnect,
+    Request,
+    Header,
+    Form,
+    File,
+    UploadFile,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse
 from pydantic import BaseModel
 
 from backend.config import settings
+from backend.warmup import warm_up
 from backend.gemini_client import gemini
-from backend.models import ConversationState, IntentAnalysis, Nudge, RevenueEvent
+from backend.models import IntentAnalysis, Nudge, RevenueEvent
+from backend.session_state import ConversationState
+from backend.session_snapshot import SessionTable, session_snapshot
 from backend.pulse_monitor import pulse_monitor
 from backend.axon_registry import axon_registry
-from backend.synthesizer import synthesizer
-from backend.redis_client import RedisClient
-
-# Validate configuration on startup
-settings.validate()
+from backend.inventory import ad_inventory
+from backend.frequency_cap import frequency_capper
+from backend.prefetch import prefetcher
+from backend.work_queue import work_queue
+from backend.cache_warmer import cache_warmer
+from backend.popularity import popularity_sync
+from backend.compaction import compactor
+from backend.synthesizer import synthesizer, UNAVAILABLE_MESSAGE
+from backend.serp_client import serp_client
+from backend.revenue_stream import revenue_aggregator, revenue_consumer, revenue_stream
+from backend.click_tracker import click_tracker
+from backend.redis_client import RedisClient, fail_open
+from backend.usage import usage_tracker
+from backend.data.store import store
+from backend.image_pipeline import image_pipeline, ImageTooLargeError, ImageIngestError
+from backend.metrics import (
+    metrics,
+    STAGE_LATENCY,
+    NUDGES_TRIGGERED,
+    SAFETY_BLOCKS,
+)
 
 from backend.admin_routes import router as admin_router
 
@@ -66,14 +96,47 @@ manager = ConnectionManager()
 
 @app.on_event("startup")
 async def startup_event():
-    # Initialize Redis
-    RedisClient.get_instance()
+    # Validate settings and build the lazily constructed clients before traffic arrives
+    if settings.WARM_UP_ON_STARTUP:
+        await warm_up()
+    else:
+        settings.validate()
+    # Sessions from the last snapshot are decoded lazily on first access
+    restored = session_snapshot.open()
+    if restored:
+        print(f"Session snapshot: {restored} sessions available for warm restart")
+    session_snapshot.start(sessions)
+    # Index the partner catalog off the event loop before the first lookup needs it
+    await ad_inventory.refresh_if_changed()
+    # Keys created before the token reverse index existed would otherwise resolve as anonymous
+    backfilled = await fail_open("backfill_token_index", lambda redis: store.backfill_token_index(), timeout=5.0)
+    if backfilled:
+        print(f"API keys: indexed {backfilled} existing tokens")
+    popularity_sync.start()
+    cache_warmer.start()
+    revenue_consumer.start()
+    click_tracker.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await cache_warmer.stop()
+    await popularity_sync.stop()
+    await click_tracker.stop()
+    await revenue_consumer.stop()
+    await compactor.stop()
+    await prefetcher.shutdown()
+    await session_snapshot.stop()
+    await RedisClient.close()
 
 @app.middleware("http")
 async def track_requests(request: Request, call_next):
-    # Track stats in Redis
-    redis = await RedisClient.get_instance()
-    await redis.incr("stats:total_requests")
+    # Click redirects are counted by click_tracker and must not wait on Redis
+    if request.url.path.startswith("/r/"):
+        return await call_next(request)
+    
+    # Track stats in Redis (best effort: an outage must not fail the request)
+    await fail_open("incr", lambda redis: redis.incr("stats:total_requests"))
     
     # Process request
     response = await call_next(request)
@@ -89,7 +152,7 @@ async def track_requests(request: Request, call_next):
     }
     
     # Publish to internal Redis channel (optional, used if we had multiple worker nodes)
-    await redis.publish("events", json.dumps(event))
+    await fail_open("publish", lambda redis: redis.publish("events", json.dumps(event)))
     
     # Directly broadcast to connected websockets for the demo
     # In a real scaled app, a separate worker would subscribe to Redis and push to WS
@@ -100,6 +163,17 @@ async def track_requests(request: Request, call_next):
         
     return response
 
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # The form parser spools the whole body before /chat/upload runs: refuse oversized ones up front
+    if request.url.path == "/chat/upload":
+        length = request.headers.get("content-length", "")
+        if length.isdigit() and int(length) > settings.MAX_IMAGE_BYTES + settings.UPLOAD_FORM_OVERHEAD:
+            return JSONResponse(status_code=413, content={"detail": f"Image exceeds {settings.MAX_IMAGE_BYTES} bytes"})
+    return await call_next(request)
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
@@ -110,14 +184,15 @@ async def websocket_endpoint(websocket: WebSocket):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
 
-# In-memory session storage (replace with Firestore in production)
-sessions: dict[str, ConversationState] = {}
+# In-memory session storage, snapshotted to disk for warm restarts (replace with Firestore in production)
+sessions = SessionTable(session_snapshot)
 
 
 class ChatRequest(BaseModel):
     """Request body for chat endpoint."""
     message: str
     session_id: str | None = None
+    user_id: str | None = None  # Stable end-user id for cross-session frequency caps
     image: str | None = None  # Base64 encoded image
 
 
@@ -154,11 +229,13 @@ async def health():
         "status": "healthy" if gemini_status["status"] == "connected" else "degraded",
         "gemini": gemini_status,
         "active_sessions": len(sessions),
+        "redis": {"circuit": RedisClient.breaker.to_dict(), "pool": RedisClient.pool_stats()},
+        "circuits": {"gemini": gemini.breaker.to_dict(), "serp": serp_client.breaker.to_dict()},
     }
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, x_api_key: str | None = Header(default=None)):
     """
     Main chat endpoint with full AXON pipeline.
     
@@ -168,67 +245,150 @@ async def chat(request: ChatRequest):
     3. Synthesizer generates response with optional nudge
     4. Revenue events are tracked if ads are shown
     """
+    async with compactor.request():
+        return await _run_chat(request.message, request.session_id, request.image, x_api_key, request.user_id)
+
+
+@app.post("/chat/upload", response_model=ChatResponse)
+async def chat_upload(
+    message: str = Form(...),
+    session_id: str | None = Form(default=None),
+    user_id: str | None = Form(default=None),
+    image: UploadFile | None = File(default=None),
+    x_api_key: str | None = Header(default=None),
+):
+    """
+    Multipart variant of /chat for image turns.
+    The image is streamed into a spooled temp file by the server and read
+    once as raw bytes, skipping the base64 inflation of the JSON contract.
+    Bodies declaring more than the limit are refused by limit_upload_size
+    before they are parsed.
+    """
+    image_bytes = None
+    if image is not None:
+        if image.size is not None and image.size > settings.MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Image exceeds {settings.MAX_IMAGE_BYTES} bytes")
+        # Chunked bodies carry no length up front: read at most one byte past the limit into memory
+        image_bytes = await image.read(settings.MAX_IMAGE_BYTES + 1)
+        await image.close()
+        if len(image_bytes) > settings.MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail=f"Image exceeds {settings.MAX_IMAGE_BYTES} bytes")
+    
+    async with compactor.request():
+        return await _run_chat(message, session_id, image_bytes or None, x_api_key, user_id)
+
+
+async def _run_chat(
+    message: str,
+    session_id: str | None,
+    image_payload: str | bytes | None,
+    api_key: str | None,
+    user_id: str | None = None,
+) -> ChatResponse:
+    """Shared pipeline behind the JSON and multipart chat endpoints."""
     # Get or create session
-    session_id = request.session_id or str(uuid.uuid4())
+    session_id = session_id or str(uuid.uuid4())
     
-    if session_id not in sessions:
-        sessions[session_id] = ConversationState(session_id=session_id)
+    session = sessions.get(session_id)
+    if session is None:
+        session = sessions[session_id] = ConversationState(session_id=session_id)
     
-    session = sessions[session_id]
+    # Validate and downscale the image off the event loop before any model call
+    image = None
+    if image_payload:
+        try:
+            with STAGE_LATENCY.time("image_ingest"):
+                image = await image_pipeline.ingest(image_payload)
+        except ImageTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ImageIngestError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+    
+    # Attribute token spend in this request to the session and caller's key (best effort)
+    key_id = await fail_open("resolve_key_id", lambda redis: store.resolve_key_id(api_key), default="anonymous")
+    usage_tracker.bind(session_id, key_id)
+    work_queue.begin_request()
         
     # Add message to history
     # If image present, note it in the content for context (but don't store huge base64 in history text)
-    msg_content = request.message
-    if request.image:
+    msg_content = message
+    if image_payload:
         msg_content += " [User uploaded an image]"
     
     session.add_message("user", msg_content)
     
     try:
         # Step 1: Pulse Monitor - Analyze intent (Multimodal if image present)
-        intent_analysis = await pulse_monitor.analyze(
-            session.messages, 
-            image=request.image
-        )
+        with STAGE_LATENCY.time("pulse"):
+            intent_analysis = await work_queue.analyze(session, image=image)
+        previous_intent = session.current_intent
         session.current_intent = intent_analysis
+        if not intent_analysis.is_safe_for_ads:
+            SAFETY_BLOCKS.inc()
+            prefetcher.cancel(session)
         
         # Step 2: Check if nudge should be triggered
         nudge = None
         if pulse_monitor.should_trigger_nudge(intent_analysis):
-            # Step 3: AXON Registry - Find matching ad
-            nudge = await axon_registry.find_nudge(intent_analysis)
+            # Step 3: AXON Registry - Find matching ad (prefetched candidates skip the upstream lookups)
+            with STAGE_LATENCY.time("nudge_lookup"):
+                nudge = await work_queue.find_nudge(
+                    intent_analysis,
+                    session_id=session_id,
+                    user_id=user_id,
+                    prefetched=prefetcher.take(session, intent_analysis),
+                )
+            if nudge:
+                # Links in the nudge go through the signed click redirect
+                nudge = click_tracker.track(nudge, session_id, intent_analysis.intent_bucket.value)
+        else:
+            # Propensity climbing towards the threshold: rank candidates in the background
+            prefetcher.schedule(session, intent_analysis, previous_intent, user_id=user_id)
         
         # Step 4: Synthesizer - Generate response with optional nudge
-        conversation_context = "\n".join([
-            f"{m.role.upper()}: {m.content}"
-            for m in session.get_recent_messages(5)
-        ])
+        conversation_context = session.transcript.window("synthesis")
         
-        response = await synthesizer.generate_response(
-            user_message=request.message,
-            conversation_context=conversation_context,
-            nudge=nudge,
-        )
+        with STAGE_LATENCY.time("synthesis"):
+            response = await synthesizer.generate_response(
+                user_message=message,
+                conversation_context=conversation_context,
+                nudge=nudge,
+                cacheable=image is None,
+            )
+        
+        if response == UNAVAILABLE_MESSAGE:
+            nudge = None  # Gemini is down: the nudge was never shown
         
         session.add_message("assistant", response)
+        # Long sessions get their older turns summarized once the server is idle
+        compactor.schedule(session)
         
         # Track nudge if injected
         if nudge:
+            NUDGES_TRIGGERED.inc(intent_analysis.intent_bucket.value)
             session.nudges_shown.append(nudge)
+            await frequency_capper.record(
+                session_id, user_id, nudge.product_name, nudge.vendor_name,
+                intent_analysis.detected_entities,
+            )
             # Simulate revenue (demo purposes)
             # Higher revenue for high struggle/commercial intent
             revenue_amount = 2.50
             if intent_analysis.intent_bucket in ["commercial", "transactional"]:
                 revenue_amount = 4.50
                 
-            session.total_revenue_generated += revenue_amount
-            session.revenue_events.append(RevenueEvent(
+            revenue_event = RevenueEvent(
                 amount=revenue_amount,
                 source="nudge_impression",
                 timestamp=datetime.now(),
                 intent_bucket=intent_analysis.intent_bucket.value,
-                session_id=session_id
-            ))
+                session_id=session_id,
+                impression_id=nudge.impression_id,
+            )
+            session.total_revenue_generated += revenue_amount
+            session.revenue_events.append(revenue_event)
+            # Dashboards and billing aggregate from the stream
+            await revenue_stream.publish(revenue_event)
         
         return ChatResponse(
             response=response,
@@ -245,7 +405,7 @@ async def chat(request: ChatRequest):
                 "product": nudge.product_name,
                 "vendor": nudge.vendor_name,
                 "relevance": f"{nudge.relevance_score:.0%}",
-                "link": nudge.link,
+                "link": nudge.tracking_link or nudge.link,
                 "images": nudge.images
             } if nudge else None,
         )
@@ -259,13 +419,15 @@ async def chat(request: ChatRequest):
 @app.get("/session/{session_id}")
 async def get_session(session_id: str):
     """Get session state for debugging/analytics."""
-    if session_id not in sessions:
+    session = sessions.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
     return {
         "session_id": session.session_id,
-        "message_count": len(session.messages),
+        "message_count": len(session.messages) + session.compacted_messages,
+        "compacted_messages": session.compacted_messages,
+        "summary": session.summary,
         "messages": [
             {"role": m.role, "content": m.content[:100] + "..." if len(m.content) > 100 else m.content}
             for m in session.messages
@@ -277,64 +439,105 @@ async def get_session(session_id: str):
         } if session.current_intent else None,
         "nudges_shown": len(session.nudges_shown),
         "total_revenue": f"${session.total_revenue_generated:.2f}",
+        "token_cost": f"${usage_tracker.session_cost(session_id):.6f}",
     }
 
 
+@app.delete("/session/{session_id}")
+async def end_session(session_id: str):
+    """End a session and drop any in-flight prefetch for it."""
+    session = sessions.pop(session_id, None)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    prefetcher.cancel(session)
+    usage_tracker.forget_session(session_id)
+    return {"session_id": session_id, "status": "ended"}
+
+
+@app.get("/r/{token}")
+async def click_redirect(token: str):
+    """Attribute a nudge click and send the user on to the merchant."""
+    click = click_tracker.verify(token)
+    if click is None:
+        # Unverifiable (e.g. signed under a rotated key): still take the user where the link pointed
+        url = click_tracker.destination(token)
+        if url is None:
+            raise HTTPException(status_code=404, detail="Unknown link")
+        return RedirectResponse(url, status_code=302, headers={"Cache-Control": "no-store"})
+    
+    click_tracker.record(click)
+    return RedirectResponse(click.url, status_code=302, headers={"Cache-Control": "no-store"})
+
+
 @app.get("/analytics")
 async def analytics():
     """Get rich analytics for the dashboard."""
+    # One pass over session summaries; sessions still in the snapshot stay cold
     total_sessions = len(sessions)
-    total_nudges = sum(len(s.nudges_shown) for s in sessions.values())
-    total_revenue = sum(s.total_revenue_generated for s in sessions.values())
-    
-    # Calculate Intent Distribution
+    total_nudges = 0
+    total_revenue = 0.0
     intent_counts = {"educational": 0, "commercial": 0, "transactional": 0, "navigational": 0}
-    for s in sessions.values():
-        if s.current_intent:
-            bucket = s.current_intent.intent_bucket.value
-            intent_counts[bucket] = intent_counts.get(bucket, 0) + 1
+    all_points = []
+    for s in sessions.summaries():
+        total_nudges += s.nudges
+        total_revenue += s.revenue
+        if s.intent:
+            intent_counts[s.intent] = intent_counts.get(s.intent, 0) + 1
+        all_points.extend(s.revenue_points)
             
     intent_distribution = [
         {"name": k.title(), "value": v} for k, v in intent_counts.items() if v > 0
     ]
     
     # Calculate Revenue Over Time (Aggregated by minute for demo)
-    # Collect all revenue events
-    all_events = []
-    for s in sessions.values():
-        all_events.extend(s.revenue_events)
-    
     # Sort by timestamp
-    all_events.sort(key=lambda x: x.timestamp)
+    all_points.sort(key=lambda x: x[0])
     
     revenue_chart = []
     running_total = 0.0
     
-    if all_events:
+    if all_points:
         # Start from the first event
-        for event in all_events:
-            running_total += event.amount
+        for timestamp, amount in all_points:
+            running_total += amount
             revenue_chart.append({
-                "time": event.timestamp.strftime("%H:%M:%S"),
+                "time": timestamp.strftime("%H:%M:%S"),
                 "revenue": running_total,
-                "amount": event.amount
+                "amount": amount
             })
     else:
         # Empty chart fallback
         revenue_chart = [{"time": datetime.now().strftime("%H:%M:%S"), "revenue": 0, "amount": 0}]
 
+    # Recent conversions across all instances come from the revenue stream
+    recent_events = await revenue_stream.recent(20) or sorted(
+        (e for s in sessions.restored().values() for e in s.revenue_events),
+        key=lambda x: x.timestamp, reverse=True,
+    )[:20]
+
     # CPIF Calculation (Cost Per Intent Fulfillment)
-    # Mock Token Usage: Average 1000 tokens per session, $5 per 1M tokens = $0.005 per session
-    estimated_cost = total_sessions * 0.005
-    cpif = (total_revenue - estimated_cost) / total_sessions if total_sessions > 0 else 0
+    # Token cost comes from the usage metadata of every Gemini response
+    token_usage = usage_tracker.snapshot()
+    token_cost = token_usage["total"]["cost_usd"]
+    cpif = (total_revenue - token_cost) / total_sessions if total_sessions > 0 else 0
+    
+    # Click-through joined to impressions from the stream aggregates
+    click_through = await revenue_aggregator.click_through() or {"impressions": 0, "clicks": 0, "ctr": 0.0, "by_intent": {}}
 
     return {
         "metrics": {
             "total_revenue": total_revenue,
             "total_sessions": total_sessions,
             "active_nudges": total_nudges,
-            "cpif": cpif
+            "cpif": cpif,
+            "token_cost": token_cost,
+            "prefetch_hit_rate": prefetcher.hit_rate(),
+            "clicks": click_through["clicks"],
+            "ctr": click_through["ctr"],
         },
+        "click_through": click_through,
+        "token_usage": token_usage,
         "charts": {
             "revenue_over_time": revenue_chart,
             "intent_distribution": intent_distribution
@@ -347,17 +550,24 @@ async def analytics():
                 "revenue": e.amount,
                 "timestamp": e.timestamp.isoformat()
             }
-            for e in sorted(all_events, key=lambda x: x.timestamp, reverse=True)[:20]
+            for e in recent_events
         ]
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (per-stage and per-upstream latency, counters)."""
+    RedisClient.update_metrics()
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/stats")
 async def stats():
     """Simple stats endpoint."""
     return {
         "active_sessions": len(sessions),
-        "total_revenue": sum(s.total_revenue_generated for s in sessions.values())
+        "total_revenue": sum(s.revenue for s in sessions.summaries())
     }
 
 
@@ -0,0 +1,235 @@
+"""
+Project AXON — Metrics
+Lightweight in-process instrumentation exposed in Prometheus text format.
+Recording is a dict lookup plus a couple of integer increments, so it is
+safe to call on the /chat hot path.
+"""
+
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+
+# Latency buckets (seconds) tuned for LLM / search round-trips
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple, labelvalues: tuple, extra: str = "") -> str:
+    """Render a Prometheus label set, e.g. {stage="pulse",le="0.5"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels."""
+
+    __slots__ = ("name", "help", "labelnames", "_values")
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        """Increment the series identified by the positional label values."""
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> list[str]:
+        lines = []
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Point-in-time value with optional labels."""
+
+    __slots__ = ()
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues) -> None:
+        self._values[labelvalues] = value
+
+
+class _Timer:
+    """Context manager that observes elapsed wall time into a histogram."""
+
+    __slots__ = ("_histogram", "_labelvalues", "_start")
+
+    def __init__(self, histogram: "Histogram", labelvalues: tuple):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labelvalues)
+        return False
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram.
+    Stores per-bucket (non-cumulative) counts; cumulation happens at scrape time.
+    """
+
+    __slots__ = ("name", "help", "labelnames", "buckets", "_series")
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [bucket counts..., +Inf count, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        """Record a single observation."""
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = [0] * (len(self.buckets) + 2)
+            self._series[labelvalues] = series
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labelvalues) -> _Timer:
+        """Time a block: `with STAGE_LATENCY.time("pulse"): ...`"""
+        return _Timer(self, labelvalues)
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = []
+        bounds = self.buckets + (float("inf"),)
+        for labelvalues, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, series):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, labelvalues)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds all metrics and renders the /metrics exposition."""
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every registered metric in Prometheus text format (v0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Singleton registry
+metrics = MetricsRegistry()
+
+# Pipeline stages inside /chat (pulse, grounding, registry, synthesis, ...)
+STAGE_LATENCY = metrics.histogram(
+    "axon_stage_latency_seconds",
+    "Latency of AXON pipeline stages.",
+    ["stage"],
+)
+
+# Calls leaving the process: gemini (per model), serp (per engine), redis (per command)
+UPSTREAM_LATENCY = metrics.histogram(
+    "axon_upstream_latency_seconds",
+    "Latency of upstream calls.",
+    ["upstream", "target"],
+)
+
+UPSTREAM_ERRORS = metrics.counter(
+    "axon_upstream_errors_total",
+    "Failed upstream calls.",
+    ["upstream", "target"],
+)
+
+NUDGES_TRIGGERED = metrics.counter(
+    "axon_nudges_triggered_total",
+    "Nudges injected into responses.",
+    ["intent_bucket"],
+)
+
+SAFETY_BLOCKS = metrics.counter(
+    "axon_safety_blocks_total",
+    "Turns where the Safety Guard blocked ads.",
+)
+
+FALLBACKS = metrics.counter(
+    "axon_fallbacks_total",
+    "Fallback paths taken after an error or missing upstream.",
+    ["component"],
+)
+
+CACHE_HITS = metrics.counter(
+    "axon_cache_hits_total",
+    "Cache hits by cache name.",
+    ["cache"],
+)
+
+CACHE_MISSES = metrics.counter(
+    "axon_cache_misses_total",
+    "Cache misses by cache name.",
+    ["cache"],
+)
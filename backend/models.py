@@ -1,6 +1,7 @@
 """
 Project AXON Data Models
-Pydantic models for Intent Graph, Nudges, and Conversation State.
+Pydantic models for Intent Graph, Nudges and the API boundary.
+Live session state is in session_state.py.
 """
 
 from enum import Enum
@@ -43,6 +44,7 @@ class IntentAnalysis(BaseModel):
     reasoning: Optional[str] = None
     is_safe_for_ads: bool = True
     safety_reason: Optional[str] = None
+    topic_repeat_count: int = 0
 
 
 class Nudge(BaseModel):
@@ -55,6 +57,15 @@ class Nudge(BaseModel):
     images: list[str] = []
     call_to_action: Optional[str] = None
     local_availability: Optional[str] = None
+    impression_id: Optional[str] = None
+    tracking_link: Optional[str] = None  # Signed /r/ redirect to `link` (see click_tracker.py)
+
+
+class PrefetchedCandidates(BaseModel):
+    """Ad candidates fetched ahead of the conversion threshold."""
+    entities: list[str]
+    candidates: list[dict] = Field(default_factory=list)  # {"result", "source", "retrieval"}
+    created_at: datetime = Field(default_factory=datetime.now)
 
 
 class RevenueEvent(BaseModel):
@@ -64,25 +75,7 @@ class RevenueEvent(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.now)
     intent_bucket: Optional[str] = None
     session_id: Optional[str] = None
-
-
-class ConversationState(BaseModel):
-    """Full state of an AXON conversation session."""
-    session_id: str
-    messages: list[Message] = Field(default_factory=list)
-    current_intent: Optional[IntentAnalysis] = None
-    nudges_shown: list[Nudge] = Field(default_factory=list)
-    revenue_events: list[RevenueEvent] = Field(default_factory=list)
-    total_revenue_generated: float = 0.0
-    created_at: datetime = Field(default_factory=datetime.now)
-    
-    def add_message(self, role: str, content: str) -> None:
-        """Add a message to the conversation."""
-        self.messages.append(Message(role=role, content=content))
-    
-    def get_recent_messages(self, count: int = 20) -> list[Message]:
-        """Get the last N messages for context."""
-        return self.messages[-count:]
+    impression_id: Optional[str] = None  # Joins nudge clicks to their impression
 
 
 class AXONResponse(BaseModel):
@@ -0,0 +1,208 @@
+"""
+Project AXON — Popularity Sketch
+Counts how often SERP queries are looked up, in a fixed-size Count-Min
+sketch plus a small heavy-hitters table, so the head of the traffic
+distribution is known without keeping a counter per key.
+Counts decay by half every POPULARITY_HALF_LIFE seconds so the head
+follows current traffic. Each process periodically pushes its heavy hitters
+to a shared Redis ZSET, so the cache warmer sees lookups made by queue
+workers as well as by the API.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.redis_client import fail_open
+
+
+class CountMinSketch:
+    """Count-Min sketch with conservative update (never underestimates)."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.float64)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint32) % self.width
+
+    def add(self, key: str, count: float = 1.0) -> float:
+        """Add to a key's count and return its new estimate."""
+        columns = self._columns(key)
+        cells = self.table[self._rows, columns]
+        estimate = cells.min() + count
+        # Conservative update: only raise cells that are below the new estimate
+        self.table[self._rows, columns] = np.maximum(cells, estimate)
+        return float(estimate)
+
+    def estimate(self, key: str) -> float:
+        return float(self.table[self._rows, self._columns(key)].min())
+
+    def decay(self, factor: float) -> None:
+        self.table *= factor
+
+
+class PopularityTracker:
+    """
+    Count-Min estimates for every key, exact membership only for the top
+    `capacity` keys. Each heavy hitter keeps a payload (e.g. the query and
+    location) so the head can be replayed by the cache warmer.
+
+    Named trackers also share their head through Redis: flush() adds the
+    growth of each local heavy hitter to popularity:<name>, and shared_top()
+    reads the cluster-wide head. Unnamed trackers stay process-local.
+    """
+
+    def __init__(
+        self,
+        name: str = None,
+        capacity: int = None,
+        half_life: float = None,
+        width: int = 2048,
+        depth: int = 4,
+    ):
+        self.name = name
+        self.capacity = capacity or settings.POPULARITY_TOP_K
+        self.half_life = half_life or settings.POPULARITY_HALF_LIFE
+        self.sketch = CountMinSketch(width, depth)
+        self._heavy: dict[str, tuple[float, Any]] = {}  # key -> (estimate, payload)
+        self._pushed: dict[str, float] = {}  # key -> local estimate already added to Redis
+        self._last_decay = time.monotonic()
+
+    def _maybe_decay(self) -> None:
+        elapsed = time.monotonic() - self._last_decay
+        if elapsed < self.half_life:
+            return
+        factor = 0.5 ** (elapsed / self.half_life)
+        self.sketch.decay(factor)
+        self._heavy = {key: (count * factor, payload) for key, (count, payload) in self._heavy.items()}
+        self._pushed = {key: count * factor for key, count in self._pushed.items()}
+        self._last_decay = time.monotonic()
+
+    def record(self, key: str, payload: Any = None) -> float:
+        """Count one lookup of `key`; returns its estimated (decayed) count."""
+        self._maybe_decay()
+        estimate = self.sketch.add(key)
+
+        if key in self._heavy or len(self._heavy) < self.capacity:
+            self._heavy[key] = (estimate, payload)
+        else:
+            weakest = min(self._heavy, key=lambda k: self._heavy[k][0])
+            if estimate > self._heavy[weakest][0]:
+                del self._heavy[weakest]
+                self._heavy[key] = (estimate, payload)
+        return estimate
+
+    def estimate(self, key: str) -> float:
+        return self.sketch.estimate(key)
+
+    def top(self, n: int = None) -> list[tuple[str, float, Any]]:
+        """Heaviest keys first as (key, estimate, payload)."""
+        self._maybe_decay()
+        ranked = sorted(self._heavy.items(), key=lambda item: item[1][0], reverse=True)
+        return [(key, count, payload) for key, (count, payload) in ranked[:n or self.capacity]]
+
+    async def flush(self) -> int:
+        """Add what local heavy hitters gained since the last flush to the shared head."""
+        if not self.name:
+            return 0
+        self._maybe_decay()
+        snapshot = dict(self._heavy)
+        deltas = {
+            key: count - self._pushed.get(key, 0.0)
+            for key, (count, _) in snapshot.items()
+            if count > self._pushed.get(key, 0.0)
+        }
+        if not deltas:
+            return 0
+
+        key = f"popularity:{self.name}"
+        payloads_key = f"{key}:payloads"
+
+        async def push(redis) -> bool:
+            pipe = redis.pipeline(transaction=False)
+            for member, delta in deltas.items():
+                pipe.zincrby(key, delta, member)
+            pipe.hset(payloads_key, mapping={member: json.dumps(snapshot[member][1]) for member in deltas})
+            pipe.zremrangebyrank(key, 0, -(self.capacity + 1))
+            # Half-life windows: GETSET lets exactly one process see each window change
+            window = int(time.time() // self.half_life)
+            pipe.getset(f"{key}:window", window)
+            *_, previous = await pipe.execute()
+            if previous is not None and int(previous) < window:
+                # Halve the shared counts once per elapsed window and drop trimmed payloads
+                await redis.zunionstore(key, {key: 0.5 ** (window - int(previous))})
+                stale = set(await redis.hkeys(payloads_key)) - set(await redis.zrange(key, 0, -1))
+                if stale:
+                    await redis.hdel(payloads_key, *stale)
+            return True
+
+        if not await fail_open("popularity_flush", push, default=False, timeout=2.0):
+            return 0  # Redis unavailable: the same growth is pushed on the next flush
+        self._pushed = {member: count for member, (count, _) in snapshot.items()}
+        return len(deltas)
+
+    async def shared_top(self, n: int = None) -> list[tuple[str, float, Any]]:
+        """Cluster-wide head from Redis; the local head when Redis is unavailable."""
+        if not self.name:
+            return self.top(n)
+        key = f"popularity:{self.name}"
+
+        async def read(redis) -> list[tuple[str, float, Any]]:
+            ranked = await redis.zrevrange(key, 0, (n or self.capacity) - 1, withscores=True)
+            if not ranked:
+                return []
+            payloads = await redis.hmget(f"{key}:payloads", [member for member, _ in ranked])
+            return [
+                (member, float(score), json.loads(payload) if payload else None)
+                for (member, score), payload in zip(ranked, payloads)
+            ]
+
+        shared = await fail_open("popularity_top", read)
+        return self.top(n) if shared is None else shared
+
+
+class PopularitySync:
+    """Flushes the named trackers every POPULARITY_FLUSH_INTERVAL seconds."""
+
+    def __init__(self, trackers: list[PopularityTracker]):
+        self.trackers = trackers
+        self.interval = settings.POPULARITY_FLUSH_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+    async def flush(self) -> None:
+        for tracker in self.trackers:
+            await tracker.flush()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Popularity sync error: {e}")
+
+    def start(self) -> None:
+        if self._task or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            await self.flush()  # Don't lose the last interval's lookups
+
+
+# Singleton instances
+serp_popularity = PopularityTracker("serp")  # (query, location) -> SERP shopping lookups
+popularity_sync = PopularitySync([serp_popularity])
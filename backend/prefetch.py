@@ -0,0 +1,165 @@
+"""
+Project AXON — Predictive Nudge Prefetch
+While a session's propensity climbs towards CONVERSION_THRESHOLD, candidate
+ads are gathered and ranked in a background task and parked on the session.
+On the turn the threshold is crossed, find_nudge only re-ranks the parked
+candidates against the new analysis, with no inventory or SERP round trip.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from backend.config import settings
+from backend.models import IntentAnalysis, PrefetchedCandidates
+from backend.session_state import ConversationState
+from backend.inventory import tokenize
+from backend.metrics import metrics
+from backend.work_queue import work_queue
+
+
+PREFETCH_TASKS = metrics.counter(
+    "axon_prefetch_tasks_total",
+    "Background prefetch tasks by outcome.",
+    ["event"],
+)
+PREFETCH_LOOKUPS = metrics.counter(
+    "axon_prefetch_lookups_total",
+    "Nudge lookups by prefetch outcome (hit rate = hit / all).",
+    ["outcome"],
+)
+
+
+def entity_overlap(a: list[str], b: list[str]) -> float:
+    """Jaccard overlap of the entity token sets."""
+    left, right = set(tokenize(" ".join(a))), set(tokenize(" ".join(b)))
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class Prefetcher:
+    """
+    Schedules at most one prefetch per session and PREFETCH_CONCURRENCY in
+    total. When every slot is busy new prefetches are dropped rather than
+    queued, since a queued prefetch is likely stale by the time it runs.
+    """
+
+    def __init__(self):
+        self.min_propensity = settings.PREFETCH_MIN_PROPENSITY
+        self.max_inflight = settings.PREFETCH_CONCURRENCY
+        self.ttl = settings.PREFETCH_TTL
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def inflight(self) -> int:
+        return len(self._tasks)
+
+    def should_prefetch(self, analysis: IntentAnalysis, previous: Optional[IntentAnalysis]) -> bool:
+        """Safe, below the threshold but in the prefetch band, and rising."""
+        if not analysis.is_safe_for_ads or not analysis.detected_entities:
+            return False
+        if not self.min_propensity <= analysis.propensity_score < settings.CONVERSION_THRESHOLD:
+            return False
+        if previous is None:
+            return True
+        return (
+            analysis.propensity_score > previous.propensity_score
+            or analysis.topic_repeat_count > previous.topic_repeat_count
+        )
+
+    def _usable(self, prefetched: PrefetchedCandidates, analysis: IntentAnalysis) -> bool:
+        age = (datetime.now() - prefetched.created_at).total_seconds()
+        return (
+            age <= self.ttl
+            and entity_overlap(prefetched.entities, analysis.detected_entities) >= settings.PREFETCH_MIN_OVERLAP
+        )
+
+    def schedule(
+        self,
+        session: ConversationState,
+        analysis: IntentAnalysis,
+        previous: Optional[IntentAnalysis],
+        user_id: Optional[str] = None,
+    ) -> bool:
+        """Start a background prefetch for this turn if warranted."""
+        if not self.should_prefetch(analysis, previous):
+            return False
+        if session.session_id in self._tasks:
+            return False
+        if session.prefetched and self._usable(session.prefetched, analysis):
+            return False
+        if self.inflight >= self.max_inflight:
+            PREFETCH_TASKS.inc("dropped")
+            return False
+
+        task = asyncio.create_task(self._run(session, analysis, user_id))
+        self._tasks[session.session_id] = task
+        task.add_done_callback(lambda done: self._forget(session.session_id, done))
+        PREFETCH_TASKS.inc("started")
+        return True
+
+    def _forget(self, session_id: str, task: asyncio.Task) -> None:
+        # A cancelled task may finish after a newer one was scheduled for the session
+        if self._tasks.get(session_id) is task:
+            del self._tasks[session_id]
+
+    async def _run(self, session: ConversationState, analysis: IntentAnalysis, user_id: Optional[str]) -> None:
+        try:
+            # In queue mode this runs on a worker process
+            candidates = await work_queue.rank_candidates(analysis, session.session_id, user_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Prefetch error: {e}")
+            PREFETCH_TASKS.inc("failed")
+            return
+
+        session.prefetched = PrefetchedCandidates(
+            entities=list(analysis.detected_entities),
+            candidates=candidates,
+        )
+        PREFETCH_TASKS.inc("completed")
+
+    def take(
+        self,
+        session: ConversationState,
+        analysis: IntentAnalysis,
+    ) -> Optional[list[tuple[dict, str, float]]]:
+        """
+        Claim the session's prefetched candidates for a nudge lookup.
+        Returns (result, source, retrieval) triples, or None on a miss.
+        """
+        prefetched, session.prefetched = session.prefetched, None
+        if prefetched is None:
+            PREFETCH_LOOKUPS.inc("miss")
+            return None
+        if not self._usable(prefetched, analysis):
+            PREFETCH_LOOKUPS.inc("stale")
+            return None
+        PREFETCH_LOOKUPS.inc("hit")
+        return [(c["result"], c["source"], c["retrieval"]) for c in prefetched.candidates]
+
+    def cancel(self, session: ConversationState) -> None:
+        """Drop any running or parked prefetch (session ended or turned unsafe)."""
+        session.prefetched = None
+        task = self._tasks.pop(session.session_id, None)
+        if task and not task.done():
+            task.cancel()
+            PREFETCH_TASKS.inc("cancelled")
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def hit_rate(self) -> float:
+        hits = PREFETCH_LOOKUPS.value("hit")
+        total = hits + PREFETCH_LOOKUPS.value("miss") + PREFETCH_LOOKUPS.value("stale")
+        return hits / total if total else 0.0
+
+
+# Singleton instance
+prefetcher = Prefetcher()
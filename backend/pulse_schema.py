@@ -0,0 +1,57 @@
+"""
+Project AXON — Pulse Monitor Output Schemas
+Response schemas sent to Gemini as structured-output constraints, and the
+precompiled TypeAdapters that validate what comes back. Safety fields come
+first so they are generated (and streamed) before everything else.
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from backend.models import IntentBucket
+
+
+UsagePattern = Literal["BROWSING", "LEARNING", "GRINDING", "SHOPPING", "URGENT"]
+
+
+class QuickAnalysisOutput(BaseModel):
+    """Single-message classification."""
+    is_safe_for_ads: bool = True
+    safety_reason: Optional[str] = None
+    intent_bucket: IntentBucket = IntentBucket.EDUCATIONAL
+    detected_entities: list[str] = Field(default_factory=list)
+    is_question: bool = False
+    is_equation_or_problem: bool = False
+
+
+class PatternAnalysisOutput(BaseModel):
+    """Full-conversation usage pattern analysis."""
+    is_safe_for_ads: bool = True
+    safety_reason: Optional[str] = None
+    primary_topic: str = ""
+    topic_repeat_count: int = Field(default=0, ge=0)
+    usage_pattern: UsagePattern = "BROWSING"
+    is_homework_pattern: bool = False
+    detected_subjects: list[str] = Field(default_factory=list)
+    commercial_opportunity: Optional[str] = None
+    propensity_score: int = Field(default=30, ge=0, le=100)
+    reasoning: str = ""
+
+
+class MultimodalAnalysisOutput(BaseModel):
+    """Image + message commercial intent analysis."""
+    is_safe_for_ads: bool = True
+    safety_reason: Optional[str] = None
+    intent_bucket: IntentBucket = IntentBucket.COMMERCIAL
+    detected_entities: list[str] = Field(default_factory=list)
+    commercial_opportunity: Optional[str] = None
+    propensity_score: int = Field(default=90, ge=0, le=100)
+    reasoning: str = "Visual analysis"
+
+
+# Built once at import; validation on the hot path reuses the compiled core schema
+ADAPTERS: dict[type[BaseModel], TypeAdapter] = {
+    schema: TypeAdapter(schema)
+    for schema in (QuickAnalysisOutput, PatternAnalysisOutput, MultimodalAnalysisOutput)
+}
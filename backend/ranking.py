@@ -0,0 +1,184 @@
+"""
+Project AXON — Ad Ranking Engine
+Scores every candidate ad (SERP shopping results and local inventory) in one
+vectorized pass and returns the top-k with calibrated relevance scores.
+"""
+
+import math
+import re
+from typing import Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.inventory import tokenize
+from backend.models import IntentAnalysis
+
+
+FEATURES = ("entity_overlap", "retrieval", "price_fit", "rating", "reviews", "struggle_fit", "bid")
+
+# Upper price (USD) a nudge should stay under for each intent bucket
+PRICE_BANDS = {
+    "educational": 60.0,
+    "commercial": 3000.0,
+    "transactional": 3000.0,
+    "navigational": 3000.0,
+}
+
+STRUGGLE_LEVELS = {"none": 0.0, "mild": 0.33, "moderate": 0.66, "high": 1.0}
+
+# Candidates that help someone who is stuck (courses, tutoring, solvers)
+LEARNING_TOKENS = frozenset({
+    "course", "tutor", "tutoring", "class", "lesson", "learn", "study", "solver", "education",
+})
+
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def parse_price(result: dict) -> Optional[float]:
+    """Numeric price from a SERP/inventory result ("$1,299.00", "$12.99/mo", 8.97)."""
+    value = result.get("extracted_price", result.get("price"))
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _PRICE_RE.search(value)
+        if match:
+            return float(match.group().replace(",", ""))
+    return None
+
+
+def _to_float(value, default: float = 0.0) -> float:
+    try:
+        return float(str(value).replace(",", ""))
+    except (TypeError, ValueError):
+        return default
+
+
+class RankedAd:
+    """A scored candidate."""
+
+    __slots__ = ("result", "source", "retrieval", "score", "relevance", "trace")
+
+    def __init__(
+        self,
+        result: dict,
+        source: str,
+        retrieval: float,
+        score: float,
+        relevance: float,
+        trace: Optional[dict],
+    ):
+        self.result = result
+        self.source = source
+        self.retrieval = retrieval
+        self.score = score
+        self.relevance = relevance
+        self.trace = trace
+
+
+class AdRanker:
+    """
+    Linear scoring model over normalized features, followed by a logistic
+    calibration so relevance is comparable to MIN_RELEVANCE_SCORE.
+    Weights, bias and calibration come from settings so they can be tuned
+    without code changes.
+    """
+
+    def __init__(self):
+        self.weights = np.array(
+            [settings.RANKING_WEIGHTS[name] for name in FEATURES], dtype=np.float64
+        )
+        self.bias = settings.RANKING_BIAS
+        self.calibration_scale, self.calibration_offset = settings.RANKING_CALIBRATION
+
+    def _features(self, candidates: list[tuple[dict, str, float]], analysis: IntentAnalysis) -> np.ndarray:
+        """Build the (candidates x features) matrix."""
+        entity_tokens = set(tokenize(" ".join(analysis.detected_entities)))
+        price_cap = PRICE_BANDS.get(analysis.intent_bucket.value, 3000.0)
+        struggle = STRUGGLE_LEVELS.get(analysis.struggle_state.value, 0.0)
+
+        bids = [_to_float(result.get("bid"), settings.RANKING_DEFAULT_BID) for result, _, _ in candidates]
+        max_bid = max(bids) if bids else 1.0
+
+        rows = []
+        for (result, _source, retrieval), bid in zip(candidates, bids):
+            text_tokens = set(tokenize(
+                f"{result.get('title', '')} {result.get('source', '')} "
+                f"{' '.join(result.get('keywords', []) or [])} {result.get('category', '')}"
+            ))
+            overlap = len(entity_tokens & text_tokens) / len(entity_tokens) if entity_tokens else 0.0
+
+            price = parse_price(result)
+            if price is None:
+                price_fit = 0.5
+            elif price <= price_cap:
+                price_fit = 1.0
+            else:
+                price_fit = max(0.0, 1.0 - (price - price_cap) / price_cap)
+
+            rating = min(max((_to_float(result.get("rating")) - 3.0) / 2.0, 0.0), 1.0)
+            reviews = min(math.log10(1 + _to_float(result.get("reviews"))) / 5.0, 1.0)
+
+            is_learning = result.get("category") == "education" or bool(text_tokens & LEARNING_TOKENS)
+            struggle_fit = struggle if is_learning else 1.0 - 0.5 * struggle
+
+            rows.append((
+                overlap,
+                min(max(retrieval, 0.0), 1.0),
+                price_fit,
+                rating,
+                reviews,
+                struggle_fit,
+                bid / max_bid if max_bid > 0 else 0.0,
+            ))
+        return np.array(rows, dtype=np.float64).reshape(len(rows), len(FEATURES))
+
+    def rank(
+        self,
+        candidates: list[tuple[dict, str, float]],
+        analysis: IntentAnalysis,
+        k: int = 3,
+        trace: bool = False,
+    ) -> list[RankedAd]:
+        """
+        Rank candidates for an intent.
+
+        Args:
+            candidates: (result dict, source, retrieval score in [0, 1]) triples
+            analysis: Intent analysis from Pulse Monitor
+            k: Number of results to return
+            trace: Attach per-feature values and contributions for debugging
+
+        Returns:
+            Top-k RankedAds, best first
+        """
+        if not candidates:
+            return []
+
+        features = self._features(candidates, analysis)
+        scores = features @ self.weights + self.bias
+        relevance = 1.0 / (1.0 + np.exp(-(self.calibration_scale * scores + self.calibration_offset)))
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        ranked = []
+        for index in top:
+            result, source, retrieval = candidates[index]
+            trace_data = None
+            if trace:
+                trace_data = {
+                    "features": dict(zip(FEATURES, features[index].round(4).tolist())),
+                    "contributions": dict(zip(FEATURES, (features[index] * self.weights).round(4).tolist())),
+                    "bias": self.bias,
+                    "score": round(float(scores[index]), 4),
+                }
+            ranked.append(RankedAd(
+                result, source, retrieval, float(scores[index]), float(relevance[index]), trace_data
+            ))
+        return ranked
+
+
+# Singleton instance
+ad_ranker = AdRanker()
@@ -1,19 +1,143 @@
-import os
-import redis.asyncio as redis
+"""
+Project AXON — Redis Client
+One process-wide client over a bounded, blocking connection pool with socket
+keepalive, periodic health checks and retry with exponential backoff on
+connection errors, plus a second pool for blocking reads. Cache lookups on
+the /chat path and best-effort writes (request counters, traffic events,
+revenue telemetry) go through fail_open(), which puts a short deadline and a
+circuit breaker in front of them so a Redis outage or a hung server
+degrades to cache misses and lost stats instead of stalling requests.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from backend.circuit_breaker import CircuitBreaker, CircuitOpenError
 from backend.config import settings
+from backend.metrics import metrics, UPSTREAM_LATENCY
+
+
+T = TypeVar("T")
+
+REDIS_POOL = metrics.gauge(
+    "axon_redis_pool_connections",
+    "Pooled Redis connections by state (in_use, idle, max).",
+    ["state"],
+)
+REDIS_FAIL_OPEN = metrics.counter(
+    "axon_redis_fail_open_total",
+    "Fail-open Redis commands skipped, by operation and reason (error, rejected).",
+    ["operation", "reason"],
+)
+
 
 class RedisClient:
     _instance = None
+    _pool = None
+    _blocking = None  # Client for long blocking reads, on its own pool
+    _blocking_pool = None
+    breaker = CircuitBreaker(
+        "redis",
+        failure_threshold=settings.REDIS_BREAKER_THRESHOLD,
+        reset_timeout=settings.REDIS_BREAKER_RESET,
+    )
+
+    @staticmethod
+    def _connect(max_connections: int, socket_timeout: float):
+        # Deferred: redis.asyncio costs ~100 ms of imports on a cold start
+        import redis.asyncio as redis
+        from redis.asyncio.retry import Retry
+        from redis.backoff import ExponentialBackoff
+
+        pool = redis.BlockingConnectionPool.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            encoding="utf-8",
+            max_connections=max_connections,
+            timeout=settings.REDIS_POOL_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            socket_timeout=socket_timeout,
+            socket_keepalive=True,
+            health_check_interval=settings.REDIS_HEALTH_CHECK_INTERVAL,
+            retry=Retry(
+                ExponentialBackoff(cap=settings.REDIS_BACKOFF_CAP, base=settings.REDIS_BACKOFF_BASE),
+                settings.REDIS_RETRIES,
+            ),
+        )
+        return redis.Redis(connection_pool=pool), pool
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = redis.from_url(
-                settings.REDIS_URL, 
-                decode_responses=True,
-                encoding="utf-8"
-            )
+            cls._instance, cls._pool = cls._connect(settings.REDIS_MAX_CONNECTIONS, settings.REDIS_SOCKET_TIMEOUT)
         return cls._instance
 
+    @classmethod
+    def get_blocking_instance(cls):
+        """
+        Client for commands that park a connection (BLPOP reply waits,
+        XREADGROUP BLOCK), so waiting callers cannot starve the pool every
+        other call uses; its socket timeout allows for the longest block.
+        """
+        if cls._blocking is None:
+            if cls._instance is not None and cls._pool is None:
+                return cls._instance  # An injected client (tests) serves both roles
+            cls._blocking, cls._blocking_pool = cls._connect(
+                settings.REDIS_BLOCKING_MAX_CONNECTIONS, settings.REDIS_BLOCKING_SOCKET_TIMEOUT,
+            )
+        return cls._blocking
+
+    @classmethod
+    def pool_stats(cls) -> Optional[dict]:
+        """Connection counts of the pool (None before first use or with an injected client)."""
+        pool = cls._pool
+        if pool is None:
+            return None
+        return {
+            "in_use": len(pool._in_use_connections),
+            "idle": len(pool._available_connections),
+            "max": pool.max_connections,
+        }
+
+    @classmethod
+    def update_metrics(cls) -> None:
+        stats = cls.pool_stats()
+        if stats:
+            for state, count in stats.items():
+                REDIS_POOL.set(count, state)
+
+    @classmethod
+    async def close(cls) -> None:
+        for client, pool in ((cls._instance, cls._pool), (cls._blocking, cls._blocking_pool)):
+            if client is not None and pool is not None:
+                await client.aclose()
+                await pool.disconnect()
+        cls._instance = cls._pool = cls._blocking = cls._blocking_pool = None
+
+
+async def fail_open(
+    operation: str,
+    command: Callable[[Any], Awaitable[T]],
+    default: Optional[T] = None,
+    timeout: Optional[float] = None,
+) -> Optional[T]:
+    """
+    Run a best-effort command or cache read, e.g. fail_open("incr", lambda r: r.incr(key)).
+    Errors, a missed deadline or an open circuit return default instead of raising.
+    """
+    async def run():
+        redis = RedisClient.get_instance()
+        with UPSTREAM_LATENCY.time("redis", operation):
+            return await asyncio.wait_for(command(redis), timeout or settings.REDIS_FAIL_OPEN_TIMEOUT)
+
+    try:
+        return await RedisClient.breaker.call(run)
+    except CircuitOpenError:
+        REDIS_FAIL_OPEN.inc(operation, "rejected")
+    except Exception:
+        REDIS_FAIL_OPEN.inc(operation, "error")
+    return default
+
+
 async def get_redis():
     return RedisClient.get_instance()
@@ -0,0 +1,230 @@
+"""
+Project AXON — Response Cache
+Caches plain Synthesizer answers (before any nudge is spliced in) keyed on
+the normalized user message plus a context fingerprint. Exact hits are
+shared through Redis; near-duplicate hits come from a local cosine index
+over hashing-trick embeddings, bounded by a byte budget with TTL eviction.
+
+Turns that lean on earlier messages ("why is that?", "do it again") are
+keyed on the conversation context and never served by similarity, and a
+near-duplicate must carry exactly the same numbers, symbols and
+single-letter variables, so "sin(x)cos(x)" never answers "sin(x)cos(2x)".
+The embedding ignores word order, so the words two questions share must
+also appear in the same order: "fahrenheit to celsius" never answers
+"celsius to fahrenheit".
+"""
+
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from backend.config import settings
+from backend.metrics import metrics, CACHE_HITS, CACHE_MISSES
+from backend.redis_client import fail_open
+from backend.semantic_index import HashingEmbedder
+
+
+RESPONSE_CACHE_BYTES = metrics.gauge(
+    "axon_response_cache_bytes",
+    "Bytes of answers held in the local response cache.",
+)
+RESPONSE_CACHE_BYTES_SAVED = metrics.counter(
+    "axon_response_cache_bytes_saved_total",
+    "Answer bytes served from the response cache instead of generated.",
+)
+
+_SYMBOL_RE = re.compile(r"[a-z]+(?:'[a-z]+)?|\d+(?:\.\d+)?|[^\sa-z\d]")
+
+# Words that point back into the conversation
+ANAPHORA = frozenset({
+    "it", "its", "this", "that", "these", "those", "they", "them", "he", "she", "his", "her",
+    "above", "previous", "earlier", "again", "same", "also", "else", "another", "instead",
+    "continue", "more", "why", "one",
+})
+
+
+def normalize_message(message: str) -> str:
+    return " ".join(message.lower().split()).strip(" ?!.")
+
+
+def symbol_signature(normalized: str) -> str:
+    """Numbers, operators and single-letter variables, in order."""
+    return " ".join(
+        token for token in _SYMBOL_RE.findall(normalized)
+        if len(token) == 1 or token[0].isdigit()
+    )
+
+
+def word_order(normalized: str) -> tuple[str, ...]:
+    """Distinct words of two or more letters, in order of first appearance."""
+    return tuple(dict.fromkeys(
+        token for token in _SYMBOL_RE.findall(normalized)
+        if len(token) > 1 and token[0].isalpha()
+    ))
+
+
+def same_word_order(a: tuple[str, ...], b: tuple[str, ...]) -> bool:
+    """True if the words a and b have in common appear in the same relative order."""
+    shared = set(a) & set(b)
+    return [w for w in a if w in shared] == [w for w in b if w in shared]
+
+
+def is_context_dependent(normalized: str) -> bool:
+    words = re.findall(r"[a-z']+", normalized)
+    return len(words) < 3 or any(word in ANAPHORA for word in words)
+
+
+class _Entry:
+    __slots__ = ("answer", "size", "expires", "slot", "signature", "words")
+
+    def __init__(self, answer: str, expires: float, slot: Optional[int], signature: str, words: tuple[str, ...]):
+        self.answer = answer
+        self.size = len(answer.encode("utf-8"))
+        self.expires = expires
+        self.slot = slot
+        self.signature = signature
+        self.words = words
+
+
+class ResponseCache:
+    """Local LRU (byte budget + TTL) with a similarity index, in front of Redis."""
+
+    PREFIX = "respcache"
+
+    def __init__(self, max_bytes: int = None, max_entries: int = None, ttl: int = None):
+        self.enabled = settings.RESPONSE_CACHE_ENABLED
+        self.max_bytes = max_bytes or settings.RESPONSE_CACHE_MAX_BYTES
+        self.max_entries = max_entries or settings.RESPONSE_CACHE_MAX_ENTRIES
+        self.ttl = ttl or settings.RESPONSE_CACHE_TTL
+        self.min_similarity = settings.RESPONSE_CACHE_MIN_SIMILARITY
+        self.embedder = HashingEmbedder()
+
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        # Near-duplicate index: one row per context-independent entry
+        self._vectors = np.zeros((self.max_entries, self.embedder.dim), dtype=np.float32)
+        self._slot_keys: list[Optional[str]] = [None] * self.max_entries
+        self._free_slots = list(range(self.max_entries - 1, -1, -1))
+
+    def _key(self, normalized: str, context: str) -> tuple[str, bool]:
+        """Cache key and whether the entry may be served by similarity."""
+        if is_context_dependent(normalized):
+            fingerprint = hashlib.sha1(context.encode()).hexdigest()[:16]
+            shareable = False
+        else:
+            fingerprint, shareable = "-", True
+        digest = hashlib.sha1(f"{fingerprint}|{normalized}".encode()).hexdigest()
+        return f"{self.PREFIX}:{digest}", shareable
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        if entry.slot is not None:
+            self._vectors[entry.slot] = 0.0
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    def _store_local(self, key: str, answer: str, ttl: float, normalized: str, shareable: bool) -> None:
+        if key in self._entries:
+            self._evict(key)
+        if len(answer.encode("utf-8")) > self.max_bytes:
+            return
+
+        slot = None
+        if shareable:
+            if not self._free_slots:
+                # Index full: drop the least recently used indexed entry
+                oldest = next(k for k, e in self._entries.items() if e.slot is not None)
+                self._evict(oldest)
+            slot = self._free_slots.pop()
+            self._vectors[slot] = self.embedder.embed(normalized)
+            self._slot_keys[slot] = key
+
+        entry = _Entry(answer, time.monotonic() + ttl, slot, symbol_signature(normalized), word_order(normalized))
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            self._evict(next(iter(self._entries)))
+        RESPONSE_CACHE_BYTES.set(self._bytes)
+
+    def _local(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= time.monotonic():
+            self._evict(key)
+            RESPONSE_CACHE_BYTES.set(self._bytes)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, normalized: str) -> Optional[_Entry]:
+        if not self._entries:
+            return None
+        scores = self._vectors @ self.embedder.embed(normalized)
+        signature = symbol_signature(normalized)
+        words = word_order(normalized)
+        for slot in np.argsort(-scores)[:5]:
+            if scores[slot] < self.min_similarity:
+                break
+            key = self._slot_keys[slot]
+            entry = self._local(key) if key else None
+            if entry is not None and entry.signature == signature and same_word_order(entry.words, words):
+                return entry
+        return None
+
+    def _hit(self, kind: str, answer: str) -> str:
+        CACHE_HITS.inc(kind)
+        RESPONSE_CACHE_BYTES_SAVED.inc(amount=len(answer.encode("utf-8")))
+        return answer
+
+    async def get(self, message: str, context: str = "") -> Optional[str]:
+        """Cached answer for this message (exact, then near-duplicate)."""
+        if not self.enabled:
+            return None
+        normalized = normalize_message(message)
+        key, shareable = self._key(normalized, context)
+
+        entry = self._local(key)
+        if entry is not None:
+            return self._hit("response_exact", entry.answer)
+
+        async def read(redis) -> list:
+            pipe = redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            return await pipe.execute()
+
+        answer, ttl = await fail_open("response_cache_get", read, default=(None, -2))
+        if answer:
+            if ttl and ttl > 0:
+                self._store_local(key, answer, ttl, normalized, shareable)
+            return self._hit("response_exact", answer)
+
+        if shareable:
+            entry = self._nearest(normalized)
+            if entry is not None:
+                return self._hit("response_near", entry.answer)
+
+        CACHE_MISSES.inc("response")
+        return None
+
+    async def put(self, message: str, context: str, answer: str) -> None:
+        if not self.enabled or not answer:
+            return
+        normalized = normalize_message(message)
+        key, shareable = self._key(normalized, context)
+        self._store_local(key, answer, self.ttl, normalized, shareable)
+        await fail_open("response_cache_put", lambda redis: redis.set(key, answer, ex=self.ttl))
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+# Singleton instance
+response_cache = ResponseCache()
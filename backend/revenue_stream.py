@@ -0,0 +1,295 @@
+"""
+Project AXON — Revenue Event Stream
+Every RevenueEvent is appended to a Redis Stream (approximately trimmed to
+REVENUE_STREAM_MAXLEN) with short field names and epoch-millisecond
+timestamps. Downstream aggregation reads it through consumer groups: entries
+are acknowledged only after their handler succeeds, and entries left pending
+by a dead consumer are reclaimed, so delivery is at-least-once. The built-in
+aggregator remembers applied entry ids so a redelivery is not counted twice.
+"""
+
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from backend.config import settings
+from backend.metrics import metrics
+from backend.models import RevenueEvent
+from backend.redis_client import RedisClient, fail_open
+
+
+REVENUE_EVENTS = metrics.counter(
+    "axon_revenue_stream_events_total",
+    "Revenue stream entries by event (published, applied, duplicate, malformed, claimed, failed).",
+    ["event"],
+)
+STREAM_LAG = metrics.gauge(
+    "axon_revenue_stream_lag",
+    "Entries in the stream not yet delivered to the consumer group.",
+    ["group"],
+)
+STREAM_PENDING = metrics.gauge(
+    "axon_revenue_stream_pending",
+    "Entries delivered to the consumer group but not yet acknowledged.",
+    ["group"],
+)
+STREAM_LENGTH = metrics.gauge(
+    "axon_revenue_stream_length",
+    "Entries currently retained in the revenue stream.",
+)
+
+Handler = Callable[[list[tuple[str, RevenueEvent]]], Awaitable[None]]
+
+
+def encode_event(event: RevenueEvent) -> dict[str, str]:
+    fields = {
+        "a": repr(event.amount),
+        "s": event.source,
+        "t": str(int(event.timestamp.timestamp() * 1000)),
+    }
+    if event.intent_bucket:
+        fields["b"] = event.intent_bucket
+    if event.session_id:
+        fields["i"] = event.session_id
+    if event.impression_id:
+        fields["n"] = event.impression_id
+    return fields
+
+
+def decode_event(fields: dict[str, str]) -> RevenueEvent:
+    return RevenueEvent(
+        amount=float(fields["a"]),
+        source=fields["s"],
+        timestamp=datetime.fromtimestamp(int(fields["t"]) / 1000),
+        intent_bucket=fields.get("b"),
+        session_id=fields.get("i"),
+        impression_id=fields.get("n"),
+    )
+
+
+class RevenueStream:
+    """Producer side: append events and read back the newest ones."""
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key or settings.REVENUE_STREAM_KEY
+        self.maxlen = settings.REVENUE_STREAM_MAXLEN
+
+    async def publish(self, event: RevenueEvent) -> Optional[str]:
+        """Append an event; returns its stream id (None if Redis is unavailable)."""
+        fields = encode_event(event)
+        entry_id = await fail_open(
+            "xadd", lambda redis: redis.xadd(self.key, fields, maxlen=self.maxlen, approximate=True),
+        )
+        if entry_id is None:
+            REVENUE_EVENTS.inc("failed")
+            return None
+        REVENUE_EVENTS.inc("published")
+        return entry_id
+
+    async def publish_batch(self, events: list[RevenueEvent]) -> list[str]:
+        """Append several events in one round trip; raises if Redis is unavailable."""
+        if not events:
+            return []
+        redis = RedisClient.get_instance()
+        pipe = redis.pipeline(transaction=False)
+        for event in events:
+            pipe.xadd(self.key, encode_event(event), maxlen=self.maxlen, approximate=True)
+        entry_ids = await pipe.execute()
+        REVENUE_EVENTS.inc("published", amount=len(events))
+        return entry_ids
+
+    async def recent(self, count: int = 20) -> list[RevenueEvent]:
+        """Newest events first (empty if Redis is unavailable)."""
+        try:
+            redis = RedisClient.get_instance()
+            entries = await redis.xrevrange(self.key, count=count)
+        except Exception as e:
+            print(f"Revenue stream read error: {e}")
+            return []
+        events = []
+        for _, fields in entries:
+            try:
+                events.append(decode_event(fields))
+            except (KeyError, ValueError):
+                continue
+        return events
+
+
+class StreamConsumer:
+    """
+    One member of a consumer group. Each poll first reclaims entries that
+    other (possibly dead) members left pending for REVENUE_STREAM_CLAIM_IDLE_MS,
+    then reads new ones; a batch is acknowledged only after the handler returns.
+    """
+
+    def __init__(self, stream: RevenueStream, group: str, handler: Handler, consumer: Optional[str] = None):
+        self.stream = stream
+        self.group = group
+        self.handler = handler
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch = settings.REVENUE_STREAM_BATCH
+        self.block_ms = settings.REVENUE_STREAM_BLOCK_MS
+        self.claim_idle_ms = settings.REVENUE_STREAM_CLAIM_IDLE_MS
+        self.lag_interval = settings.REVENUE_STREAM_LAG_INTERVAL
+        self._group_ready = False
+        self._lag_checked = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _ensure_group(self, redis) -> None:
+        if self._group_ready:
+            return
+        from redis.exceptions import ResponseError
+
+        try:
+            await redis.xgroup_create(self.stream.key, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def _process(self, redis, entries: list) -> int:
+        batch, malformed = [], []
+        for entry_id, fields in entries:
+            try:
+                batch.append((entry_id, decode_event(fields)))
+            except (KeyError, TypeError, ValueError):  # TypeError: trimmed entry (Redis 6.2 XAUTOCLAIM)
+                malformed.append(entry_id)
+        if batch:
+            await self.handler(batch)
+        ids = [entry_id for entry_id, _ in entries]
+        if ids:
+            await redis.xack(self.stream.key, self.group, *ids)
+        REVENUE_EVENTS.inc("malformed", amount=len(malformed))
+        return len(batch)
+
+    async def poll_once(self, block: Optional[int] = None) -> int:
+        """Handle one batch of reclaimed and new entries; returns events handled."""
+        redis = RedisClient.get_instance()
+        await self._ensure_group(redis)
+
+        handled = 0
+        claimed = await redis.xautoclaim(
+            self.stream.key, self.group, self.consumer, self.claim_idle_ms, start_id="0-0", count=self.batch,
+        )
+        if claimed and claimed[1]:
+            REVENUE_EVENTS.inc("claimed", amount=len(claimed[1]))
+            handled += await self._process(redis, claimed[1])
+
+        # A blocking read parks its connection: keep it off the pool request-path commands use
+        reader = RedisClient.get_blocking_instance() if block else redis
+        response = await reader.xreadgroup(
+            self.group, self.consumer, {self.stream.key: ">"}, count=self.batch, block=block,
+        )
+        for _, entries in response or []:
+            handled += await self._process(redis, entries)
+
+        if time.monotonic() - self._lag_checked >= self.lag_interval:
+            await self.update_lag()
+        return handled
+
+    async def update_lag(self) -> None:
+        self._lag_checked = time.monotonic()
+        try:
+            redis = RedisClient.get_instance()
+            STREAM_LENGTH.set(await redis.xlen(self.stream.key))
+            for info in await redis.xinfo_groups(self.stream.key):
+                if info["name"] != self.group:
+                    continue
+                STREAM_PENDING.set(info["pending"], self.group)
+                if info.get("lag") is not None:  # Redis >= 7
+                    STREAM_LAG.set(info["lag"], self.group)
+        except Exception as e:
+            print(f"Revenue stream lag error: {e}")
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.poll_once(block=self.block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Unacked entries stay pending and are reclaimed on a later poll
+                print(f"Revenue stream consumer error: {e}")
+                REVENUE_EVENTS.inc("failed")
+                await asyncio.sleep(1.0)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+class RevenueAggregator:
+    """Rolls revenue events up into the `stats:*` keys read by the dashboards."""
+
+    APPLIED_PREFIX = "revenue:applied"
+
+    def __init__(self):
+        self.dedupe_ttl = settings.REVENUE_STREAM_DEDUPE_TTL
+
+    async def apply(self, batch: list[tuple[str, RevenueEvent]]) -> None:
+        redis = RedisClient.get_instance()
+        pipe = redis.pipeline(transaction=False)
+        for entry_id, _ in batch:
+            pipe.exists(f"{self.APPLIED_PREFIX}:{entry_id}")
+        seen = await pipe.execute()
+
+        # Totals and the applied markers commit together, so a redelivered entry is skipped
+        pipe = redis.pipeline(transaction=True)
+        fresh = 0
+        for (entry_id, event), already in zip(batch, seen):
+            if already:
+                continue
+            fresh += 1
+            day, minute = event.timestamp.strftime("%Y-%m-%d"), event.timestamp.strftime("%H:%M")
+            pipe.incrbyfloat("stats:total_revenue", event.amount)
+            pipe.hincrbyfloat("stats:revenue_by_source", event.source, event.amount)
+            pipe.hincrbyfloat("stats:revenue_by_bucket", event.intent_bucket or "unknown", event.amount)
+            pipe.hincrby("stats:events_by_source", event.source, 1)
+            pipe.hincrby(f"stats:events_by_bucket:{event.source}", event.intent_bucket or "unknown", 1)
+            pipe.hincrbyfloat(f"stats:revenue_by_minute:{day}", minute, event.amount)
+            pipe.expire(f"stats:revenue_by_minute:{day}", 2 * 86400)
+            pipe.set(f"{self.APPLIED_PREFIX}:{entry_id}", 1, ex=self.dedupe_ttl)
+        if fresh:
+            await pipe.execute()
+        REVENUE_EVENTS.inc("applied", amount=fresh)
+        REVENUE_EVENTS.inc("duplicate", amount=len(batch) - fresh)
+
+    async def click_through(self) -> Optional[dict]:
+        """Clicks joined to impressions, overall and per intent bucket (None if Redis is unavailable)."""
+        try:
+            redis = RedisClient.get_instance()
+            pipe = redis.pipeline(transaction=False)
+            pipe.hgetall("stats:events_by_source")
+            pipe.hgetall("stats:events_by_bucket:nudge_impression")
+            pipe.hgetall("stats:events_by_bucket:nudge_click")
+            totals, impressions, clicks = await pipe.execute()
+        except Exception as e:
+            print(f"Revenue stream CTR error: {e}")
+            return None
+
+        shown = int(totals.get("nudge_impression", 0))
+        clicked = int(totals.get("nudge_click", 0))
+        return {
+            "impressions": shown,
+            "clicks": clicked,
+            "ctr": clicked / shown if shown else 0.0,
+            "by_intent": {
+                bucket: int(clicks.get(bucket, 0)) / int(count)
+                for bucket, count in impressions.items() if int(count)
+            },
+        }
+
+
+# Singleton instances
+revenue_stream = RevenueStream()
+revenue_aggregator = RevenueAggregator()
+revenue_consumer = StreamConsumer(revenue_stream, settings.REVENUE_STREAM_GROUP, revenue_aggregator.apply)
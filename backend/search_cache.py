@@ -0,0 +1,132 @@
+"""
+Project AXON — Search Cache
+Caches shopping responses per (query, location), and remembers the pairs
+for which SerpApi returned no shopping inventory so the next turn with the
+same entities skips the empty search.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from backend.config import settings
+from backend.metrics import CACHE_HITS, CACHE_MISSES
+from backend.redis_client import fail_open
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """
+    Positive and short-TTL negative caches, local LRU in front of Redis.
+    Errors are never cached: only a successful response without
+    shopping_results counts as "no inventory".
+    """
+
+    PREFIX = "serpcache"
+
+    def __init__(self):
+        self.ttl = settings.SERP_CACHE_TTL
+        self.negative_ttl = settings.SERP_NEGATIVE_TTL
+        self.local_size = settings.SEARCH_CACHE_LOCAL_SIZE
+        self._negative: OrderedDict[str, float] = OrderedDict()  # key -> expiry (monotonic)
+        self._positive: OrderedDict[str, tuple[float, dict]] = OrderedDict()  # key -> (expiry, response)
+
+    def _key(self, kind: str, query: str, location: str) -> str:
+        digest = hashlib.sha1(f"{normalize_query(query)}|{location.lower()}".encode()).hexdigest()
+        return f"{self.PREFIX}:{kind}:{digest}"
+
+    def _remember_negative(self, key: str, ttl: float) -> None:
+        self._negative[key] = time.monotonic() + ttl
+        self._negative.move_to_end(key)
+        while len(self._negative) > self.local_size:
+            self._negative.popitem(last=False)
+
+    def _remember_positive(self, key: str, ttl: float, data: dict) -> None:
+        self._positive[key] = (time.monotonic() + ttl, data)
+        self._positive.move_to_end(key)
+        while len(self._positive) > self.local_size:
+            self._positive.popitem(last=False)
+
+    async def get(self, query: str, location: str) -> Optional[dict]:
+        """Cached shopping response for this query, if still fresh."""
+        key = self._key("pos", query, location)
+
+        entry = self._positive.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._positive.move_to_end(key)
+            CACHE_HITS.inc("serp")
+            return entry[1]
+
+        async def read(redis) -> list:
+            pipe = redis.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.ttl(key)
+            return await pipe.execute()
+
+        raw, ttl = await fail_open("search_cache_get", read, default=(None, -2))
+        if raw:
+            data = json.loads(raw)
+            if ttl and ttl > 0:
+                self._remember_positive(key, ttl, data)
+            CACHE_HITS.inc("serp")
+            return data
+
+        CACHE_MISSES.inc("serp")
+        return None
+
+    def stale(self, query: str, location: str) -> Optional[dict]:
+        """
+        The last response held locally for this query, even if expired.
+        Expired entries stay in the LRU until evicted, as a fallback while SerpApi is unavailable.
+        """
+        entry = self._positive.get(self._key("pos", query, location))
+        return entry[1] if entry is not None else None
+
+    async def put(self, query: str, location: str, data: dict) -> None:
+        key = self._key("pos", query, location)
+        self._remember_positive(key, self.ttl, data)
+        await fail_open("search_cache_put", lambda redis: redis.set(key, json.dumps(data), ex=self.ttl))
+
+    async def remaining_ttl(self, query: str, location: str) -> float:
+        """Seconds until the cached response expires (0 if not cached)."""
+        key = self._key("pos", query, location)
+        entry = self._positive.get(key)
+        if entry is not None:
+            return max(entry[0] - time.monotonic(), 0.0)
+        ttl = await fail_open("search_cache_ttl", lambda redis: redis.ttl(key), default=-2)
+        return float(ttl) if ttl and ttl > 0 else 0.0
+
+    async def is_negative(self, query: str, location: str) -> bool:
+        """True if this query recently returned no shopping results."""
+        key = self._key("neg", query, location)
+
+        expiry = self._negative.get(key)
+        if expiry is not None:
+            if expiry > time.monotonic():
+                CACHE_HITS.inc("serp_negative")
+                return True
+            del self._negative[key]
+
+        ttl = await fail_open("search_cache_negative", lambda redis: redis.ttl(key), default=-2)
+
+        if ttl and ttl > 0:
+            self._remember_negative(key, ttl)
+            CACHE_HITS.inc("serp_negative")
+            return True
+
+        CACHE_MISSES.inc("serp_negative")
+        return False
+
+    async def mark_negative(self, query: str, location: str) -> None:
+        key = self._key("neg", query, location)
+        self._remember_negative(key, self.negative_ttl)
+        await fail_open("search_cache_mark_negative", lambda redis: redis.set(key, "1", ex=self.negative_ttl))
+
+
+# Singleton instance
+search_cache = SearchCache()
@@ -0,0 +1,280 @@
+"""
+Project AXON — Semantic Ad Index
+Hashing-trick embeddings for ad inventory, stored as a contiguous float32
+matrix memory-mapped from disk. Cosine top-k is a single matrix product
+plus argpartition, batched across queries.
+"""
+
+import asyncio
+import json
+import os
+import zlib
+from typing import Iterable
+
+import numpy as np
+
+from backend.config import settings
+from backend.inventory import tokenize, AdInventory
+
+
+class HashingEmbedder:
+    """
+    Stateless text embedder (no model download, no vocabulary).
+    Word tokens and character trigrams are hashed into signed buckets, so
+    morphological variants ("derivatives", "derivative") land close together.
+    """
+
+    WORD_WEIGHT = 1.0
+    TRIGRAM_WEIGHT = 0.5
+
+    def __init__(self, dim: int = None):
+        self.dim = dim or settings.SEMANTIC_DIM
+
+    def _features(self, text: str) -> list[tuple[str, float]]:
+        features = []
+        for token in tokenize(text):
+            features.append((token, self.WORD_WEIGHT))
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                features.append((padded[i:i + 3], self.TRIGRAM_WEIGHT))
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        """L2-normalized float32 vector of length dim."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self._features(text):
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dim] += weight if h & 0x80000000 else -weight
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_batch(self, texts: Iterable[str]) -> np.ndarray:
+        texts = list(texts)
+        matrix = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k of a (queries, items) score matrix.
+    argpartition is O(n) per row; only the k survivors are sorted.
+    """
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class _View:
+    """Ids and matrix rows that belong together; replaced whole, never mutated."""
+
+    __slots__ = ("ids", "base", "pending", "fingerprints")
+
+    def __init__(self, ids: list[str], base: np.ndarray, pending: tuple = (), fingerprints: dict = None):
+        self.ids = ids
+        self.base = base
+        self.pending = pending
+        self.fingerprints = fingerprints or {}
+
+    def blocks(self) -> list[np.ndarray]:
+        blocks = [self.base] if len(self.base) else []
+        if self.pending:
+            blocks.append(np.vstack(self.pending))
+        return blocks
+
+
+class SemanticIndex:
+    """
+    Embedding index over ad ids.
+
+    The base matrix lives in an .npy file opened with mmap_mode="r", so a
+    large catalog costs page cache rather than heap. Inserts go to a small
+    in-memory pending block that is searched alongside the base and folded
+    into the matrix once it reaches SEMANTIC_COMPACT_THRESHOLD rows.
+
+    Ids and rows are published together as one _View, so a search running
+    while a sync rebuilds in a worker thread sees either the old index or
+    the new one. Writing the file happens off the request path (persist(),
+    scheduled by ensure_synced); a read-only disk only costs the warm start.
+    """
+
+    def __init__(self, path: str = None, embedder: HashingEmbedder = None):
+        self.path = path if path is not None else settings.SEMANTIC_INDEX_PATH
+        self.meta_path = os.path.splitext(self.path)[0] + ".json" if self.path else ""
+        self.embedder = embedder or HashingEmbedder()
+        self.min_similarity = settings.SEMANTIC_MIN_SIMILARITY
+        self.compact_threshold = settings.SEMANTIC_COMPACT_THRESHOLD
+
+        self._view = _View([], np.empty((0, self.embedder.dim), dtype=np.float32))
+        self._dirty = False  # The view has rows the file does not
+        self._inventory_version = None
+        self._sync_lock = asyncio.Lock()
+        self._persist_task = None
+
+    @property
+    def ids(self) -> list[str]:
+        return self._view.ids
+
+    @property
+    def _base(self) -> np.ndarray:
+        return self._view.base
+
+    @property
+    def _pending(self) -> tuple:
+        return self._view.pending
+
+    @property
+    def size(self) -> int:
+        return len(self._view.ids)
+
+    # --- Persistence -------------------------------------------------------
+
+    def save(self) -> bool:
+        """
+        Atomically write the matrix + id sidecar, then re-open it as a memmap.
+        Returns False if there is no path or the disk refused the write.
+        """
+        view = self._view
+        if not self.path:
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp.npy"
+            np.save(tmp_path, np.ascontiguousarray(np.vstack(view.blocks() or [view.base]), dtype=np.float32))
+            os.replace(tmp_path, self.path)
+            with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": view.ids, "fingerprints": view.fingerprints}, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+            base = np.load(self.path, mmap_mode="r")
+        except OSError as e:
+            print(f"Semantic index not persisted ({e})")
+            return False
+        # Only swap in the memmap if nothing changed the index meanwhile
+        if self._view is view:
+            self._view = _View(view.ids, base, (), view.fingerprints)
+            self._dirty = False
+        return True
+
+    async def persist(self) -> None:
+        """Write the index in a worker thread (no-op when the file is current)."""
+        if self._dirty:
+            await asyncio.to_thread(self.save)
+
+    def open(self) -> bool:
+        """Memory-map an existing index from disk. Returns False if absent."""
+        if not (self.path and os.path.exists(self.path) and os.path.exists(self.meta_path)):
+            return False
+        try:
+            base = np.load(self.path, mmap_mode="r")
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Semantic index not opened ({e})")
+            return False
+        if base.ndim != 2 or base.shape[1] != self.embedder.dim or len(meta["ids"]) != base.shape[0]:
+            return False
+        fingerprints = {k: int(v) for k, v in meta["fingerprints"].items()}
+        self._view = _View(meta["ids"], base, (), fingerprints)
+        self._dirty = False
+        return True
+
+    def compact(self) -> None:
+        """Fold pending inserts into the base matrix."""
+        view = self._view
+        if not view.pending:
+            return
+        self._view = _View(view.ids, np.vstack(view.blocks()), (), view.fingerprints)
+
+    # --- Mutation ----------------------------------------------------------
+
+    def build(self, ids: list[str], texts: list[str]) -> None:
+        """Replace the whole index."""
+        matrix = self.embedder.embed_batch(texts)
+        fingerprints = {item_id: zlib.crc32(text.encode()) for item_id, text in zip(ids, texts)}
+        self._view = _View(list(ids), matrix, (), fingerprints)
+        self._dirty = True
+
+    def add(self, ids: list[str], texts: list[str]) -> None:
+        """Incrementally insert new items (no rewrite until compaction)."""
+        if not ids:
+            return
+        view = self._view
+        fingerprints = dict(view.fingerprints)
+        for item_id, text in zip(ids, texts):
+            fingerprints[item_id] = zlib.crc32(text.encode())
+        pending = view.pending + (self.embedder.embed_batch(texts),)
+        self._view = _View(view.ids + list(ids), view.base, pending, fingerprints)
+        self._dirty = True
+        if sum(len(block) for block in pending) >= self.compact_threshold:
+            self.compact()
+
+    def sync(self, inventory: AdInventory) -> None:
+        """
+        Bring the index in line with the inventory after a (re)load.
+        New ads are appended; removed or edited ads force a full rebuild.
+        """
+        if self._inventory_version == inventory.version:
+            return
+        version = inventory.version
+
+        current = {item.id: item.text() for item in inventory.items}
+        if not self.ids:
+            self.open()  # Warm start from the memory-mapped file, if present
+        view = self._view
+        removed = [item_id for item_id in view.ids if item_id not in current]
+        changed = [
+            item_id for item_id in view.ids
+            if item_id in current and view.fingerprints.get(item_id) != zlib.crc32(current[item_id].encode())
+        ]
+        if removed or changed or not view.ids:
+            self.build(list(current), list(current.values()))
+        else:
+            known = set(view.ids)
+            new_ids = [item_id for item_id in current if item_id not in known]
+            self.add(new_ids, [current[item_id] for item_id in new_ids])
+        # Last, so a reader that sees the new version also sees the new view
+        self._inventory_version = version
+
+    async def ensure_synced(self, inventory: AdInventory) -> None:
+        """Resync after an inventory reload, embedding in a worker thread."""
+        if self._inventory_version == inventory.version:
+            return
+        async with self._sync_lock:
+            await asyncio.to_thread(self.sync, inventory)
+        if self._dirty and self.path and (self._persist_task is None or self._persist_task.done()):
+            self._persist_task = asyncio.create_task(self.persist())
+
+    # --- Query -------------------------------------------------------------
+
+    def search_batch(self, queries: list[str], k: int = 5) -> list[list[tuple[float, str]]]:
+        """Cosine top-k for several queries in one matrix product."""
+        view = self._view  # One consistent snapshot of ids and rows
+        blocks = view.blocks()
+        if not blocks or not queries:
+            return [[] for _ in queries]
+        query_matrix = self.embedder.embed_batch(queries)
+        scores = np.hstack([query_matrix @ block.T for block in blocks])
+        indices, top_scores = top_k(scores, k)
+        results = []
+        for row_indices, row_scores in zip(indices, top_scores):
+            results.append([
+                (float(score), view.ids[index])
+                for index, score in zip(row_indices, row_scores)
+                if score >= self.min_similarity
+            ])
+        return results
+
+    def search(self, query: str, k: int = 5) -> list[tuple[float, str]]:
+        return self.search_batch([query], k)[0]
+
+
+# Singleton instance
+semantic_index = SemanticIndex()
@@ -1,19 +1,47 @@
-import httpx
 import json
 from typing import Optional, List, Dict, Any
+from backend.circuit_breaker import CircuitBreaker
 from backend.config import settings
+from backend.metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS, FALLBACKS
+from backend.search_cache import search_cache
 
 class SerpClient:
     """
     Client for interacting with the SERP API (SerpApi).
     Used to ground commercial intent with real-time search data.
+    Requests go through a circuit breaker; while it is open, shopping searches
+    are answered from a stale cached response if one is held, else with an
+    error dict right away.
     """
     BASE_URL = "https://serpapi.com/search"
 
     def __init__(self):
         self.api_key = settings.SERP_API_KEY
+        self.breaker = CircuitBreaker(
+            "serp",
+            failure_threshold=settings.SERP_BREAKER_THRESHOLD,
+            reset_timeout=settings.SERP_BREAKER_RESET,
+        )
 
-    async def search(self, query: str, search_type: str = "search", location: str = "United States") -> Dict[str, Any]:
+    def available(self) -> bool:
+        """False while the circuit is open (searches would fail fast)."""
+        return self.breaker.available()
+
+    def _settle(self, error: Exception) -> None:
+        """Count a failed request against the breaker unless SerpApi rejected the request itself."""
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is not None and 400 <= status < 500 and status not in (408, 429):
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def search(
+        self,
+        query: str,
+        search_type: str = "search",
+        location: str = "United States",
+        refresh: bool = False,
+    ) -> Dict[str, Any]:
         """
         Perform a search via SerpApi.
         
@@ -21,12 +49,22 @@ class SerpClient:
             query: The search query.
             search_type: 'search' (web) or 'shopping'.
             location: Geo-location for the search (e.g., 'United States', 'New York, NY')
+            refresh: Skip the cache read and re-fetch (used by the cache warmer)
             
         Returns:
             Dict containing search results.
         """
         if not self.api_key:
             return {"error": "SERP_API_KEY not configured"}
+        
+        # Serve cached shopping results; skip searches that recently came back empty
+        is_shopping = search_type == "shopping"
+        if is_shopping and not refresh:
+            if await search_cache.is_negative(query, location):
+                return {"shopping_results": [], "negative_cache_hit": True}
+            cached = await search_cache.get(query, location)
+            if cached is not None:
+                return cached
 
         params = {
             "q": query,
@@ -39,14 +77,38 @@ class SerpClient:
             "hl": "en"
         }
 
+        if not self.breaker.allow():
+            stale = search_cache.stale(query, location) if is_shopping and not refresh else None
+            if stale is not None:
+                FALLBACKS.inc("serp_stale_cache")
+                return stale
+            return {"error": "SerpApi circuit open", "circuit_open": True}
+
+        import httpx  # Deferred to keep it off the import path of backend.main
+        
+        engine = params["engine"]
         async with httpx.AsyncClient() as client:
             try:
-                response = await client.get(self.BASE_URL, params=params, timeout=10.0)
+                with UPSTREAM_LATENCY.time("serp", engine):
+                    response = await client.get(self.BASE_URL, params=params, timeout=settings.SERP_TIMEOUT)
                 response.raise_for_status()
-                return response.json()
+                data = response.json()
             except Exception as e:
+                UPSTREAM_ERRORS.inc("serp", engine)
+                self._settle(e)
                 print(f"SERP API Error: {e}")
                 return {"error": str(e)}
+            except BaseException:
+                self.breaker.release()
+                raise
+        self.breaker.record_success()
+        
+        if is_shopping and "error" not in data:
+            if data.get("shopping_results"):
+                await search_cache.put(query, location, {"shopping_results": data["shopping_results"]})
+            else:
+                await search_cache.mark_negative(query, location)
+        return data
 
     def extract_shopping_data(self, char_limit: int = 1000, data: Dict[str, Any] = {}) -> Dict[str, Any]:
         """
@@ -0,0 +1,368 @@
+"""
+Project AXON — Session Snapshots (warm restart)
+Live sessions are written to an append-only binary file periodically and
+on shutdown. Each record is a session id plus its msgpack payload (see
+session_state.encode_session); a later record supersedes an earlier one and
+an empty payload marks an ended session. On startup the file is
+memory-mapped and only the record headers are scanned, so a session is
+decoded the first time a request touches it. Each record also carries a
+small SessionSummary (nudge count, revenue, intent, revenue points) so the
+aggregate endpoints can count cold sessions without restoring them.
+
+File layout (little-endian):
+    header:  b"AXSS" | u16 format version
+    record:  u32 payload length | u32 crc32(summary + payload) | u16 id length | u16 summary length
+             | id | summary | payload
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Iterator, Optional
+
+import msgpack
+
+from backend.config import settings
+from backend.metrics import metrics
+from backend.session_state import ConversationState, decode_session, encode_session
+
+
+MAGIC = b"AXSS"
+FILE_VERSION = 2
+_FILE_HEADER = struct.Struct("<4sH")
+_RECORD_HEADER = struct.Struct("<IIHH")
+
+SNAPSHOT_RECORDS = metrics.counter(
+    "axon_session_snapshot_records_total",
+    "Session snapshot records by event (written, ended, restored, corrupt).",
+    ["event"],
+)
+SNAPSHOT_SECONDS = metrics.histogram(
+    "axon_session_snapshot_seconds",
+    "Time spent opening, appending to and rewriting the session snapshot.",
+    ["operation"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+
+
+class SessionSummary:
+    """The per-session figures /analytics and /stats aggregate."""
+
+    __slots__ = ("nudges", "revenue", "intent", "revenue_points")
+
+    def __init__(
+        self,
+        nudges: int = 0,
+        revenue: float = 0.0,
+        intent: Optional[str] = None,
+        revenue_points: Optional[list[tuple[datetime, float]]] = None,
+    ):
+        self.nudges = nudges
+        self.revenue = revenue
+        self.intent = intent  # Intent bucket of the latest turn
+        self.revenue_points = revenue_points or []  # (timestamp, amount) per revenue event
+
+    @classmethod
+    def of(cls, session: ConversationState) -> "SessionSummary":
+        return cls(
+            nudges=len(session.nudges_shown),
+            revenue=session.total_revenue_generated,
+            intent=session.current_intent.intent_bucket.value if session.current_intent else None,
+            revenue_points=[(e.timestamp, e.amount) for e in session.revenue_events],
+        )
+
+    def encode(self) -> bytes:
+        points = [[int(ts.timestamp() * 1000), amount] for ts, amount in self.revenue_points]
+        return msgpack.packb([self.nudges, self.revenue, self.intent, points])
+
+    @classmethod
+    def decode(cls, data: bytes) -> "SessionSummary":
+        nudges, revenue, intent, points = msgpack.unpackb(data)
+        return cls(nudges, revenue, intent, [(datetime.fromtimestamp(ms / 1000), amount) for ms, amount in points])
+
+
+def _record(session_id: str, session: Optional[ConversationState] = None) -> bytes:
+    """A session's record, or a tombstone when session is None."""
+    key = session_id.encode()
+    summary = SessionSummary.of(session).encode() if session is not None else b""
+    payload = encode_session(session) if session is not None else b""
+    return (
+        _RECORD_HEADER.pack(len(payload), zlib.crc32(summary + payload), len(key), len(summary))
+        + key + summary + payload
+    )
+
+
+def _state_key(session: ConversationState) -> tuple:
+    # Every turn appends messages, so these counts change whenever the state does
+    return (
+        len(session.messages), session.compacted_messages,
+        len(session.nudges_shown), len(session.revenue_events),
+    )
+
+
+class SessionSnapshot:
+    """Writer and lazy reader for the session snapshot file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else settings.SESSION_SNAPSHOT_PATH
+        self.interval = settings.SESSION_SNAPSHOT_INTERVAL
+        self.max_garbage = settings.SESSION_SNAPSHOT_MAX_GARBAGE
+        self._map: Optional[mmap.mmap] = None
+        self._cold: dict[str, tuple[int, int]] = {}  # Not yet restored: id -> record span in the map
+        self._summaries: dict[str, SessionSummary] = {}  # Summary of each cold session
+        self._written: dict[str, tuple] = {}  # State key of each session as last written
+        self._sizes: dict[str, int] = {}  # Bytes of each session's live record in the file
+        self._ended: set[str] = set()  # Sessions needing a tombstone on the next append
+        self._file_bytes = 0
+        self._needs_rewrite = True
+        self._lock = asyncio.Lock()
+        self._sessions: Optional["SessionTable"] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Restore
+
+    def open(self) -> int:
+        """Map an existing snapshot and index its records; returns the number of sessions found."""
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        with SNAPSHOT_SECONDS.time("open"):
+            try:
+                with open(self.path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size <= _FILE_HEADER.size:
+                        return 0
+                    snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except OSError as e:
+                print(f"Session snapshot open error: {e}")
+                return 0
+
+            magic, version = _FILE_HEADER.unpack_from(snapshot, 0)
+            if magic != MAGIC or version != FILE_VERSION:
+                print(f"Session snapshot: ignoring {self.path} (unknown format)")
+                snapshot.close()
+                return 0
+
+            cold: dict[str, tuple[int, int]] = {}
+            summaries: dict[str, SessionSummary] = {}
+            pos, size = _FILE_HEADER.size, len(snapshot)
+            while pos + _RECORD_HEADER.size <= size:
+                length, _, id_len, summary_len = _RECORD_HEADER.unpack_from(snapshot, pos)
+                key_start = pos + _RECORD_HEADER.size
+                summary_start = key_start + id_len
+                end = summary_start + summary_len + length
+                if end > size:
+                    break  # Torn tail from a crash mid-append; the first write rewrites the file
+                session_id = snapshot[key_start:summary_start].decode()
+                if length:
+                    cold[session_id] = (pos, end)
+                    try:
+                        summaries[session_id] = SessionSummary.decode(snapshot[summary_start:summary_start + summary_len])
+                    except Exception:
+                        summaries[session_id] = SessionSummary()  # take() catches the corrupt record
+                else:
+                    cold.pop(session_id, None)
+                    summaries.pop(session_id, None)
+                pos = end
+
+        self._map, self._cold, self._summaries = snapshot, cold, summaries
+        self._needs_rewrite = True
+        return len(cold)
+
+    def has(self, session_id: str) -> bool:
+        return session_id in self._cold
+
+    def cold_ids(self) -> list[str]:
+        return list(self._cold)
+
+    def cold_count(self) -> int:
+        return len(self._cold)
+
+    def cold_summaries(self) -> list[SessionSummary]:
+        return list(self._summaries.values())
+
+    def take(self, session_id: str) -> Optional[ConversationState]:
+        """Decode a not-yet-restored session from the map (None if absent or corrupt)."""
+        span = self._cold.pop(session_id, None)
+        self._summaries.pop(session_id, None)
+        if span is None:
+            return None
+        start, end = span
+        _, crc, id_len, summary_len = _RECORD_HEADER.unpack_from(self._map, start)
+        summary_start = start + _RECORD_HEADER.size + id_len
+        try:
+            if zlib.crc32(self._map[summary_start:end]) != crc:
+                raise ValueError("checksum mismatch")
+            session = decode_session(self._map[summary_start + summary_len:end])
+        except Exception as e:
+            print(f"Session snapshot: dropping {session_id} ({e})")
+            SNAPSHOT_RECORDS.inc("corrupt")
+            return None
+        self._written[session_id] = _state_key(session)
+        SNAPSHOT_RECORDS.inc("restored")
+        return session
+
+    def discard(self, session_id: str) -> bool:
+        """Forget an ended session; returns True if it was still waiting to be restored."""
+        was_cold = self._cold.pop(session_id, None) is not None
+        self._summaries.pop(session_id, None)
+        if was_cold or self._written.pop(session_id, None) is not None:
+            self._ended.add(session_id)
+        return was_cold
+
+    # Write
+
+    async def write(self, sessions: "SessionTable") -> int:
+        """Persist changed sessions; returns the number of session records written."""
+        if not self.path:
+            return 0
+        async with self._lock:
+            garbage = self._file_bytes - sum(self._sizes.values())
+            if self._needs_rewrite or garbage > self.max_garbage * self._file_bytes:
+                return await self._rewrite(sessions)
+            return await self._append(sessions)
+
+    async def _append(self, sessions: "SessionTable") -> int:
+        records, keys = [], {}
+        for session_id, session in sessions.restored().items():
+            key = _state_key(session)
+            if self._written.get(session_id) != key:
+                records.append((session_id, _record(session_id, session)))
+                keys[session_id] = key
+        pending = set(self._ended)
+        ended = [sid for sid in pending if sid not in keys]
+        chunks = [record for _, record in records] + [_record(sid) for sid in ended]
+        if not chunks:
+            return 0
+
+        with SNAPSHOT_SECONDS.time("append"):
+            await asyncio.to_thread(self._write_file, chunks, "ab")
+
+        for session_id, record in records:
+            self._sizes[session_id] = len(record)
+        for session_id in ended:
+            self._sizes.pop(session_id, None)
+        self._written.update(keys)
+        self._ended -= pending
+        self._file_bytes += sum(len(chunk) for chunk in chunks)
+        SNAPSHOT_RECORDS.inc("written", amount=len(records))
+        SNAPSHOT_RECORDS.inc("ended", amount=len(ended))
+        return len(records)
+
+    async def _rewrite(self, sessions: "SessionTable") -> int:
+        """Write a fresh file holding only live records, then swap it in."""
+        sizes, keys = {}, {}
+        ended = set(self._ended)
+        chunks = [_FILE_HEADER.pack(MAGIC, FILE_VERSION)]
+        # Unrestored sessions are copied byte for byte from the old map
+        for session_id, (start, end) in self._cold.items():
+            chunks.append(self._map[start:end])
+            sizes[session_id] = end - start
+        for session_id, session in sessions.restored().items():
+            record = _record(session_id, session)
+            chunks.append(record)
+            sizes[session_id] = len(record)
+            keys[session_id] = _state_key(session)
+
+        with SNAPSHOT_SECONDS.time("rewrite"):
+            tmp_path = self.path + ".tmp"
+            await asyncio.to_thread(self._write_file, chunks, "wb", tmp_path)
+            os.replace(tmp_path, self.path)
+
+        # Spans in self._cold keep pointing into the old map, which stays valid after the replace
+        self._sizes, self._written = sizes, keys
+        self._ended -= ended
+        self._file_bytes = sum(len(chunk) for chunk in chunks)
+        self._needs_rewrite = False
+        SNAPSHOT_RECORDS.inc("written", amount=len(keys))
+        return len(keys)
+
+    def _write_file(self, chunks: list[bytes], mode: str, path: Optional[str] = None) -> None:
+        directory = os.path.dirname(path or self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path or self.path, mode) as f:
+            f.writelines(chunks)
+            f.flush()
+            os.fsync(f.fileno())
+
+    # Lifecycle
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.write(self._sessions)
+            except Exception as e:
+                print(f"Session snapshot error: {e}")
+
+    def start(self, sessions: "SessionTable") -> None:
+        """Schedule periodic snapshots of `sessions` (the shutdown snapshot runs regardless)."""
+        self._sessions = sessions
+        if self._task or self.interval <= 0 or not self.path:
+            return
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._sessions is not None:
+            try:
+                await self.write(self._sessions)
+            except Exception as e:
+                print(f"Session snapshot error on shutdown: {e}")
+
+
+class SessionTable(MutableMapping):
+    """
+    Sessions by id, backed by a SessionSnapshot for warm restarts.
+    Sessions still in the snapshot are decoded on first lookup; iterating
+    values() restores all of them, so aggregates should use summaries().
+    """
+
+    def __init__(self, snapshot: SessionSnapshot):
+        self._live: dict[str, ConversationState] = {}
+        self._snapshot = snapshot
+
+    def __getitem__(self, session_id: str) -> ConversationState:
+        session = self._live.get(session_id)
+        if session is None:
+            session = self._snapshot.take(session_id)
+            if session is None:
+                raise KeyError(session_id)
+            self._live[session_id] = session
+        return session
+
+    def __setitem__(self, session_id: str, session: ConversationState) -> None:
+        self._live[session_id] = session
+
+    def __delitem__(self, session_id: str) -> None:
+        found = self._live.pop(session_id, None) is not None
+        if not self._snapshot.discard(session_id) and not found:
+            raise KeyError(session_id)
+
+    def __contains__(self, session_id) -> bool:
+        return session_id in self._live or self._snapshot.has(session_id)
+
+    def __iter__(self) -> Iterator[str]:
+        # A copy: restoring during iteration moves ids between the two tables
+        return iter(list(self._live) + self._snapshot.cold_ids())
+
+    def __len__(self) -> int:
+        return len(self._live) + self._snapshot.cold_count()
+
+    def restored(self) -> dict[str, ConversationState]:
+        """Sessions already in memory (the ones a snapshot may need to rewrite)."""
+        return self._live
+
+    def summaries(self) -> list[SessionSummary]:
+        """A summary of every session, without restoring the cold ones."""
+        return [SessionSummary.of(s) for s in self._live.values()] + self._snapshot.cold_summaries()
+
+
+# Singleton instance
+session_snapshot = SessionSnapshot()
@@ -0,0 +1,217 @@
+"""
+Project AXON — Compact Session State
+In-memory representation of a conversation. Messages live in parallel
+arrays (interned role ids, epoch-millisecond timestamps, content strings)
+instead of one pydantic object per message, and sessions round-trip
+through a msgpack codec for persistence. Pydantic models (Message,
+IntentAnalysis, Nudge, RevenueEvent) are only built at the API boundary
+or for the handful of per-session objects that already are API-shaped.
+"""
+
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Iterator, Optional
+
+import msgpack
+
+from backend.models import IntentAnalysis, Message, Nudge, PrefetchedCandidates, RevenueEvent
+
+
+CODEC_VERSION = 1
+
+# Interned role table: messages store a one-byte id
+_ROLE_NAMES: list[str] = ["user", "assistant", "system"]
+_ROLE_IDS: dict[str, int] = {name: i for i, name in enumerate(_ROLE_NAMES)}
+
+
+def role_id(role: str) -> int:
+    rid = _ROLE_IDS.get(role)
+    if rid is None:
+        if len(_ROLE_NAMES) >= 256:
+            raise ValueError(f"Too many distinct message roles (adding {role!r})")
+        rid = _ROLE_IDS[sys.intern(role)] = len(_ROLE_NAMES)
+        _ROLE_NAMES.append(sys.intern(role))
+    return rid
+
+
+def now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
+
+class MessageRecord:
+    """Lightweight view of one message, built on access."""
+
+    __slots__ = ("role", "content", "ts")
+
+    def __init__(self, role: str, content: str, ts: int):
+        self.role = role
+        self.content = content
+        self.ts = ts  # Epoch milliseconds
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.ts / 1000)
+
+    def to_model(self) -> Message:
+        return Message(role=self.role, content=self.content, timestamp=self.timestamp)
+
+
+class MessageLog:
+    """Append-only message storage backed by parallel arrays."""
+
+    __slots__ = ("_roles", "_ts", "_contents")
+
+    def __init__(self):
+        self._roles = array("B")
+        self._ts = array("q")
+        self._contents: list[str] = []
+
+    @classmethod
+    def _from_parts(cls, roles: array, ts: array, contents: list[str]) -> "MessageLog":
+        log = cls()
+        log._roles, log._ts, log._contents = roles, ts, contents
+        return log
+
+    def append(self, role: str, content: str, ts: Optional[int] = None) -> MessageRecord:
+        rid = role_id(role)
+        ts = now_ms() if ts is None else ts
+        self._roles.append(rid)
+        self._ts.append(ts)
+        self._contents.append(content)
+        return MessageRecord(_ROLE_NAMES[rid], content, ts)
+
+    def __len__(self) -> int:
+        return len(self._contents)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._from_parts(self._roles[index], self._ts[index], self._contents[index])
+        return MessageRecord(_ROLE_NAMES[self._roles[index]], self._contents[index], self._ts[index])
+
+    def __iter__(self) -> Iterator[MessageRecord]:
+        for rid, ts, content in zip(self._roles, self._ts, self._contents):
+            yield MessageRecord(_ROLE_NAMES[rid], content, ts)
+
+    def content_at(self, index: int) -> str:
+        return self._contents[index]
+
+    def to_models(self) -> list[Message]:
+        return [record.to_model() for record in self]
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the log (arrays, list and strings)."""
+        return (
+            sys.getsizeof(self._roles) + sys.getsizeof(self._ts) + sys.getsizeof(self._contents)
+            + sum(sys.getsizeof(c) for c in self._contents)
+        )
+
+
+class ConversationState:
+    """Full state of an AXON conversation session."""
+
+    __slots__ = (
+        "session_id", "messages", "current_intent", "nudges_shown", "revenue_events",
+        "total_revenue_generated", "prefetched", "summary", "compacted_messages",
+        "created_at", "_transcript",
+    )
+
+    def __init__(
+        self,
+        session_id: str,
+        messages: Optional[MessageLog] = None,
+        current_intent: Optional[IntentAnalysis] = None,
+        nudges_shown: Optional[list[Nudge]] = None,
+        revenue_events: Optional[list[RevenueEvent]] = None,
+        total_revenue_generated: float = 0.0,
+        prefetched: Optional[PrefetchedCandidates] = None,
+        summary: Optional[str] = None,
+        compacted_messages: int = 0,
+        created_at: Optional[int] = None,
+    ):
+        self.session_id = session_id
+        self.messages = messages if messages is not None else MessageLog()
+        self.current_intent = current_intent
+        self.nudges_shown = nudges_shown or []
+        self.revenue_events = revenue_events or []
+        self.total_revenue_generated = total_revenue_generated
+        self.prefetched = prefetched
+        self.summary = summary  # Rolling summary of compacted turns
+        self.compacted_messages = compacted_messages  # Messages folded into the summary so far
+        self.created_at = created_at or now_ms()  # Epoch milliseconds
+        self._transcript = None
+
+    @property
+    def transcript(self):
+        """Token-budgeted TranscriptBuffer over the messages (built on first use)."""
+        from backend.context_window import TranscriptBuffer
+        if self._transcript is None:
+            self._transcript = TranscriptBuffer()
+        self._transcript.sync(self.messages, self.summary)
+        return self._transcript
+
+    def add_message(self, role: str, content: str) -> None:
+        """Add a message to the conversation."""
+        record = self.messages.append(role, content)
+        if self._transcript is not None:
+            self._transcript.append(record)
+
+    def get_recent_messages(self, count: int = 20) -> MessageLog:
+        """Get the last N messages for context."""
+        return self.messages[-count:]
+
+
+def _dump(model) -> dict:
+    return model.model_dump(mode="json")
+
+
+def encode_session(state: ConversationState) -> bytes:
+    """Serialize a session to msgpack (arrays travel as raw little-endian bytes)."""
+    roles, ts = state.messages._roles, state.messages._ts
+    if sys.byteorder != "little":
+        ts = array("q", ts)
+        ts.byteswap()
+    return msgpack.packb({
+        "v": CODEC_VERSION,
+        "id": state.session_id,
+        "created": state.created_at,
+        "role_names": _ROLE_NAMES[:max(roles, default=0) + 1],
+        "roles": roles.tobytes(),
+        "ts": ts.tobytes(),
+        "content": state.messages._contents,
+        "summary": state.summary,
+        "compacted": state.compacted_messages,
+        "revenue_total": state.total_revenue_generated,
+        "intent": _dump(state.current_intent) if state.current_intent else None,
+        "nudges": [_dump(n) for n in state.nudges_shown],
+        "revenue": [_dump(e) for e in state.revenue_events],
+        "prefetched": _dump(state.prefetched) if state.prefetched else None,
+    }, use_bin_type=True)
+
+
+def decode_session(payload: bytes) -> ConversationState:
+    data = msgpack.unpackb(payload, raw=False)
+    if data.get("v") != CODEC_VERSION:
+        raise ValueError(f"Unsupported session codec version: {data.get('v')}")
+
+    # Role ids are only stable within a process: remap through the stored names
+    remap = bytes(role_id(name) for name in data["role_names"])
+    roles = array("B", bytes(data["roles"]).translate(remap.ljust(256, b"\0")))
+    ts = array("q")
+    ts.frombytes(data["ts"])
+    if sys.byteorder != "little":
+        ts.byteswap()
+
+    return ConversationState(
+        session_id=data["id"],
+        messages=MessageLog._from_parts(roles, ts, data["content"]),
+        current_intent=IntentAnalysis.model_validate(data["intent"]) if data["intent"] else None,
+        nudges_shown=[Nudge.model_validate(n) for n in data["nudges"]],
+        revenue_events=[RevenueEvent.model_validate(e) for e in data["revenue"]],
+        total_revenue_generated=data["revenue_total"],
+        prefetched=PrefetchedCandidates.model_validate(data["prefetched"]) if data["prefetched"] else None,
+        summary=data["summary"],
+        compacted_messages=data["compacted"],
+        created_at=data["created"],
+    )
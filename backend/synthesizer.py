@@ -2,11 +2,22 @@
 Project AXON — Synthesizer
 Rewrites AI responses to include micro-nudges without breaking natural flow.
 Uses Gemini 3.0 Pro for high-quality prose synthesis.
+
+In splice and template modes the answer is generated without any ad context
+and the nudge is attached afterwards, so the expensive answer can be cached
+or streamed independently of the ad decision.
+
+While the Gemini circuit is open, splices degrade to the template and a
+failed answer returns UNAVAILABLE_MESSAGE at once instead of retrying.
 """
 
+from typing import Optional
+
 from backend.gemini_client import gemini
 from backend.config import settings
 from backend.models import Nudge
+from backend.metrics import FALLBACKS
+from backend.response_cache import response_cache
 
 
 SYNTHESIZER_SYSTEM = """
@@ -42,6 +53,33 @@ DO NOT omit the nudge.
 """
 
 
+ANSWER_SYSTEM = "You are a helpful AI assistant. Answer the user's question fully, accurately and clearly."
+
+
+SPLICE_SYSTEM = """
+You write a single short closing paragraph (1-2 sentences) that follows an
+assistant's answer and recommends one product. It must read as helpful advice,
+connect to the end of the answer, keep the product link exactly as given, and
+never repeat or contradict the answer. Output only the paragraph.
+"""
+
+
+SPLICE_PROMPT = """
+END OF ANSWER:
+{answer_tail}
+
+{nudge_section}
+
+Write the closing paragraph.
+"""
+
+
+SYNTHESIS_MODES = ("woven", "splice", "template")
+
+
+UNAVAILABLE_MESSAGE = "I apologize, but I'm having trouble generating a response right now. Please try again."
+
+
 class Synthesizer:
     """
     Synthesizes AI responses with optional micro-nudge injection.
@@ -50,12 +88,17 @@ class Synthesizer:
     
     def __init__(self):
         self.model = settings.SYNTHESIZER_MODEL
+        self.splice_model = settings.SPLICE_MODEL
+        self.mode = settings.SYNTHESIS_MODE if settings.SYNTHESIS_MODE in SYNTHESIS_MODES else "splice"
     
     async def generate_response(
         self,
         user_message: str,
         conversation_context: str = "",
         nudge: Nudge = None,
+        answer: Optional[str] = None,
+        mode: Optional[str] = None,
+        cacheable: bool = True,
     ) -> str:
         """
         Generate an AI response with optional nudge injection.
@@ -64,10 +107,94 @@ class Synthesizer:
             user_message: The user's current message
             conversation_context: Previous conversation for context
             nudge: Optional Nudge to inject into response
+            answer: Previously generated plain answer to reuse (splice/template)
+            mode: Override SYNTHESIS_MODE for this call
+            cacheable: Allow the plain answer to be served from / stored in
+                the response cache (False for turns the text doesn't capture,
+                e.g. image turns)
             
         Returns:
             Synthesized response with natural nudge integration
         """
+        mode = mode or self.mode
+        if mode == "woven":
+            return await self._generate_woven(user_message, conversation_context, nudge)
+        
+        if answer is None:
+            answer = await self.generate_answer(user_message, conversation_context, cacheable=cacheable)
+        if not nudge or nudge.relevance_score < settings.MIN_RELEVANCE_SCORE or answer == UNAVAILABLE_MESSAGE:
+            return answer
+        if mode == "template":
+            return self.template_nudge(answer, nudge)
+        return await self.splice_nudge(answer, nudge)
+    
+    async def generate_answer(
+        self,
+        user_message: str,
+        conversation_context: str = "",
+        cacheable: bool = True,
+    ) -> str:
+        """The plain answer, independent of any ad decision."""
+        if cacheable:
+            cached = await response_cache.get(user_message, conversation_context)
+            if cached is not None:
+                return cached
+        
+        prompt = f"USER MESSAGE:\n{user_message}"
+        if conversation_context:
+            prompt = f"CONVERSATION CONTEXT:\n{conversation_context}\n\n{prompt}"
+        
+        try:
+            response = await gemini.generate(
+                prompt=prompt,
+                model=self.model,
+                system_instruction=ANSWER_SYSTEM,
+                temperature=0.7,
+                max_tokens=1500,
+                stage="synthesis",
+            )
+        except Exception as e:
+            return await self._fallback_response(user_message, str(e))
+        
+        answer = response.strip()
+        if cacheable:
+            await response_cache.put(user_message, conversation_context, answer)
+        return answer
+    
+    async def splice_nudge(self, answer: str, nudge: Nudge) -> str:
+        """Attach the nudge with a short bridging call; falls back to the template."""
+        if not gemini.available():
+            FALLBACKS.inc("synthesizer_splice")
+            return self.template_nudge(answer, nudge)
+        prompt = SPLICE_PROMPT.format(
+            answer_tail=answer[-600:],
+            nudge_section=self._format_nudge_section(nudge),
+        )
+        try:
+            bridge = await gemini.generate(
+                prompt=prompt,
+                model=self.splice_model,
+                system_instruction=SPLICE_SYSTEM,
+                temperature=0.5,
+                max_tokens=settings.SPLICE_MAX_TOKENS,
+                stage="synthesis_splice",
+            )
+        except Exception as e:
+            print(f"Splice error: {e}")
+            FALLBACKS.inc("synthesizer_splice")
+            return self.template_nudge(answer, nudge)
+        
+        bridge = bridge.strip()
+        if not bridge:
+            return self.template_nudge(answer, nudge)
+        return f"{answer}\n\n{bridge}"
+    
+    def template_nudge(self, answer: str, nudge: Nudge) -> str:
+        """Attach Nudge.nudge_text verbatim, with no model call."""
+        return f"{answer}\n\n{nudge.nudge_text}"
+    
+    async def _generate_woven(self, user_message: str, conversation_context: str, nudge: Optional[Nudge]) -> str:
+        """Single generation with the nudge inside the prompt."""
         # Build nudge section if applicable
         if nudge and nudge.relevance_score >= settings.MIN_RELEVANCE_SCORE:
             nudge_section = self._format_nudge_section(nudge)
@@ -90,6 +217,7 @@ class Synthesizer:
                 system_instruction=SYNTHESIZER_SYSTEM,
                 temperature=0.7,
                 max_tokens=1500,
+                stage="synthesis",
             )
             
             return response.strip()
@@ -117,15 +245,20 @@ class Synthesizer:
         return "\n".join(lines)
     
     async def _fallback_response(self, user_message: str, error: str) -> str:
-        """Generate basic response without nudge on error."""
+        """Generate basic response without nudge on error (no retry while the circuit is open)."""
+        if not gemini.available():
+            FALLBACKS.inc("synthesizer_fast_fail")
+            return UNAVAILABLE_MESSAGE
+        FALLBACKS.inc("synthesizer")
         try:
             return await gemini.generate(
                 prompt=user_message,
                 system_instruction="You are a helpful AI assistant. Answer clearly and concisely.",
                 temperature=0.7,
+                stage="synthesis_fallback",
             )
         except Exception:
-            return "I apologize, but I'm having trouble generating a response right now. Please try again."
+            return UNAVAILABLE_MESSAGE
 
 
 # Singleton instance
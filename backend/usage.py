@@ -0,0 +1,153 @@
+"""
+Project AXON — Token Usage Accounting
+Rolls up Gemini usage metadata per pipeline stage, session, model and API key
+so CPIF can be computed from real token spend.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from backend.config import settings
+
+
+# (session_id, api_key_id) bound for the duration of a /chat request
+_usage_context: ContextVar[tuple[str, str]] = ContextVar(
+    "axon_usage_context", default=("unknown", "anonymous")
+)
+# Usage entries recorded while capture() is active (queue jobs ship them back to the API)
+_usage_capture: ContextVar[list | None] = ContextVar("axon_usage_capture", default=None)
+
+
+class TokenUsage:
+    """Accumulated token counts and cost for one rollup bucket."""
+
+    __slots__ = ("calls", "prompt_tokens", "cached_tokens", "output_tokens", "cost_usd")
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+
+    def add(self, prompt: int, cached: int, output: int, cost: float) -> None:
+        self.calls += 1
+        self.prompt_tokens += prompt
+        self.cached_tokens += cached
+        self.output_tokens += output
+        self.cost_usd += cost
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "cached_tokens": self.cached_tokens,
+            "output_tokens": self.output_tokens,
+            "avg_prompt_tokens": round(self.prompt_tokens / self.calls, 1) if self.calls else 0,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+class UsageTracker:
+    """
+    In-process token ledger.
+    GeminiClient reports every response here; the session and API key are
+    picked up from the request context bound in /chat. Session rollups are
+    dropped when the session ends and capped at USAGE_MAX_SESSIONS.
+    """
+
+    def __init__(self):
+        self.total = TokenUsage()
+        self.by_stage: dict[str, TokenUsage] = {}
+        self.by_model: dict[str, TokenUsage] = {}
+        self.by_session: OrderedDict[str, TokenUsage] = OrderedDict()  # Least recently used first
+        self.max_sessions = settings.USAGE_MAX_SESSIONS
+        self.by_api_key: dict[str, TokenUsage] = {}
+
+    def bind(self, session_id: str, api_key_id: str | None = None) -> None:
+        """Attribute subsequent Gemini calls in this request to a session / API key."""
+        _usage_context.set((session_id, api_key_id or "anonymous"))
+
+    def current(self) -> tuple[str, str]:
+        """The (session_id, api_key_id) bound to this request."""
+        return _usage_context.get()
+
+    @contextmanager
+    def capture(self) -> Iterator[list]:
+        """Collect the usage entries recorded inside the block, for merge() in another process."""
+        entries: list = []
+        token = _usage_capture.set(entries)
+        try:
+            yield entries
+        finally:
+            _usage_capture.reset(token)
+
+    def merge(self, entries: list) -> None:
+        """Apply entries captured elsewhere (e.g. by a queue worker) under this request's binding."""
+        for stage, model, prompt, cached, output in entries:
+            self._add(stage, model, prompt, cached, output)
+
+    def cost(self, model: str, prompt: int, cached: int, output: int) -> float:
+        """Cost in USD; cached tokens are part of the prompt count but billed lower."""
+        input_rate, cached_rate, output_rate = settings.MODEL_PRICING.get(model, (0.0, 0.0, 0.0))
+        uncached = max(prompt - cached, 0)
+        return (uncached * input_rate + cached * cached_rate + output * output_rate) / 1_000_000
+
+    def record(self, stage: str, model: str, usage_metadata) -> None:
+        """Record the usage_metadata of a single generate_content response."""
+        if usage_metadata is None:
+            return
+
+        prompt = usage_metadata.prompt_token_count or 0
+        cached = usage_metadata.cached_content_token_count or 0
+        output = (usage_metadata.candidates_token_count or 0) + (
+            getattr(usage_metadata, "thoughts_token_count", None) or 0
+        )
+        self._add(stage, model, prompt, cached, output)
+        captured = _usage_capture.get()
+        if captured is not None:
+            captured.append([stage, model, prompt, cached, output])
+
+    def _add(self, stage: str, model: str, prompt: int, cached: int, output: int) -> None:
+        cost = self.cost(model, prompt, cached, output)
+        session_id, api_key_id = _usage_context.get()
+
+        self.total.add(prompt, cached, output, cost)
+        for rollup, key in (
+            (self.by_stage, stage),
+            (self.by_model, model),
+            (self.by_session, session_id),
+            (self.by_api_key, api_key_id),
+        ):
+            bucket = rollup.get(key)
+            if bucket is None:
+                bucket = rollup[key] = TokenUsage()
+            bucket.add(prompt, cached, output, cost)
+
+        self.by_session.move_to_end(session_id)
+        while len(self.by_session) > self.max_sessions:
+            self.by_session.popitem(last=False)
+
+    def forget_session(self, session_id: str) -> None:
+        self.by_session.pop(session_id, None)
+
+    def session_cost(self, session_id: str) -> float:
+        bucket = self.by_session.get(session_id)
+        return bucket.cost_usd if bucket else 0.0
+
+    def snapshot(self, include_sessions: bool = False) -> dict:
+        """Serializable view for /analytics and /admin/stats."""
+        data = {
+            "total": self.total.to_dict(),
+            "by_stage": {k: v.to_dict() for k, v in self.by_stage.items()},
+            "by_model": {k: v.to_dict() for k, v in self.by_model.items()},
+            "by_api_key": {k: v.to_dict() for k, v in self.by_api_key.items()},
+        }
+        if include_sessions:
+            data["by_session"] = {k: v.to_dict() for k, v in self.by_session.items()}
+        return data
+
+
+# Singleton instance
+usage_tracker = UsageTracker()
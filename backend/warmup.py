@@ -0,0 +1,48 @@
+"""
+Project AXON — Warm-up Hook
+Importing backend.main only defines things: the Gemini, SERP and Redis
+clients (and their SDK imports) are built on first use, which keeps cold
+starts and test imports cheap. warm_up() does that work up front. The API
+runs it at startup unless WARM_UP_ON_STARTUP is off; serverless handlers
+can call it from their init phase instead.
+"""
+
+import time
+
+from backend.config import settings
+from backend.gemini_client import gemini
+from backend.redis_client import RedisClient
+
+
+async def warm_up(connect: bool = True) -> dict[str, float]:
+    """
+    Validate settings and build the lazy clients.
+    Returns the seconds spent per step; with connect, Redis is pinged too
+    (a failure is logged, not raised, like the rest of the Redis callers).
+    """
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    settings.validate()
+    timings["settings"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    gemini.client
+    timings["gemini"] = time.perf_counter() - start
+
+    if settings.SERP_API_KEY:
+        start = time.perf_counter()
+        import httpx  # noqa: F401 (serp_client imports it on first search)
+        timings["serp"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    redis = RedisClient.get_instance()
+    if connect:
+        try:
+            await redis.ping()
+        except Exception as e:
+            print(f"Warm-up: Redis ping failed: {e}")
+    timings["redis"] = time.perf_counter() - start
+
+    print("Warm-up: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    return timings
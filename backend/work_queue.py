@@ -0,0 +1,400 @@
+"""
+Project AXON — Distributed Work Queue
+Optional mode (WORK_QUEUE_MODE=queue) that moves the upstream-heavy steps
+of /chat — Pulse analysis, nudge lookup and prefetch ranking — onto Redis
+Streams consumed by `python -m backend.worker`, so the HTTP tier and the
+model/SERP tier scale separately.
+
+Each job kind has its own stream (jobs:<kind>) and consumer group. The API
+pushes a job with a deadline and waits on a per-job reply list (BLPOP
+reply:<job id>) on a connection pool of its own, so parked callers cannot
+starve the pool the rest of the API uses. Workers skip jobs whose caller
+has already given up and retry a failing job in place while its deadline
+allows, up to WORK_QUEUE_MAX_ATTEMPTS; after that (or once no retry could
+finish in time) they reply with an error at once, dead-lettering exhausted
+jobs to jobs:dead. Jobs left pending by a crashed worker are reclaimed
+through XAUTOCLAIM. When the queue fails fast the API runs the step
+in-process; when the wait runs out (the job deadline, or for /chat steps
+the request budget) it degrades instead of starting the step over, so a
+stalled worker cannot double tail latency.
+
+Each job carries the caller's session and API key id. Workers bind them
+for token accounting and return the usage they recorded in the reply,
+where the API merges it into its own tracker.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+from backend.axon_registry import axon_registry
+from backend.config import settings
+from backend.context_window import ContextPolicy
+from backend.frequency_cap import frequency_capper
+from backend.image_pipeline import IngestedImage
+from backend.metrics import metrics
+from backend.models import IntentAnalysis, Nudge
+from backend.pulse_monitor import pulse_monitor
+from backend.redis_client import RedisClient
+from backend.session_state import ConversationState
+from backend.usage import usage_tracker
+
+
+JOBS = metrics.counter(
+    "axon_work_queue_jobs_total",
+    "Work queue jobs by kind and outcome.",
+    ["kind", "outcome"],
+)
+JOB_WAIT = metrics.histogram(
+    "axon_work_queue_wait_seconds",
+    "Time the API waited for a queued job's reply.",
+    ["kind"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+REPLY_PREFIX = "reply"
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+# Monotonic deadline of the /chat request being served (see WorkQueue.begin_request)
+_request_deadline: ContextVar[Optional[float]] = ContextVar("axon_request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The queue did not answer before the job deadline or the request budget ran out."""
+
+
+# Job handlers: JSON payload in, JSON result out (run by workers)
+
+async def _pulse_job(payload: dict) -> dict:
+    state = ConversationState(session_id=payload["session_id"], summary=payload.get("summary"))
+    for role, content in payload["messages"]:
+        state.add_message(role, content)
+    analysis = await pulse_monitor.analyze(state.messages, transcript=state.transcript)
+    return analysis.model_dump(mode="json")
+
+
+async def _nudge_job(payload: dict) -> dict:
+    prefetched = payload.get("prefetched")
+    nudge = await axon_registry.find_nudge(
+        IntentAnalysis.model_validate(payload["analysis"]),
+        session_id=payload.get("session_id"),
+        user_id=payload.get("user_id"),
+        prefetched=[tuple(candidate) for candidate in prefetched] if prefetched is not None else None,
+    )
+    return {"nudge": nudge.model_dump(mode="json") if nudge else None}
+
+
+async def _rank(analysis: IntentAnalysis, session_id: str, user_id: Optional[str]) -> list[dict]:
+    cap = await frequency_capper.load(session_id, user_id)
+    ranked = await axon_registry.rank_candidates(analysis, k=settings.RANKING_CANDIDATES, cap=cap)
+    return [{"result": ad.result, "source": ad.source, "retrieval": ad.retrieval} for ad in ranked]
+
+
+async def _prefetch_job(payload: dict) -> dict:
+    analysis = IntentAnalysis.model_validate(payload["analysis"])
+    return {"candidates": await _rank(analysis, payload["session_id"], payload.get("user_id"))}
+
+
+JOB_HANDLERS: dict[str, Handler] = {
+    "pulse": _pulse_job,
+    "nudge": _nudge_job,
+    "prefetch": _prefetch_job,
+}
+
+
+def stream_key(kind: str) -> str:
+    return f"{settings.WORK_QUEUE_PREFIX}:{kind}"
+
+
+class WorkQueue:
+    """API side: run a pipeline step in-process or through the queue."""
+
+    def __init__(self):
+        self.enabled = settings.WORK_QUEUE_MODE == "queue"
+        self.timeouts = settings.WORK_QUEUE_TIMEOUTS
+        self.maxlen = settings.WORK_QUEUE_MAXLEN
+        self.reply_ttl = settings.WORK_QUEUE_REPLY_TTL
+        self.request_budget = settings.CHAT_REQUEST_BUDGET
+
+    def begin_request(self) -> None:
+        """Start the budget that queued /chat steps share for this request."""
+        _request_deadline.set(time.monotonic() + self.request_budget)
+
+    def _wait_budget(self, kind: str, budgeted: bool) -> float:
+        timeout = self.timeouts[kind]
+        deadline = _request_deadline.get() if budgeted else None
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        return timeout
+
+    async def submit(self, kind: str, payload: dict, budgeted: bool = True) -> Optional[dict]:
+        """
+        Queue a job and wait for its result; None on a failed job or an unreachable queue.
+        Raises DeadlineExceeded once the job deadline (or, if budgeted, the request budget) has passed.
+        """
+        timeout = self._wait_budget(kind, budgeted)
+        if timeout <= 0:
+            JOBS.inc(kind, "timeout")
+            raise DeadlineExceeded(kind)
+        job_id = uuid.uuid4().hex
+        deadline = int((time.time() + timeout) * 1000)
+        session_id, api_key_id = usage_tracker.current()
+        try:
+            redis = RedisClient.get_instance()
+            await redis.xadd(
+                stream_key(kind),
+                {"id": job_id, "d": str(deadline), "s": session_id, "k": api_key_id, "p": json.dumps(payload)},
+                maxlen=self.maxlen, approximate=True,
+            )
+            JOBS.inc(kind, "submitted")
+            with JOB_WAIT.time(kind):
+                reply = await RedisClient.get_blocking_instance().blpop([f"{REPLY_PREFIX}:{job_id}"], timeout=timeout)
+        except Exception as e:
+            print(f"Work queue error ({kind}): {e}")
+            JOBS.inc(kind, "unavailable")
+            return None
+
+        if reply is None:
+            JOBS.inc(kind, "timeout")
+            raise DeadlineExceeded(kind)
+        body = json.loads(reply[1])
+        usage_tracker.merge(body.get("usage", []))
+        if not body.get("ok"):
+            JOBS.inc(kind, "failed")
+            return None
+        JOBS.inc(kind, "completed")
+        return body["result"]
+
+    async def analyze(self, session: ConversationState, image: Optional[IngestedImage] = None) -> IntentAnalysis:
+        """Pulse analysis for the session's latest turn (images always stay in-process)."""
+        if self.enabled and image is None:
+            recent = session.get_recent_messages(ContextPolicy.named("pulse").max_messages)
+            try:
+                result = await self.submit("pulse", {
+                    "session_id": session.session_id,
+                    "summary": session.summary,
+                    "messages": [[m.role, m.content] for m in recent],
+                })
+            except DeadlineExceeded:
+                JOBS.inc("pulse", "degraded")
+                return pulse_monitor.heuristic_analysis(session.messages)
+            if result is not None:
+                return IntentAnalysis.model_validate(result)
+            JOBS.inc("pulse", "fallback")
+        return await pulse_monitor.analyze(session.messages, image=image, transcript=session.transcript)
+
+    async def find_nudge(
+        self,
+        analysis: IntentAnalysis,
+        session_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        prefetched: Optional[list[tuple[dict, str, float]]] = None,
+    ) -> Optional[Nudge]:
+        if self.enabled:
+            try:
+                result = await self.submit("nudge", {
+                    "analysis": analysis.model_dump(mode="json"),
+                    "session_id": session_id,
+                    "user_id": user_id,
+                    "prefetched": prefetched,
+                })
+            except DeadlineExceeded:
+                JOBS.inc("nudge", "degraded")
+                return None  # No time left for a lookup: skip the nudge this turn
+            if result is not None:
+                return Nudge.model_validate(result["nudge"]) if result["nudge"] else None
+            JOBS.inc("nudge", "fallback")
+        return await axon_registry.find_nudge(
+            analysis, session_id=session_id, user_id=user_id, prefetched=prefetched,
+        )
+
+    async def rank_candidates(
+        self,
+        analysis: IntentAnalysis,
+        session_id: str,
+        user_id: Optional[str] = None,
+    ) -> list[dict]:
+        """Prefetch candidates as {"result", "source", "retrieval"} dicts."""
+        if self.enabled:
+            try:
+                # Runs in the background: bounded by its own deadline, not the request budget
+                result = await self.submit("prefetch", {
+                    "analysis": analysis.model_dump(mode="json"),
+                    "session_id": session_id,
+                    "user_id": user_id,
+                }, budgeted=False)
+            except DeadlineExceeded:
+                JOBS.inc("prefetch", "degraded")
+                return []
+            if result is not None:
+                return result["candidates"]
+            JOBS.inc("prefetch", "fallback")
+        return await _rank(analysis, session_id, user_id)
+
+
+class Worker:
+    """
+    Consumes job streams with a per-kind concurrency limit. A job is acked
+    once it has replied, successfully or not; only a job whose worker died
+    mid-run stays pending, to be reclaimed after WORK_QUEUE_CLAIM_IDLE_MS.
+    """
+
+    def __init__(self, kinds: Optional[list[str]] = None, consumer: Optional[str] = None):
+        self.kinds = kinds or list(JOB_HANDLERS)
+        self.consumer = consumer or f"{socket.gethostname()}-{os.getpid()}"
+        self.group = settings.WORK_QUEUE_GROUP
+        self.limits = {kind: settings.WORK_QUEUE_CONCURRENCY[kind] for kind in self.kinds}
+        self.max_attempts = settings.WORK_QUEUE_MAX_ATTEMPTS
+        self.retry_backoff = settings.WORK_QUEUE_RETRY_BACKOFF
+        self.claim_idle_ms = settings.WORK_QUEUE_CLAIM_IDLE_MS
+        self.reply_ttl = settings.WORK_QUEUE_REPLY_TTL
+        self.block_ms = 5000
+        self._inflight = {kind: 0 for kind in self.kinds}
+        self._freed = {kind: asyncio.Event() for kind in self.kinds}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _ensure_group(self, redis, kind: str) -> None:
+        from redis.exceptions import ResponseError
+
+        try:
+            await redis.xgroup_create(stream_key(kind), self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _read(self, redis, kind: str, count: int, block: Optional[int]) -> list:
+        claimed = await redis.xautoclaim(
+            stream_key(kind), self.group, self.consumer, self.claim_idle_ms, start_id="0-0", count=count,
+        )
+        if claimed and claimed[1]:
+            JOBS.inc(kind, "reclaimed", amount=len(claimed[1]))
+            return [entry for entry in claimed[1] if entry[1]]
+        # A blocking read parks its connection: keep it off the main pool
+        reader = RedisClient.get_blocking_instance() if block else redis
+        response = await reader.xreadgroup(
+            self.group, self.consumer, {stream_key(kind): ">"}, count=count, block=block,
+        )
+        return [entry for _, entries in response or [] for entry in entries]
+
+    async def _finish(self, redis, kind: str, entry_id: str, job_id: str, body: dict) -> None:
+        reply_key = f"{REPLY_PREFIX}:{job_id}"
+        pipe = redis.pipeline(transaction=True)
+        pipe.rpush(reply_key, json.dumps(body))
+        pipe.expire(reply_key, self.reply_ttl)
+        pipe.xack(stream_key(kind), self.group, entry_id)
+        pipe.hdel(f"{stream_key(kind)}:attempts", entry_id)
+        await pipe.execute()
+
+    async def _dead_letter(
+        self, redis, kind: str, entry_id: str, fields: dict, error: str, usage: Optional[list] = None,
+    ) -> None:
+        await redis.xadd(
+            f"{settings.WORK_QUEUE_PREFIX}:dead",
+            {"kind": kind, "entry": entry_id, "error": error[:500], **fields},
+            maxlen=settings.WORK_QUEUE_MAXLEN, approximate=True,
+        )
+        await self._finish(redis, kind, entry_id, fields["id"], {"ok": False, "error": error, "usage": usage or []})
+        JOBS.inc(kind, "dead_lettered")
+
+    async def handle(self, kind: str, entry_id: str, fields: dict) -> None:
+        redis = RedisClient.get_instance()
+        remaining = int(fields["d"]) / 1000 - time.time()
+        if remaining <= 0:
+            # The caller has already fallen back; running the job would be wasted work
+            await redis.xack(stream_key(kind), self.group, entry_id)
+            JOBS.inc(kind, "expired")
+            return
+
+        # Token spend is attributed to the caller and shipped back with the reply
+        usage_tracker.bind(fields.get("s") or "unknown", fields.get("k"))
+        with usage_tracker.capture() as usage:
+            while True:
+                # Counted in Redis so a job reclaimed from a crashed worker keeps its tally
+                attempts = await redis.hincrby(f"{stream_key(kind)}:attempts", entry_id, 1)
+                if attempts > self.max_attempts:
+                    await self._dead_letter(redis, kind, entry_id, fields, "max attempts exceeded", usage)
+                    return
+
+                try:
+                    result = await asyncio.wait_for(JOB_HANDLERS[kind](json.loads(fields["p"])), timeout=remaining)
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Worker error ({kind} {entry_id}, attempt {attempts}): {e!r}")
+                    JOBS.inc(kind, "errored")
+                    error = repr(e)
+
+                if attempts >= self.max_attempts:
+                    await self._dead_letter(redis, kind, entry_id, fields, error, usage)
+                    return
+                remaining = int(fields["d"]) / 1000 - time.time() - self.retry_backoff
+                if remaining <= 0:
+                    # No retry can finish in time: let the caller fall back now, not at its timeout
+                    await self._finish(redis, kind, entry_id, fields["id"], {"ok": False, "error": error, "usage": usage})
+                    JOBS.inc(kind, "failed_fast")
+                    return
+                await asyncio.sleep(self.retry_backoff)
+                JOBS.inc(kind, "retried")
+
+        await self._finish(redis, kind, entry_id, fields["id"], {"ok": True, "result": result, "usage": usage})
+        JOBS.inc(kind, "processed")
+
+    def _release(self, kind: str, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._inflight[kind] -= 1
+        self._freed[kind].set()
+
+    async def poll_once(self, kind: str, block: Optional[int] = None) -> int:
+        """Start as many jobs as the kind has free slots; returns the number started."""
+        redis = RedisClient.get_instance()
+        free = self.limits[kind] - self._inflight[kind]
+        if free <= 0:
+            return 0
+        entries = await self._read(redis, kind, free, block)
+        for entry_id, fields in entries:
+            self._inflight[kind] += 1
+            task = asyncio.create_task(self.handle(kind, entry_id, fields))
+            self._tasks.add(task)
+            task.add_done_callback(lambda done, kind=kind: self._release(kind, done))
+        return len(entries)
+
+    async def _consume(self, kind: str) -> None:
+        await self._ensure_group(RedisClient.get_instance(), kind)
+        while True:
+            if self._inflight[kind] >= self.limits[kind]:
+                self._freed[kind].clear()
+                await self._freed[kind].wait()
+                continue
+            try:
+                await self.poll_once(kind, block=self.block_ms)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Worker read error ({kind}): {e}")
+                await asyncio.sleep(1.0)
+
+    async def drain(self) -> None:
+        """Wait for the jobs already started."""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    async def run(self) -> None:
+        consumers = [asyncio.create_task(self._consume(kind)) for kind in self.kinds]
+        try:
+            await asyncio.gather(*consumers)
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            await self.drain()
+
+
+# Singleton instance
+work_queue = WorkQueue()
@@ -0,0 +1,43 @@
+"""
+Project AXON — Queue Worker
+Entry point for the upstream-heavy tier: consumes Pulse, nudge and prefetch
+jobs that the API queues when WORK_QUEUE_MODE=queue (see work_queue.py).
+Per-kind concurrency comes from WORK_QUEUE_CONCURRENCY.
+
+Usage:
+    python -m backend.worker [--kinds pulse nudge prefetch]
+"""
+
+import argparse
+import asyncio
+
+from backend.config import settings
+from backend.popularity import popularity_sync
+from backend.work_queue import JOB_HANDLERS, Worker
+
+
+async def serve(worker: Worker) -> None:
+    # SERP lookups happen here in queue mode; share their counts with the API's cache warmer
+    popularity_sync.start()
+    try:
+        await worker.run()
+    finally:
+        await popularity_sync.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kinds", nargs="+", choices=list(JOB_HANDLERS), default=list(JOB_HANDLERS))
+    args = parser.parse_args()
+
+    settings.validate()
+    worker = Worker(kinds=args.kinds)
+    print(f"AXON worker {worker.consumer} consuming {', '.join(args.kinds)}")
+    try:
+        asyncio.run(serve(worker))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: semantic ad index at 100k and 1M ads.
+
+Measures matrix write + memory-map time, single and batched cosine top-k
+latency, and incremental insert cost.
+
+Usage:
+    python benchmarks/bench_semantic_index.py [--sizes 100000 1000000] [--k 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.semantic_index import _View, SemanticIndex, HashingEmbedder
+
+QUERIES = [
+    "derivatives of trig functions",
+    "gaming laptop rtx",
+    "leaky delta faucet handle",
+    "running shoes for beginners",
+]
+
+
+def _timeit(fn, repeat: int) -> float:
+    """Median wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def bench(size: int, k: int, dim: int) -> None:
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SemanticIndex(os.path.join(tmp, "bench.npy"), HashingEmbedder(dim))
+        index.min_similarity = -1.0
+
+        # Synthetic unit vectors stand in for embedded catalog text
+        matrix = rng.standard_normal((size, dim), dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+        index._view = _View([f"ad-{i}" for i in range(size)], matrix)
+
+        start = time.perf_counter()
+        index.save()
+        write_ms = (time.perf_counter() - start) * 1000
+        del matrix
+
+        reopened = SemanticIndex(index.path, HashingEmbedder(dim))
+        start = time.perf_counter()
+        reopened.open()
+        open_ms = (time.perf_counter() - start) * 1000
+
+        index.search(QUERIES[0], k)  # Fault pages in once
+        single_ms = _timeit(lambda: index.search(QUERIES[0], k), repeat=20)
+        batch = QUERIES * 8
+        batch_ms = _timeit(lambda: index.search_batch(batch, k), repeat=10)
+
+        new_ids = [f"new-{i}" for i in range(1000)]
+        new_texts = [f"{QUERIES[i % len(QUERIES)]} variant {i}" for i in range(1000)]
+        index.compact_threshold = 10 ** 9
+        insert_ms = _timeit(lambda: index.add(new_ids, new_texts), repeat=1)
+        pending_ms = _timeit(lambda: index.search(QUERIES[1], k), repeat=20)
+
+        print(
+            f"{size:>9,} ads | matrix {size * dim * 4 / 2**20:7.1f} MiB | write {write_ms:8.1f} ms | "
+            f"mmap open {open_ms:6.2f} ms | top-{k} {single_ms:7.2f} ms | "
+            f"batch x{len(batch)} {batch_ms:8.2f} ms ({batch_ms / len(batch):6.2f} ms/q) | "
+            f"insert 1k {insert_ms:7.1f} ms | top-{k} w/ pending {pending_ms:7.2f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=HashingEmbedder().dim)
+    args = parser.parse_args()
+
+    print(f"Semantic index benchmark (dim={args.dim})")
+    for size in args.sizes:
+        bench(size, args.k, args.dim)
+
+
+if __name__ == "__main__":
+    main()
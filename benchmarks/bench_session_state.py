@@ -0,0 +1,99 @@
+"""
+Benchmark: conversation session memory and serialization.
+
+Compares the array-backed MessageLog against one pydantic Message per
+message (memory per session via tracemalloc), and the msgpack session codec
+against pydantic JSON dump/validate of the equivalent legacy model.
+
+Usage:
+    python benchmarks/bench_session_state.py [--messages 100 1000 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from pydantic import BaseModel
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import Message
+from backend.session_state import ConversationState, decode_session, encode_session
+
+
+class LegacySession(BaseModel):
+    """The previous pydantic-per-message session shape."""
+    session_id: str
+    messages: list[Message] = []
+
+
+def _timeit(fn, repeat: int) -> float:
+    """Median wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples))
+
+
+def _allocated(build) -> tuple[object, int]:
+    tracemalloc.start()
+    obj = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def _text(i: int) -> str:
+    return f"Turn {i}: how do I integrate x^{i % 7} sin(x) dx by parts?"
+
+
+def bench(count: int) -> None:
+    def build_legacy():
+        session = LegacySession(session_id="bench")
+        for i in range(count):
+            session.messages.append(Message(role="user" if i % 2 == 0 else "assistant", content=_text(i)))
+        return session
+
+    def build_compact():
+        session = ConversationState(session_id="bench")
+        for i in range(count):
+            session.add_message("user" if i % 2 == 0 else "assistant", _text(i))
+        return session
+
+    legacy, legacy_bytes = _allocated(build_legacy)
+    compact, compact_bytes = _allocated(build_compact)
+
+    repeat = 5 if count >= 10_000 else 20
+    payload = encode_session(compact)
+    json_payload = legacy.model_dump_json()
+    encode_ms = _timeit(lambda: encode_session(compact), repeat)
+    decode_ms = _timeit(lambda: decode_session(payload), repeat)
+    json_encode_ms = _timeit(legacy.model_dump_json, repeat)
+    json_decode_ms = _timeit(lambda: LegacySession.model_validate_json(json_payload), repeat)
+
+    print(
+        f"{count:>7,} msgs | memory pydantic {legacy_bytes / 1024:9.1f} KiB vs log {compact_bytes / 1024:9.1f} KiB "
+        f"({legacy_bytes / max(compact_bytes, 1):4.1f}x) | "
+        f"msgpack {len(payload) / 1024:8.1f} KiB enc {encode_ms:7.2f} ms dec {decode_ms:7.2f} ms | "
+        f"json {len(json_payload) / 1024:8.1f} KiB enc {json_encode_ms:7.2f} ms dec {json_decode_ms:7.2f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1_000, 10_000])
+    args = parser.parse_args()
+
+    print("Session state benchmark")
+    for count in args.messages:
+        bench(count)
+
+
+if __name__ == "__main__":
+    main()
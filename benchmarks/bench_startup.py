@@ -0,0 +1,84 @@
+"""
+Benchmark: cold import time of backend.main, checked against a budget.
+
+Each run imports backend.main in a fresh interpreter and times it. The
+heaviest top-level imports of the last run are listed, then the warm-up
+hook is timed once in-process (without connecting to Redis). Exits 1 when
+the median import time exceeds the budget (IMPORT_TIME_BUDGET_MS).
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--budget-ms 900] [--top 10]
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("GOOGLE_API_KEY", "bench")  # settings.validate() runs in warm_up()
+
+from backend.config import settings
+
+PROBE = "import time; t = time.perf_counter(); import backend.main; print((time.perf_counter() - t) * 1000)"
+
+
+def _import_ms() -> tuple[float, str]:
+    """One cold import; returns (milliseconds, -X importtime report)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return float(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def _heaviest(report: str, top: int) -> list[tuple[str, float]]:
+    """Top-level imports (as seen from backend.main) by cumulative time."""
+    rows = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        if name.startswith("   ") and not name.startswith("    "):  # Depth 1 below backend.main
+            rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=settings.IMPORT_TIME_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    samples, report = [], ""
+    for _ in range(args.runs):
+        elapsed, report = _import_ms()
+        samples.append(elapsed)
+    median = float(np.median(samples))
+
+    print(f"import backend.main: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(samples):.0f}, max {max(samples):.0f}) | budget {args.budget_ms:.0f} ms")
+    for name, ms in _heaviest(report, args.top):
+        print(f"  {ms:8.1f} ms  {name}")
+
+    from backend.warmup import warm_up
+    start = time.perf_counter()
+    asyncio.run(warm_up(connect=False))
+    print(f"warm_up(): {(time.perf_counter() - start) * 1000:.0f} ms (paid at startup, not at import)")
+
+    if median > args.budget_ms:
+        print(f"❌ Import time over budget by {median - args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print("✅ Import time within budget")
+
+
+if __name__ == "__main__":
+    main()
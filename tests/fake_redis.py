@@ -0,0 +1,312 @@
+"""
+Minimal in-memory stand-in for redis.asyncio used by the unit tests.
+Implements only the commands AXON uses; TTLs are recorded but not enforced.
+"""
+
+import asyncio
+import time
+
+from redis.exceptions import ResponseError
+
+
+class FakeStream:
+    def __init__(self):
+        self.entries = []  # [(id, fields)]
+        self.seq = 0
+        self.groups = {}  # name -> {"last": id, "pending": {id: [consumer, delivered_ms, count]}}
+
+
+def _stream_id(entry_id):
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._calls = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        results = []
+        for name, args, kwargs in self._calls:
+            results.append(await getattr(self._redis, name)(*args, **kwargs))
+        self._calls = []
+        return results
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.published = []
+
+    def __await__(self):
+        async def _self():
+            return self
+        return _self().__await__()
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+    async def ping(self):
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        if ex:
+            self.ttls[key] = ex
+        return True
+
+    async def getset(self, key, value):
+        previous = self.data.get(key)
+        self.data[key] = str(value)
+        return previous
+
+    async def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            removed += self.data.pop(key, None) is not None
+        return removed
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+    async def expire(self, key, seconds):
+        self.ttls[key] = seconds
+        return key in self.data
+
+    async def incr(self, key, amount=1):
+        self.data[key] = str(int(self.data.get(key, 0)) + amount)
+        return int(self.data[key])
+
+    async def incrbyfloat(self, key, amount):
+        self.data[key] = str(float(self.data.get(key, 0)) + amount)
+        return float(self.data[key])
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 0
+
+    async def rpush(self, key, *values):
+        bucket = self.data.setdefault(key, [])
+        bucket.extend(str(v) for v in values)
+        return len(bucket)
+
+    async def blpop(self, keys, timeout=0):
+        deadline = time.monotonic() + timeout
+        while True:
+            for key in keys:
+                if self.data.get(key):
+                    return [key, self.data[key].pop(0)]
+            if timeout and time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.005)
+
+    async def lrange(self, key, start, end):
+        bucket = self.data.get(key, [])
+        return bucket[start:] if end == -1 else bucket[start:end + 1]
+
+    async def sadd(self, key, *members):
+        bucket = self.data.setdefault(key, set())
+        before = len(bucket)
+        bucket.update(str(m) for m in members)
+        return len(bucket) - before
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def scard(self, key):
+        return len(self.data.get(key, set()))
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        bucket = self.data.setdefault(key, {})
+        if mapping:
+            bucket.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            bucket[field] = str(value)
+        return 1
+
+    async def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    async def hmget(self, key, fields):
+        bucket = self.data.get(key, {})
+        return [bucket.get(field) for field in fields]
+
+    async def hkeys(self, key):
+        return list(self.data.get(key, {}))
+
+    async def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    async def hdel(self, key, *fields):
+        bucket = self.data.get(key, {})
+        return sum(bucket.pop(field, None) is not None for field in fields)
+
+    async def hincrby(self, key, field, amount=1):
+        bucket = self.data.setdefault(key, {})
+        bucket[field] = str(int(bucket.get(field, 0)) + amount)
+        return int(bucket[field])
+
+    async def hincrbyfloat(self, key, field, amount):
+        bucket = self.data.setdefault(key, {})
+        bucket[field] = str(float(bucket.get(field, 0)) + amount)
+        return float(bucket[field])
+
+    async def zadd(self, key, mapping):
+        bucket = self.data.setdefault(key, {})
+        added = sum(1 for member in mapping if member not in bucket)
+        bucket.update({str(m): float(s) for m, s in mapping.items()})
+        return added
+
+    async def zremrangebyscore(self, key, low, high):
+        bucket = self.data.get(key, {})
+        low, high = float(low), float(high)
+        doomed = [m for m, s in bucket.items() if low <= s <= high]
+        for member in doomed:
+            del bucket[member]
+        return len(doomed)
+
+    async def zincrby(self, key, amount, member):
+        bucket = self.data.setdefault(key, {})
+        bucket[str(member)] = bucket.get(str(member), 0.0) + float(amount)
+        return bucket[str(member)]
+
+    async def zunionstore(self, dest, keys):
+        weights = keys if isinstance(keys, dict) else {key: 1.0 for key in keys}
+        merged = {}
+        for key, weight in weights.items():
+            for member, score in self.data.get(key, {}).items():
+                merged[member] = merged.get(member, 0.0) + score * weight
+        self.data[dest] = merged
+        return len(merged)
+
+    async def zrange(self, key, start, stop):
+        ordered = [m for m, _ in sorted(self.data.get(key, {}).items(), key=lambda pair: pair[1])]
+        return ordered[start:] if stop == -1 else ordered[start:stop + 1]
+
+    async def zrevrange(self, key, start, stop, withscores=False):
+        ordered = sorted(self.data.get(key, {}).items(), key=lambda pair: pair[1], reverse=True)
+        ordered = ordered[start:] if stop == -1 else ordered[start:stop + 1]
+        return ordered if withscores else [m for m, _ in ordered]
+
+    async def zrem(self, key, *members):
+        bucket = self.data.get(key, {})
+        removed = [m for m in members if bucket.pop(str(m), None) is not None]
+        return len(removed)
+
+    async def zremrangebyrank(self, key, start, stop):
+        bucket = self.data.get(key, {})
+        ordered = [m for m, _ in sorted(bucket.items(), key=lambda pair: pair[1])]
+        stop = stop + len(ordered) if stop < 0 else stop
+        doomed = ordered[start:stop + 1]
+        for member in doomed:
+            del bucket[member]
+        return len(doomed)
+
+    async def zrangebyscore(self, key, low, high):
+        bucket = self.data.get(key, {})
+        low, high = float(low), float(high)
+        return [m for m, s in sorted(bucket.items(), key=lambda pair: pair[1]) if low <= s <= high]
+
+    async def ttl(self, key):
+        if key not in self.data:
+            return -2
+        return self.ttls.get(key, -1)
+
+    # Streams (single-node semantics; MAXLEN trims exactly)
+
+    def _stream(self, key, create=False):
+        stream = self.data.get(key)
+        if stream is None and create:
+            stream = self.data[key] = FakeStream()
+        return stream
+
+    async def xadd(self, name, fields, id="*", maxlen=None, approximate=True):
+        stream = self._stream(name, create=True)
+        stream.seq += 1
+        entry_id = f"{int(time.time() * 1000)}-{stream.seq}"
+        stream.entries.append((entry_id, {str(k): str(v) for k, v in fields.items()}))
+        if maxlen is not None and len(stream.entries) > maxlen:
+            del stream.entries[:len(stream.entries) - maxlen]
+        return entry_id
+
+    async def xlen(self, name):
+        stream = self._stream(name)
+        return len(stream.entries) if stream else 0
+
+    async def xrevrange(self, name, max="+", min="-", count=None):
+        stream = self._stream(name)
+        entries = list(reversed(stream.entries)) if stream else []
+        return entries[:count] if count else entries
+
+    async def xgroup_create(self, name, groupname, id="$", mkstream=False):
+        stream = self._stream(name, create=mkstream)
+        if stream is None:
+            raise ResponseError("ERR The XGROUP subcommand requires the key to exist")
+        if groupname in stream.groups:
+            raise ResponseError("BUSYGROUP Consumer Group name already exists")
+        last = stream.entries[-1][0] if id == "$" and stream.entries else "0-0"
+        stream.groups[groupname] = {"last": last, "pending": {}}
+        return True
+
+    async def xreadgroup(self, groupname, consumername, streams, count=None, block=None, noack=False):
+        response = []
+        for name, start in streams.items():
+            group = self._stream(name).groups[groupname]
+            entries = [
+                (entry_id, fields) for entry_id, fields in self._stream(name).entries
+                if _stream_id(entry_id) > _stream_id(group["last"])
+            ][:count]
+            if not entries:
+                continue
+            group["last"] = entries[-1][0]
+            now = int(time.time() * 1000)
+            for entry_id, _ in entries:
+                group["pending"][entry_id] = [consumername, now, 1]
+            response.append([name, entries])
+        return response
+
+    async def xack(self, name, groupname, *ids):
+        pending = self._stream(name).groups[groupname]["pending"]
+        return sum(pending.pop(entry_id, None) is not None for entry_id in ids)
+
+    async def xautoclaim(self, name, groupname, consumername, min_idle_time, start_id="0-0", count=None, justid=False):
+        stream = self._stream(name)
+        pending = stream.groups[groupname]["pending"]
+        now = int(time.time() * 1000)
+        fields = dict(stream.entries)
+        claimed, deleted = [], []
+        for entry_id, state in sorted(pending.items(), key=lambda item: _stream_id(item[0])):
+            if now - state[1] < min_idle_time or (count and len(claimed) >= count):
+                continue
+            if entry_id not in fields:  # Trimmed away while pending
+                del pending[entry_id]
+                deleted.append(entry_id)
+                continue
+            pending[entry_id] = [consumername, now, state[2] + 1]
+            claimed.append((entry_id, fields[entry_id]))
+        return ["0-0", claimed, deleted]
+
+    async def xinfo_groups(self, name):
+        stream = self._stream(name)
+        return [
+            {
+                "name": groupname,
+                "pending": len(group["pending"]),
+                "last-delivered-id": group["last"],
+                "lag": sum(_stream_id(e) > _stream_id(group["last"]) for e, _ in stream.entries),
+            }
+            for groupname, group in stream.groups.items()
+        ]
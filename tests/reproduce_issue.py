@@ -8,7 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from backend.pulse_monitor import pulse_monitor
 from backend.axon_registry import axon_registry
 from backend.synthesizer import synthesizer
-from backend.models import Message, ConversationState
+from backend.models import Message
+from backend.session_state import ConversationState
 from backend.config import settings
 
 async def reproduce():
@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.data.store import KeyStore
+from backend.redis_client import RedisClient
+from tests.fake_redis import FakeRedis
+
+
+def test_api_keys():
+    print("🔑 Testing API Key Resolution...\n")
+    redis = RedisClient._instance = FakeRedis()
+
+    async def scenario():
+        store = KeyStore()
+        key = await store.create_key("dashboard")
+        assert await store.resolve_key_id(key.key) == key.id
+        assert await store.resolve_key_id("sk_live_unknown") is None
+
+        # Revoking removes the token from the reverse index and this instance's cache
+        assert await store.revoke_key(key.id)
+        assert await store.resolve_key_id(key.key) is None
+        print("✅ Revoked keys stop resolving: PASSED")
+
+        # Another instance's cached entry expires after API_KEY_CACHE_TTL
+        other = KeyStore()
+        second = await other.create_key("mobile")
+        assert await other.resolve_key_id(second.key) == second.id
+        await store.revoke_key(second.id)
+        assert await other.resolve_key_id(second.key) == second.id  # Still cached
+        _, key_id = other._token_cache[second.key]
+        other._token_cache[second.key] = (0.0, key_id)
+        assert await other.resolve_key_id(second.key) is None
+        print("✅ Token cache TTL: PASSED")
+
+        # Keys created before the reverse index existed are backfilled; revoked ones are not
+        legacy = {"id": "legacy01", "name": "legacy", "key": "sk_live_legacy", "created_at": "2025-01-01T00:00:00Z",
+                  "status": "active", "usage_month": 0, "usage_limit": 100000}
+        await redis.hset("apikey:legacy01", mapping=legacy)
+        await redis.sadd("apikeys:index", "legacy01")
+        assert await store.resolve_key_id("sk_live_legacy") is None
+        assert await store.backfill_token_index() == 1
+        assert await store.resolve_key_id("sk_live_legacy") == "legacy01"
+        assert await store.resolve_key_id(key.key) is None
+        assert await store.backfill_token_index() == 0
+        print("✅ Reverse index backfill: PASSED")
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_api_keys()
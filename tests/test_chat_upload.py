@@ -0,0 +1,88 @@
+import io
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from backend import main
+from backend.config import settings
+from backend.models import IntentAnalysis, IntentBucket, StruggleState
+from backend.redis_client import RedisClient
+from tests.fake_redis import FakeRedis
+
+
+def _png(size: int = 32) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), "blue").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_chat_upload():
+    print("📎 Testing Multipart Chat Upload...\n")
+    RedisClient._instance = FakeRedis()
+    client = TestClient(main.app)
+    seen = {}
+
+    async def fake_analyze(session, image=None):
+        seen["image"] = image
+        return IntentAnalysis(
+            intent_bucket=IntentBucket.EDUCATIONAL, struggle_state=StruggleState.NONE,
+            propensity_score=5, detected_entities=["diagram"],
+        )
+
+    async def fake_generate(user_message, conversation_context=None, nudge=None, cacheable=True, **kwargs):
+        seen["cacheable"] = cacheable
+        return "That is a blue square."
+
+    analyze, generate, max_bytes = main.work_queue.analyze, main.synthesizer.generate_response, settings.MAX_IMAGE_BYTES
+    main.work_queue.analyze, main.synthesizer.generate_response = fake_analyze, fake_generate
+    try:
+        # An image turn reaches Pulse as decoded raw bytes and skips the response cache
+        png = _png()
+        response = client.post(
+            "/chat/upload",
+            data={"message": "What is this?", "session_id": "upload-1"},
+            files={"image": ("square.png", png, "image/png")},
+        )
+        assert response.status_code == 200, response.text
+        assert response.json()["response"] == "That is a blue square."
+        assert seen["image"].data == png and seen["image"].mime_type == "image/png"
+        assert seen["cacheable"] is False
+        assert main.sessions["upload-1"].messages[0].content == "What is this? [User uploaded an image]"
+        print("✅ Multipart image turn: PASSED")
+
+        # Oversized: refused from Content-Length before parsing, and by the endpoint's own check
+        settings.MAX_IMAGE_BYTES = 1024
+        for size in (settings.UPLOAD_FORM_OVERHEAD * 2, 2048):
+            response = client.post(
+                "/chat/upload",
+                data={"message": "big"},
+                files={"image": ("big.bin", b"\xff" * size, "image/jpeg")},
+            )
+            assert response.status_code == 413, response.text
+        settings.MAX_IMAGE_BYTES = max_bytes
+        print("✅ Oversized upload rejected (413): PASSED")
+
+        # Undecodable bytes never reach the model
+        seen.clear()
+        response = client.post(
+            "/chat/upload",
+            data={"message": "broken", "session_id": "upload-2"},
+            files={"image": ("broken.jpg", _png()[:20], "image/jpeg")},
+        )
+        assert response.status_code == 415, response.text
+        assert "image" not in seen
+        print("✅ Bad image rejected (415): PASSED")
+    finally:
+        main.work_queue.analyze, main.synthesizer.generate_response = analyze, generate
+        settings.MAX_IMAGE_BYTES = max_bytes
+        for session_id in ("upload-1", "upload-2"):
+            main.sessions.pop(session_id, None)
+
+
+if __name__ == "__main__":
+    test_chat_upload()
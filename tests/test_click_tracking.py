@@ -0,0 +1,96 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from backend import main
+from backend.click_tracker import ClickTracker
+from backend.config import settings
+from backend.models import Nudge, RevenueEvent
+from backend.redis_client import RedisClient
+from backend.revenue_stream import RevenueAggregator, StreamConsumer, revenue_stream
+from tests.fake_redis import FakeRedis
+
+
+def test_click_tracking():
+    print("🖱️ Testing Click Tracking Redirects...\n")
+    redis = RedisClient._instance = FakeRedis()
+    tracker = ClickTracker(key=b"test-secret")
+
+    link = "https://shop.example.com/p?id=42&ref=axon"
+    nudge = Nudge(
+        product_name="Calculus Workbook", vendor_name="Example Shop", relevance_score=0.8,
+        nudge_text=f"You might also find this useful, [**Calculus Workbook**]({link}) from Example Shop",
+        link=link,
+    )
+    tracked = tracker.track(nudge, "session-1", "educational")
+    assert tracked.impression_id and tracked.link == link
+    assert tracked.tracking_link in tracked.nudge_text and link not in tracked.nudge_text
+    token = tracked.tracking_link.rsplit("/r/", 1)[1]
+    print(f"   token: {len(token)} chars")
+
+    click = tracker.verify(token)
+    assert click.url == link and click.session_id == "session-1" and click.intent_bucket == "educational"
+    assert tracker.verify(token[:-2] + ("A" if token[-2] != "A" else "B") + token[-1]) is None
+    assert tracker.verify("not-a-token") is None
+    assert ClickTracker(key=b"other-secret").verify(token) is None
+    print("✅ Signed tokens: PASSED")
+
+    # Without CLICK_SIGNING_KEY every process derives the same key from the shared Gemini key
+    signing_key, google_key = settings.CLICK_SIGNING_KEY, settings.GOOGLE_API_KEY
+    settings.CLICK_SIGNING_KEY, settings.GOOGLE_API_KEY = "", "shared-gemini-key"
+    try:
+        shared = ClickTracker().track(nudge, "session-3").tracking_link.rsplit("/r/", 1)[1]
+        assert ClickTracker().verify(shared) is not None
+    finally:
+        settings.CLICK_SIGNING_KEY, settings.GOOGLE_API_KEY = signing_key, google_key
+    print("✅ Stable derived signing key: PASSED")
+
+    # An unverifiable token still redirects (untracked); junk and non-http links are 404s
+    foreign = ClickTracker(key=b"rotated-secret").issue("imp-x", "session-4", link)
+    unsafe = ClickTracker(key=b"rotated-secret").issue("imp-y", "session-4", "javascript:alert(1)")
+    client = TestClient(main.app)
+    response = client.get(f"/r/{foreign}", follow_redirects=False)
+    assert response.status_code == 302 and response.headers["location"] == link
+    assert client.get(f"/r/{unsafe}", follow_redirects=False).status_code == 404
+    assert client.get("/r/not-a-token", follow_redirects=False).status_code == 404
+    print("✅ Unverified tokens fall back to a plain redirect: PASSED")
+
+    async def scenario():
+        tracker.batch = 2
+        # Impression, then a burst of three clicks on it plus one click elsewhere
+        await revenue_stream.publish(RevenueEvent(
+            amount=2.5, source="nudge_impression", intent_bucket="educational",
+            session_id="session-1", impression_id=tracked.impression_id,
+        ))
+        for _ in range(3):
+            tracker.record(tracker.verify(token))
+        other = tracker.track(nudge, "session-2", "commercial")
+        tracker.record(tracker.verify(other.tracking_link.rsplit("/r/", 1)[1]))
+        assert await redis.xlen(revenue_stream.key) == 1  # Nothing written on the redirect path
+
+        written = 0
+        while True:
+            flushed_before = len(tracker._buffer)
+            written += await tracker.flush()
+            if not tracker._buffer or len(tracker._buffer) == flushed_before:
+                break
+        assert written == 2  # Repeat clicks on one impression count once
+        print("✅ Buffered, deduped click writes: PASSED")
+
+        consumer = StreamConsumer(revenue_stream, "ctr-test", RevenueAggregator().apply, consumer="t")
+        await consumer.poll_once()
+        ctr = await RevenueAggregator().click_through()
+        assert ctr["impressions"] == 1 and ctr["clicks"] == 2
+        assert ctr["by_intent"] == {"educational": 1.0}
+        print("✅ CTR joined to impressions: PASSED")
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_click_tracking()
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+# Add project root to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from backend.config import Settings
+from backend.gemini_client import GeminiClient
+from backend.redis_client import RedisClient
+from backend.warmup import warm_up
+from tests.fake_redis import FakeRedis
+
+PROBE = """
+import sys
+import backend.main
+heavy = [name for name in ("google.genai", "httpx", "redis") if name in sys.modules]
+print(",".join(heavy) or "none")
+"""
+
+
+def test_cold_start(monkeypatch):
+    print("🧊 Testing Cold Start...\n")
+
+    # Importing the app needs no API key and pulls in none of the heavy SDKs
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    assert proc.returncode == 0, proc.stderr
+    assert proc.stdout.strip().splitlines()[-1] == "none", proc.stdout
+    print("✅ Deferred SDK imports: PASSED")
+
+    # Clients are built on first use
+    client = GeminiClient()
+    assert client._client is None
+    monkeypatch.setattr(Settings, "GOOGLE_API_KEY", Settings.GOOGLE_API_KEY or "test")
+    redis = RedisClient._instance
+    RedisClient._instance = FakeRedis()
+    try:
+        timings = asyncio.run(warm_up())
+    finally:
+        RedisClient._instance = redis
+    assert {"settings", "gemini", "redis"} <= set(timings)
+    print("✅ Warm-up hook: PASSED")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_cold_start(monkeypatch)
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.compaction import Compactor
+from backend.session_state import ConversationState
+from backend.redis_client import RedisClient
+from backend import compaction as compaction_module
+from tests.fake_redis import FakeRedis
+
+
+def test_compaction():
+    print("🗜️ Testing Conversation Compaction...\n")
+    redis = RedisClient._instance = FakeRedis()
+    prompts = []
+
+    async def fake_generate(prompt, **kwargs):
+        prompts.append(prompt)
+        await asyncio.sleep(0.01)
+        return f"Summary #{len(prompts)}: user asked calculus questions."
+
+    original = compaction_module.gemini.generate
+    compaction_module.gemini.generate = fake_generate
+
+    async def scenario():
+        compactor = Compactor()
+        compactor.trigger, compactor.keep_recent, compactor.idle_delay = 10, 4, 0.01
+
+        session = ConversationState(session_id="long")
+        for i in range(6):
+            session.add_message("user", f"calculus question {i}")
+            session.add_message("assistant", f"answer {i}")
+        window_before = session.transcript.window("synthesis")
+
+        # A chat request in flight holds the job back
+        async with compactor.request():
+            assert compactor.schedule(session)
+            assert not compactor.schedule(session)  # deduplicated
+            await asyncio.sleep(0.05)
+            assert not prompts
+            session.add_message("user", "calculus question 6")  # appended while queued
+
+        await asyncio.sleep(0.1)
+        assert len(prompts) == 1
+        assert len(session.messages) == 4 and session.compacted_messages == 9
+        assert session.messages[-1].content == "calculus question 6"
+        assert len(redis.data["archive:long"]) == 9
+
+        window = session.transcript.window("synthesis")
+        assert window != window_before
+        assert window.startswith("EARLIER CONVERSATION (summary): Summary #1")
+        print("✅ Idle-time compaction + archive: PASSED")
+
+        # The next pass folds the previous summary forward
+        for i in range(7, 12):
+            session.add_message("user", f"calculus question {i}")
+        assert await compactor.compact(session)
+        assert "Summary #1" in prompts[1] and session.summary.startswith("Summary #2")
+        print("✅ Rolling summary: PASSED")
+        await compactor.stop()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        compaction_module.gemini.generate = original
+        RedisClient._instance = None
+
+
+if __name__ == "__main__":
+    test_compaction()
@@ -0,0 +1,52 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.context_window import ContextPolicy, TranscriptBuffer, estimate_tokens, truncate
+from backend.session_state import ConversationState
+
+
+def test_context_window():
+    print("🪟 Testing Token-Budgeted Context Windows...\n")
+
+    assert truncate("short", 10) == "short"
+    long_question = "background " * 100 + "so what is the derivative of x^2?"
+    cut = truncate(long_question, 40, mode="middle")
+    assert estimate_tokens(cut) <= 41 and cut.endswith("derivative of x^2?")
+    assert truncate("a" * 400, 10).endswith("…") and len(truncate("a" * 400, 10)) == 40
+
+    session = ConversationState(session_id="ctx")
+    for i in range(30):
+        session.add_message("user", f"question {i} " + "x" * 300)
+        session.add_message("assistant", f"answer {i} " + "y" * 1200)
+
+    policy = ContextPolicy("test", budget=500, max_message_tokens=100, assistant_tokens=50, truncate="tail")
+    window = session.transcript.window(policy)
+    lines = window.split("\n")
+    assert sum(estimate_tokens(line) for line in lines) <= 500
+    assert lines[-1].startswith("ASSISTANT: answer 29")
+    assert all(len(line) <= 100 * 4 + len("ASSISTANT: ") for line in lines)
+    print("✅ Budget + per-role caps: PASSED")
+
+    # Windows are cached until the transcript changes; new messages are appended incrementally
+    assert session.transcript.window(policy) is window
+    session.add_message("user", "what about integrals?")
+    updated = session.transcript.window(policy)
+    assert updated.endswith("USER: what about integrals?")
+    assert len(session.transcript) == len(session.messages)
+
+    pulse = session.transcript.window("pulse")
+    assert pulse.startswith("[1] ") and pulse.count("\n") < 20
+    print("✅ Incremental buffer + cached windows: PASSED")
+
+    # A rewritten history (e.g. compaction) resets the buffer
+    session.messages = session.messages[-2:]
+    assert len(session.transcript) == 2
+    assert TranscriptBuffer(session.messages).window(policy) == session.transcript.window(policy)
+    print("✅ Resync after rewrite: PASSED")
+
+
+if __name__ == "__main__":
+    test_context_window()
@@ -0,0 +1,43 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import settings
+from backend.frequency_cap import frequency_capper
+from backend.redis_client import RedisClient
+from tests.fake_redis import FakeRedis
+
+
+def test_frequency_cap():
+    print("🔁 Testing Nudge Frequency Capping...\n")
+    RedisClient._instance = FakeRedis()
+
+    async def scenario():
+        state = await frequency_capper.load("s1", "u1")
+        assert state.allows("Calculus Done Right", "Brilliant.org")
+        assert state.query_allowed(["calculus"])
+
+        for _ in range(settings.FREQ_CAP_SESSION_QUERY):
+            await frequency_capper.record("s1", "u1", "Calculus Done Right", "Brilliant.org", ["calculus"])
+
+        state = await frequency_capper.load("s1", "u1")
+        assert not state.allows("Calculus Done Right", "Brilliant.org")
+        assert not state.query_allowed(["Calculus"])
+        assert state.allows("MacBook Air", "Apple Store")
+        print("✅ Session caps: PASSED")
+
+        # A new session for the same user still sees the user-level window
+        other = await frequency_capper.load("s2", "u1")
+        assert other.allows("Calculus Done Right", "Brilliant.org")
+        assert not other.session and sum(other.user.values()) == 3 * settings.FREQ_CAP_SESSION_QUERY
+        print("✅ Per-user window: PASSED")
+
+    asyncio.run(scenario())
+    RedisClient._instance = None
+
+
+if __name__ == "__main__":
+    test_frequency_cap()
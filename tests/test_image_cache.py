@@ -0,0 +1,89 @@
+import asyncio
+import io
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from backend.image_pipeline import IngestedImage, image_pipeline
+from backend.image_cache import multimodal_cache, hamming_distance
+from backend.models import IntentAnalysis, IntentBucket, StruggleState
+from backend.redis_client import RedisClient
+from tests.fake_redis import FakeRedis
+
+
+def _product_photo(quality: int) -> bytes:
+    img = Image.new("RGB", (800, 600), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((100, 100, 500, 400), fill="navy")
+    draw.ellipse((450, 250, 700, 550), fill="orange")
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def test_multimodal_cache():
+    print("🧩 Testing Multimodal Analysis Cache...\n")
+    RedisClient._instance = FakeRedis()
+
+    analysis = IntentAnalysis(
+        intent_bucket=IntentBucket.COMMERCIAL,
+        struggle_state=StruggleState.MODERATE,
+        propensity_score=90,
+        detected_entities=["Delta Faucet"],
+    )
+
+    async def scenario():
+        original = await image_pipeline.ingest(_product_photo(quality=95))
+        recompressed = await image_pipeline.ingest(_product_photo(quality=40))
+        print(f"Hamming distance after re-encode: {hamming_distance(original.phash, recompressed.phash)}")
+        assert original.sha256 != recompressed.sha256
+
+        assert await multimodal_cache.get(original, "What is this?") is None
+        await multimodal_cache.put(original, "What is this?", analysis)
+
+        # Exact hit from the shared store (clear the local LRU first)
+        multimodal_cache._local.clear()
+        hit = await multimodal_cache.get(original, "what is  this?")
+        assert hit is not None and hit.detected_entities == ["Delta Faucet"]
+        print("✅ Exact Hit: PASSED")
+
+        multimodal_cache._local.clear()
+        near = await multimodal_cache.get(recompressed, "What is this?")
+        assert near is not None and near.propensity_score == 90
+        print("✅ Near-Duplicate Hit: PASSED")
+
+        assert await multimodal_cache.get(original, "Where can I buy a new one?") is None
+        print("✅ Different question misses: PASSED")
+
+        # Bands are capped, and members whose entry is gone are pruned on lookup
+        ns = multimodal_cache._namespace("What is this?")
+        band_key = f"mmcache:{ns}:b:{multimodal_cache._bands(original.phash)[0]}"
+        redis = RedisClient._instance
+        cap = multimodal_cache.band_max
+        multimodal_cache.band_max = 2
+        for bit in (62, 61):  # Outside band 0, so every variant shares it
+            variant = IngestedImage(original.data, original.mime_type, original.width, original.height,
+                                    original.original_size, phash=original.phash ^ (1 << bit))
+            variant.sha256 = f"variant{bit}"
+            await multimodal_cache.put(variant, "What is this?", analysis)
+        assert len(await redis.zrangebyscore(band_key, 0, "+inf")) == 2
+        multimodal_cache.band_max = cap
+        print("✅ Band size capped: PASSED")
+
+        for phash in (original.phash, original.phash ^ (1 << 62), original.phash ^ (1 << 61)):
+            await redis.delete(f"mmcache:{ns}:p:{phash:x}")
+        multimodal_cache._local.clear()
+        assert await multimodal_cache.get(recompressed, "What is this?") is None
+        assert await redis.zrangebyscore(band_key, 0, "+inf") == []
+        print("✅ Stale band members pruned: PASSED")
+
+    asyncio.run(scenario())
+    RedisClient._instance = None
+
+
+if __name__ == "__main__":
+    test_multimodal_cache()
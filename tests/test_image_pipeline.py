@@ -0,0 +1,89 @@
+import asyncio
+import base64
+import io
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from backend.image_pipeline import (
+    image_pipeline,
+    sniff_mime_type,
+    ImageTooLargeError,
+    UnsupportedImageError,
+)
+
+
+def _encode(img: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_image_ingestion():
+    print("🖼️ Testing Image Ingestion Pipeline...\n")
+
+    large_png = _encode(Image.linear_gradient("L").resize((3000, 2000)).convert("RGB"), "PNG")
+    assert sniff_mime_type(large_png) == "image/png"
+
+    # Data URL input is downscaled and re-encoded with the real type
+    data_url = "data:image/jpeg;base64," + base64.b64encode(large_png).decode()
+    image = asyncio.run(image_pipeline.ingest(data_url))
+    print(f"{image.original_size} -> {len(image.data)} bytes, {image.width}x{image.height} {image.mime_type}")
+    assert max(image.width, image.height) == image_pipeline.max_dimension
+    assert image.mime_type == "image/jpeg"
+    assert sniff_mime_type(image.data) == "image/jpeg"
+    print("✅ Downscale + MIME detection: PASSED")
+
+    # Small model-compatible images pass through untouched
+    small_webp = _encode(Image.new("RGB", (64, 64), "red"), "WEBP")
+    image = asyncio.run(image_pipeline.ingest(small_webp))
+    assert image.data == small_webp and image.mime_type == "image/webp"
+    print("✅ Pass-through: PASSED")
+
+    # A truncated JPEG is rejected, not forwarded to the model
+    jpeg = _encode(Image.linear_gradient("L").convert("RGB"), "JPEG")
+    try:
+        asyncio.run(image_pipeline.ingest(jpeg[:len(jpeg) // 2]))
+        assert False, "expected UnsupportedImageError"
+    except UnsupportedImageError:
+        print("✅ Truncated JPEG rejected: PASSED")
+
+    # Malformed headers surface from Pillow plugins as ValueError/SyntaxError
+    for error in (SyntaxError("broken PNG file"), ValueError("tile cannot extend outside image")):
+        def fail(raw, mime_type, error=error):
+            raise error
+        image_pipeline._downscale = fail
+        try:
+            asyncio.run(image_pipeline.ingest(small_webp))
+            assert False, "expected UnsupportedImageError"
+        except UnsupportedImageError:
+            pass
+        finally:
+            del image_pipeline._downscale
+    print("✅ Malformed header rejected: PASSED")
+
+    # HEIC without a Pillow decoder is forwarded as-is
+    heic = b"\x00\x00\x00\x18ftypheic" + b"\x00" * 64
+    image = asyncio.run(image_pipeline.ingest(heic))
+    assert image.data == heic and image.mime_type == "image/heic"
+    print("✅ HEIC pass-through: PASSED")
+
+    try:
+        asyncio.run(image_pipeline.ingest(b"not an image"))
+        assert False, "expected UnsupportedImageError"
+    except UnsupportedImageError:
+        print("✅ Unsupported payload rejected: PASSED")
+
+    try:
+        asyncio.run(image_pipeline.ingest(b"\x00" * (image_pipeline.max_bytes + 1)))
+        assert False, "expected ImageTooLargeError"
+    except ImageTooLargeError:
+        print("✅ Size limit enforced: PASSED")
+
+
+if __name__ == "__main__":
+    test_image_ingestion()
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.inventory import AdInventory, tokenize
+
+
+CATALOG = [
+    {"id": "calc", "title": "Calculus Done Right", "vendor": "Brilliant.org",
+     "keywords": ["calculus", "derivative", "integral"], "price": "$12.99"},
+    {"id": "wrench", "title": "Telescoping Basin Wrench", "vendor": "The Home Depot",
+     "keywords": ["wrench", "faucet", "plumbing"], "price": "$29.97"},
+]
+
+
+def _write_catalog(path: str, records: list[dict]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_inventory_search_and_reload():
+    print("📚 Testing Local Ad Inventory...\n")
+
+    assert tokenize("The Derivatives of Integrals") == ["derivative", "integral"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory.jsonl")
+        _write_catalog(path, CATALOG)
+
+        inventory = AdInventory(path)
+        inventory.min_score = 0.1
+        inventory.reload_interval = 0
+        assert inventory.size == 0  # Nothing is read at construction
+        asyncio.run(inventory.refresh_if_changed())
+        assert inventory.size == 2
+
+        hits = inventory.search(["derivatives"])
+        assert hits and hits[0][1].id == "calc"
+        hits = inventory.search(["plumbing wrench"])
+        assert hits and hits[0][1].to_result()["source"] == "The Home Depot"
+        assert inventory.search(["weather forecast"]) == []
+        print("✅ BM25 Matching: PASSED")
+
+        _write_catalog(path, CATALOG + [
+            {"id": "shoes", "title": "Pegasus Running Shoes", "vendor": "Nike", "keywords": ["running"]},
+        ])
+        os.utime(path, (0, 12345))  # Force an mtime change regardless of clock resolution
+        asyncio.run(inventory.refresh_if_changed())
+        assert inventory.size == 3
+        assert inventory.search(["running shoes"])[0][1].id == "shoes"
+        print("✅ Hot Reload: PASSED")
+
+        parquet = AdInventory(os.path.join(tmp, "inventory.parquet"))
+        open(parquet.path, "wb").close()
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            try:
+                parquet.load()
+                assert False, "parquet catalog loaded without pyarrow"
+            except RuntimeError as e:
+                assert "pyarrow" in str(e)
+            print("✅ Missing pyarrow error: PASSED")
+
+
+if __name__ == "__main__":
+    test_inventory_search_and_reload()
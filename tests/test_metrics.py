@@ -0,0 +1,39 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.metrics import MetricsRegistry
+
+
+def test_metrics_exposition():
+    print("📈 Testing Metrics Exposition...\n")
+
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Test latency.", ["stage"], buckets=(0.1, 1.0))
+    hits = registry.counter("test_hits_total", "Test hits.", ["cache"])
+
+    latency.observe(0.05, "pulse")
+    latency.observe(0.5, "pulse")
+    latency.observe(5.0, "pulse")
+    with latency.time("synthesis"):
+        pass
+    hits.inc("multimodal")
+    hits.inc("multimodal")
+
+    text = registry.render()
+    print(text)
+
+    assert "# TYPE test_latency_seconds histogram" in text
+    assert 'test_latency_seconds_bucket{stage="pulse",le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{stage="pulse",le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{stage="pulse",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{stage="pulse"} 3' in text
+    assert latency.count("synthesis") == 1
+    assert 'test_hits_total{cache="multimodal"} 2' in text
+    print("✅ Exposition Format: PASSED")
+
+
+if __name__ == "__main__":
+    test_metrics_exposition()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import IntentAnalysis, IntentBucket, StruggleState
+from backend.session_state import ConversationState
+from backend.prefetch import Prefetcher
+from backend.axon_registry import axon_registry
+from backend.ranking import RankedAd
+from backend.redis_client import RedisClient
+from tests.fake_redis import FakeRedis
+
+
+def _analysis(propensity, repeats=0, entities=("calculus", "derivatives"), safe=True):
+    return IntentAnalysis(
+        intent_bucket=IntentBucket.EDUCATIONAL,
+        struggle_state=StruggleState.MODERATE,
+        propensity_score=propensity,
+        detected_entities=list(entities),
+        is_safe_for_ads=safe,
+        topic_repeat_count=repeats,
+    )
+
+
+def test_prefetch():
+    print("🔮 Testing Predictive Nudge Prefetch...\n")
+    RedisClient._instance = FakeRedis()
+    prefetcher = Prefetcher()
+
+    assert prefetcher.should_prefetch(_analysis(50), None)
+    assert prefetcher.should_prefetch(_analysis(55, repeats=3), _analysis(55, repeats=2))
+    assert not prefetcher.should_prefetch(_analysis(50), _analysis(60))
+    assert not prefetcher.should_prefetch(_analysis(30), None)
+    assert not prefetcher.should_prefetch(_analysis(85), None)
+    assert not prefetcher.should_prefetch(_analysis(50, safe=False), None)
+    print("✅ Rising-propensity band: PASSED")
+
+    result = {"title": "Calculus Done Right", "source": "Brilliant.org"}
+    upstream_calls = []
+
+    async def fake_rank_candidates(analysis, location="United States", k=3, trace=False, cap=None):
+        upstream_calls.append(analysis.detected_entities)
+        await asyncio.sleep(0.01)
+        return [RankedAd(result, "inventory", 0.9, 1.0, 0.8, None)]
+
+    original = axon_registry.rank_candidates
+    axon_registry.rank_candidates = fake_rank_candidates
+
+    async def scenario():
+        session = ConversationState(session_id="s1")
+        assert prefetcher.schedule(session, _analysis(50), None)
+        assert not prefetcher.schedule(session, _analysis(55), _analysis(50))  # one per session
+        await asyncio.sleep(0.05)
+        assert prefetcher.inflight == 0 and session.prefetched is not None
+
+        # Threshold crossed with overlapping entities: candidates are reused
+        candidates = prefetcher.take(session, _analysis(80, entities=["calculus", "derivative"]))
+        assert candidates == [(result, "inventory", 0.9)]
+        assert session.prefetched is None
+        print("✅ Prefetch stored on session and claimed: PASSED")
+
+        # Entity drift or age makes a prefetch stale
+        assert prefetcher.schedule(session, _analysis(60), None)
+        await asyncio.sleep(0.05)
+        assert prefetcher.take(session, _analysis(80, entities=["macbook"])) is None
+        assert prefetcher.schedule(session, _analysis(60), None)
+        await asyncio.sleep(0.05)
+        session.prefetched.created_at = datetime.now() - timedelta(seconds=prefetcher.ttl + 1)
+        assert prefetcher.take(session, _analysis(80)) is None
+        print("✅ Stale prefetch rejected: PASSED")
+
+        # Unsafe turn / session end cancels in-flight work
+        assert prefetcher.schedule(session, _analysis(60), None)
+        prefetcher.cancel(session)
+        await asyncio.sleep(0.05)
+        assert session.prefetched is None and prefetcher.inflight == 0
+
+        # Bounded concurrency: extra sessions are dropped, not queued
+        others = [ConversationState(session_id=f"c{i}") for i in range(prefetcher.max_inflight + 2)]
+        started = sum(prefetcher.schedule(s, _analysis(60), None) for s in others)
+        assert started == prefetcher.max_inflight
+        await prefetcher.shutdown()
+        print("✅ Cancellation + bounded concurrency: PASSED")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        axon_registry.rank_candidates = original
+        RedisClient._instance = None
+
+    assert 0.0 < prefetcher.hit_rate() < 1.0
+
+
+if __name__ == "__main__":
+    test_prefetch()
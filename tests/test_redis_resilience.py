@@ -0,0 +1,192 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+from backend.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from backend.admin_routes import get_stats
+from backend.data.store import store
+from backend.frequency_cap import frequency_capper
+from backend.response_cache import response_cache
+from backend.search_cache import search_cache
+from backend.main import track_requests
+from backend.redis_client import REDIS_FAIL_OPEN, RedisClient, fail_open
+from tests.fake_redis import FakeRedis
+
+
+class FlakyRedis(FakeRedis):
+    """FakeRedis whose commands fail (or stall) while `down` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.down = False
+        self.stall = 0.0
+        self.calls = 0
+
+    async def _outage(self):
+        self.calls += 1
+        if self.stall:
+            await asyncio.sleep(self.stall)
+        if self.down:
+            raise ConnectionError("Connection refused")
+
+    async def incr(self, key, amount=1):
+        await self._outage()
+        return await super().incr(key, amount)
+
+    async def publish(self, channel, message):
+        await self._outage()
+        return await super().publish(channel, message)
+
+    async def hget(self, key, field):
+        await self._outage()
+        return await super().hget(key, field)
+
+    async def get(self, key):
+        await self._outage()
+        return await super().get(key)
+
+    async def ttl(self, key):
+        await self._outage()
+        return await super().ttl(key)
+
+    async def zremrangebyscore(self, key, low, high):
+        await self._outage()
+        return await super().zremrangebyscore(key, low, high)
+
+
+def test_redis_resilience():
+    print("🛡️ Testing Redis Resilience...\n")
+
+    async def breaker_scenario():
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0.05)
+
+        async def boom():
+            raise ConnectionError("down")
+
+        async def ok():
+            return "ok"
+
+        for _ in range(2):
+            try:
+                await breaker.call(boom)
+            except ConnectionError:
+                pass
+        assert breaker.state == OPEN and not breaker.available()
+        try:
+            await breaker.call(ok)
+            assert False, "open circuit let a call through"
+        except CircuitOpenError:
+            pass
+
+        # Half-open: one probe at a time, a failed probe re-opens
+        await asyncio.sleep(0.06)
+        assert breaker.available()
+        try:
+            await breaker.call(boom)
+        except ConnectionError:
+            pass
+        assert breaker.state == OPEN
+
+        # A cancelled probe gives its slot back; a successful one closes the circuit
+        await asyncio.sleep(0.06)
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 10))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN and not breaker.allow()
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+        assert await breaker.call(ok) == "ok" and breaker.state == CLOSED
+
+    asyncio.run(breaker_scenario())
+    print("✅ Circuit breaker: PASSED")
+
+    redis = RedisClient._instance = FlakyRedis()
+    breaker = RedisClient.breaker
+    RedisClient.breaker = CircuitBreaker("redis-test", failure_threshold=3, reset_timeout=0.1)
+
+    async def call_next(request):
+        return PlainTextResponse("ok")
+
+    def request():
+        return Request({
+            "type": "http", "method": "GET", "path": "/health", "headers": [],
+            "query_string": b"", "client": ("127.0.0.1", 1234),
+        })
+
+    async def fail_open_scenario():
+        assert await fail_open("incr", lambda r: r.incr("stats:total_requests")) == 1
+
+        # An outage costs each request nothing but the failed attempt, then nothing at all
+        redis.down = True
+        for _ in range(5):
+            response = await track_requests(request(), call_next)
+            assert response.status_code == 200
+        assert RedisClient.breaker.state == OPEN
+        assert redis.calls == 1 + 3  # Only the calls before the circuit opened reached Redis
+        assert REDIS_FAIL_OPEN.value("publish", "rejected") > 0
+        # Key attribution degrades to anonymous instead of failing /chat
+        key_id = await fail_open("resolve_key_id", lambda r: store.resolve_key_id("sk_live_unknown"), default="anonymous")
+        assert key_id == "anonymous"
+
+        # A stalled server is cut off at the fail-open deadline
+        redis.down, redis.stall = False, 1.0
+        await asyncio.sleep(0.11)
+        start = time.perf_counter()
+        assert await fail_open("incr", lambda r: r.incr("stats:total_requests"), default=-1, timeout=0.05) == -1
+        assert time.perf_counter() - start < 0.5
+        assert RedisClient.breaker.state == OPEN
+
+        # Recovery: the next probe succeeds and closes the circuit
+        redis.stall = 0.0
+        await asyncio.sleep(0.11)
+        response = await track_requests(request(), call_next)
+        assert response.status_code == 200
+        assert RedisClient.breaker.state == CLOSED
+        assert redis.data["stats:total_requests"] == "2"
+
+    asyncio.run(fail_open_scenario())
+    print("✅ Fail-open telemetry writes: PASSED")
+
+    async def hung_scenario():
+        # A server that accepts connections but never answers: /chat-path reads become misses
+        redis.stall = 5.0
+        RedisClient.breaker = CircuitBreaker("redis-test", failure_threshold=3, reset_timeout=60)
+        start = time.perf_counter()
+        assert await search_cache.get("desk lamp", "United States") is None
+        assert not await search_cache.is_negative("desk lamp", "United States")
+        assert not (await frequency_capper.load("s1", "u1")).session
+        assert await response_cache.get("what is a derivative?") is None
+        assert time.perf_counter() - start < 1.5  # Three deadlines, then the circuit answers
+        assert RedisClient.breaker.state == OPEN
+        stats = await get_stats()
+        assert stats.total_requests == 0 and stats.history == []
+        redis.stall = 0.0
+
+    asyncio.run(hung_scenario())
+    RedisClient.breaker = breaker
+    print("✅ Fail-open cache reads and admin stats: PASSED")
+
+    # The real client is built over a bounded pool with keepalive and retries (no connection needed)
+    RedisClient._instance = None
+    client = RedisClient.get_instance()
+    pool_kwargs = RedisClient._pool.connection_kwargs
+    assert pool_kwargs["socket_keepalive"] and pool_kwargs["retry"].get_retries() > 0
+    assert RedisClient.pool_stats() == {"in_use": 0, "idle": 0, "max": RedisClient._pool.max_connections}
+    # Reply waits park connections on a pool of their own
+    blocking = RedisClient.get_blocking_instance()
+    assert blocking is not client and RedisClient._blocking_pool is not RedisClient._pool
+    blocking_kwargs = RedisClient._blocking_pool.connection_kwargs
+    assert pool_kwargs["socket_timeout"] < blocking_kwargs["socket_timeout"]
+    asyncio.run(RedisClient.close())
+    assert client is not None and RedisClient._instance is None and RedisClient._blocking is None
+    print("✅ Connection pool: PASSED")
+
+
+if __name__ == "__main__":
+    test_redis_resilience()
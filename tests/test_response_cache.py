@@ -0,0 +1,64 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.metrics import CACHE_HITS
+from backend.redis_client import RedisClient
+from backend.response_cache import ResponseCache, is_context_dependent, normalize_message, symbol_signature
+from tests.fake_redis import FakeRedis
+
+
+def test_response_cache():
+    print("💾 Testing Semantic Response Cache...\n")
+    RedisClient._instance = FakeRedis()
+
+    assert normalize_message("  What is the Derivative of sin(x)cos(x)? ") == "what is the derivative of sin(x)cos(x)"
+    assert symbol_signature("derivative of sin(x)cos(2x)") != symbol_signature("derivative of sin(x)cos(x)")
+    assert is_context_dependent("why is that?")
+    assert not is_context_dependent("what is the derivative of sin(x)cos(x)")
+
+    async def scenario():
+        cache = ResponseCache(max_bytes=4096, max_entries=8, ttl=60)
+        question = "What is the derivative of sin(x)cos(x)?"
+        await cache.put(question, "ctx A", "cos(2x)")
+
+        # Exact hit ignores context for self-contained questions
+        near_before = CACHE_HITS.value("response_near")
+        assert await cache.get("what is the derivative of  sin(x)cos(x)", "ctx B") == "cos(2x)"
+        # Near-duplicate phrasing with identical symbols
+        assert await cache.get("derivatives of sin(x)cos(x)", "ctx B") == "cos(2x)"
+        assert CACHE_HITS.value("response_near") == near_before + 1
+        # Different symbols or a different question never match
+        assert await cache.get("What is the derivative of sin(x)cos(2x)?", "ctx B") is None
+        assert await cache.get("What is the integral of sin(x)cos(x)?", "ctx B") is None
+        # Reversed questions share every word but not their order
+        await cache.put("how do I convert celsius to fahrenheit", "", "F = C * 9/5 + 32")
+        assert await cache.get("how do I convert fahrenheit to celsius", "") is None
+        await cache.put("is python faster than java for web servers", "", "Usually not.")
+        assert await cache.get("is java faster than python for web servers", "") is None
+        print("✅ Exact + near-duplicate hits: PASSED")
+
+        # Context-dependent turns only hit within the same context
+        await cache.put("Why is that?", "ctx A", "Because of the product rule.")
+        assert await cache.get("why is that", "ctx A") == "Because of the product rule."
+        assert await cache.get("why is that", "ctx B") is None
+        print("✅ Context-dependent safeguard: PASSED")
+
+        # Byte budget evicts least recently used answers
+        for i in range(10):
+            await cache.put(f"explain topic number {i} in depth please", "", "x" * 1000)
+        assert cache.size_bytes <= 4096
+        RedisClient._instance = FakeRedis()  # drop the shared tier
+        assert await cache.get("explain topic number 0 in depth please", "") is None
+        assert await cache.get("explain topic number 9 in depth please", "") == "x" * 1000
+        print("✅ Byte budget eviction: PASSED")
+
+    asyncio.run(scenario())
+    RedisClient._instance = None
+
+
+if __name__ == "__main__":
+    test_response_cache()
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import RevenueEvent
+from backend.redis_client import RedisClient
+from backend.revenue_stream import (
+    RevenueAggregator, RevenueStream, StreamConsumer, decode_event, encode_event,
+)
+from tests.fake_redis import FakeRedis
+
+
+def test_revenue_stream():
+    print("💸 Testing Revenue Event Stream...\n")
+    redis = RedisClient._instance = FakeRedis()
+
+    event = RevenueEvent(amount=4.5, source="nudge_impression", intent_bucket="commercial", session_id="s1")
+    fields = encode_event(event)
+    assert set(fields) == {"a", "s", "t", "b", "i"}
+    restored = decode_event(fields)
+    assert restored.amount == 4.5 and restored.session_id == "s1"
+    assert abs((restored.timestamp - event.timestamp).total_seconds()) < 0.001
+    print("✅ Compact encoding: PASSED")
+
+    async def scenario():
+        stream = RevenueStream("test:revenue")
+        stream.maxlen = 5
+        for i in range(7):
+            await stream.publish(RevenueEvent(amount=1.0 + i, source="nudge_impression", session_id=f"s{i}"))
+        assert await redis.xlen("test:revenue") == 5
+        recent = await stream.recent(2)
+        assert [e.session_id for e in recent] == ["s6", "s5"]
+        print("✅ Publish + trimming: PASSED")
+
+        # A consumer whose handler fails leaves its batch pending
+        calls = []
+
+        async def failing(batch):
+            calls.append(len(batch))
+            raise RuntimeError("billing down")
+
+        crashed = StreamConsumer(stream, "billing", failing, consumer="pod-a")
+        try:
+            await crashed.poll_once()
+        except RuntimeError:
+            pass
+        assert calls == [5]
+        assert (await redis.xinfo_groups("test:revenue"))[0]["pending"] == 5
+
+        # Another member reclaims the idle entries and the aggregator applies them
+        aggregator = RevenueAggregator()
+        survivor = StreamConsumer(stream, "billing", aggregator.apply, consumer="pod-b")
+        survivor.claim_idle_ms = 0
+        assert await survivor.poll_once() == 5
+        assert float(redis.data["stats:total_revenue"]) == sum(range(3, 8))
+        info = (await redis.xinfo_groups("test:revenue"))[0]
+        assert info["pending"] == 0 and info["lag"] == 0
+        print("✅ At-least-once redelivery via XAUTOCLAIM: PASSED")
+
+        # Redelivering already-applied entries does not double count
+        await aggregator.apply([(entry_id, decode_event(f)) for entry_id, f in await redis.xrevrange("test:revenue")])
+        assert float(redis.data["stats:total_revenue"]) == sum(range(3, 8))
+        assert float(redis.data["stats:revenue_by_source"]["nudge_impression"]) == sum(range(3, 8))
+        print("✅ Idempotent aggregation: PASSED")
+
+        # New entries flow to the group; lag gauges read XINFO
+        await stream.publish(RevenueEvent(amount=10.0, source="nudge_click"))
+        await survivor.update_lag()
+        assert (await redis.xinfo_groups("test:revenue"))[0]["lag"] == 1
+        assert await survivor.poll_once() == 1
+        assert float(redis.data["stats:total_revenue"]) == sum(range(3, 8)) + 10.0
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_revenue_stream()
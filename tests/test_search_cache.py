@@ -0,0 +1,92 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from backend.circuit_breaker import CircuitBreaker
+from backend.metrics import CACHE_HITS, CACHE_MISSES
+from backend.redis_client import RedisClient
+from backend.search_cache import search_cache
+from backend.serp_client import serp_client
+from tests.fake_redis import FakeRedis
+
+
+def test_negative_cache():
+    print("🕳️ Testing SERP Negative Cache...\n")
+    redis = RedisClient._instance = FakeRedis()
+    requests = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        query = request.url.params["q"]
+        requests.append(query)
+        if query == "flaky gadget":
+            return httpx.Response(500, json={"error": "backend error"})
+        if query == "desk lamp":
+            return httpx.Response(200, json={"shopping_results": [{"title": "Desk Lamp", "source": "Example Shop"}]})
+        return httpx.Response(200, json={"shopping_results": []})
+
+    client_class, api_key, breaker = httpx.AsyncClient, serp_client.api_key, serp_client.breaker
+    httpx.AsyncClient = lambda **kwargs: client_class(transport=httpx.MockTransport(upstream), **kwargs)
+    serp_client.api_key = "test-key"
+    serp_client.breaker = CircuitBreaker("serp-test", failure_threshold=100)
+    search_cache._negative.clear()
+    search_cache._positive.clear()
+
+    async def search(query: str) -> dict:
+        return await serp_client.search(query, search_type="shopping")
+
+    async def scenario():
+        # Miss: the first empty search reaches SerpApi and is remembered as "no inventory"
+        misses = CACHE_MISSES.value("serp_negative")
+        assert await search("quantum widget") == {"shopping_results": []}
+        assert requests == ["quantum widget"] and CACHE_MISSES.value("serp_negative") == misses + 1
+        print("✅ Negative miss: PASSED")
+
+        # Hit: the next turn skips SerpApi, counted apart from positive hits
+        hits, negative_hits = CACHE_HITS.value("serp"), CACHE_HITS.value("serp_negative")
+        assert (await search("Quantum  Widget"))["negative_cache_hit"]
+        assert requests == ["quantum widget"]
+        assert CACHE_HITS.value("serp_negative") == negative_hits + 1 and CACHE_HITS.value("serp") == hits
+        # Shared through Redis: another instance (empty local LRU) also skips the search
+        search_cache._negative.clear()
+        assert (await search("quantum widget"))["negative_cache_hit"]
+        assert requests == ["quantum widget"]
+        print("✅ Negative hit skips SerpApi: PASSED")
+
+        # Expiry: once the entry lapses locally and in Redis the query is searched again
+        key = search_cache._key("neg", "quantum widget", "United States")
+        assert redis.ttls[key] == search_cache.negative_ttl
+        search_cache._negative[key] = 0.0
+        await redis.delete(key)
+        assert "negative_cache_hit" not in await search("quantum widget")
+        assert requests == ["quantum widget", "quantum widget"]
+        print("✅ Negative entry expiry: PASSED")
+
+        # Upstream errors are not "no inventory": each turn retries SerpApi
+        for _ in range(2):
+            assert "error" in await search("flaky gadget")
+        assert requests[-2:] == ["flaky gadget", "flaky gadget"]
+        assert not await search_cache.is_negative("flaky gadget", "United States")
+        print("✅ Errors not cached as negatives: PASSED")
+
+        # Results are cached positively, never as negatives
+        await search("desk lamp")
+        assert (await search("desk lamp"))["shopping_results"][0]["title"] == "Desk Lamp"
+        assert requests.count("desk lamp") == 1
+        assert not await search_cache.is_negative("desk lamp", "United States")
+        print("✅ Positive results not marked negative: PASSED")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        httpx.AsyncClient, serp_client.api_key, serp_client.breaker = client_class, api_key, breaker
+        search_cache._negative.clear()
+        search_cache._positive.clear()
+
+
+if __name__ == "__main__":
+    test_negative_cache()
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.semantic_index import SemanticIndex, top_k
+
+
+def test_semantic_index():
+    print("🧭 Testing Semantic Ad Index...\n")
+
+    scores = np.array([[0.1, 0.9, 0.3, 0.7], [0.5, 0.2, 0.8, 0.1]], dtype=np.float32)
+    indices, values = top_k(scores, 2)
+    assert indices.tolist() == [[1, 3], [2, 0]]
+    assert np.allclose(values, [[0.9, 0.7], [0.8, 0.5]])
+    print("✅ argpartition top-k: PASSED")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SemanticIndex(os.path.join(tmp, "ads.npy"))
+        index.min_similarity = 0.2
+        index.build(
+            ["calc", "laptop"],
+            [
+                "Calculus course: limits, derivatives and integrals",
+                "Gaming laptop with RTX graphics",
+            ],
+        )
+        assert index.save() and isinstance(index._base, np.memmap)
+        assert index.search("derivative")[0][1] == "calc"
+
+        # Incremental insert is searchable before compaction
+        index.add(["shoes"], ["Running shoes for jogging"])
+        assert index.search("jogging shoes")[0][1] == "shoes"
+        index.compact()
+        assert index._base.shape[0] == 3 and not index._pending
+        assert index.save()
+
+        reopened = SemanticIndex(index.path)
+        assert reopened.open() and reopened.ids == ["calc", "laptop", "shoes"]
+        print("✅ Build / insert / memory-mapped reopen: PASSED")
+
+        # A search never pairs the new ids with the old rows
+        index.build(["shoes"], ["Running shoes for jogging"])
+        assert index.search("derivative") == [] and index.search("jogging")[0][1] == "shoes"
+
+        # An unwritable path leaves the in-memory index working
+        blocked = os.path.join(tmp, "file")
+        open(blocked, "w").close()
+        readonly = SemanticIndex(os.path.join(blocked, "ads.npy"))
+        readonly.build(["calc"], ["Calculus course: limits, derivatives and integrals"])
+        assert not readonly.save() and readonly.search("derivative")[0][1] == "calc"
+        print("✅ Consistent swaps / read-only disk: PASSED")
+
+
+if __name__ == "__main__":
+    test_semantic_index()
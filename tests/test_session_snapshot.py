@@ -0,0 +1,101 @@
+import asyncio
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import main
+from backend.models import IntentAnalysis, IntentBucket, Nudge, RevenueEvent, StruggleState
+from backend.redis_client import RedisClient
+from backend.session_snapshot import SessionSnapshot, SessionTable
+from backend.session_state import ConversationState
+from tests.fake_redis import FakeRedis
+
+
+def _session(session_id: str, turns: int) -> ConversationState:
+    session = ConversationState(session_id=session_id)
+    for i in range(turns):
+        session.add_message("user", f"{session_id} question {i}")
+        session.add_message("assistant", f"{session_id} answer {i}")
+    return session
+
+
+def test_session_snapshot():
+    print("💾 Testing Session Snapshots (warm restart)...\n")
+
+    async def scenario(path: str):
+        # First process: three sessions, snapshotted, then one more turn and one ended session
+        snapshot = SessionSnapshot(path)
+        sessions = SessionTable(snapshot)
+        for sid in ("a", "b", "c"):
+            sessions[sid] = _session(sid, 3)
+        assert await snapshot.write(sessions) == 3
+        assert await snapshot.write(sessions) == 0  # Nothing changed
+        sessions["a"].add_message("user", "a follow-up")
+        del sessions["c"]
+        assert await snapshot.write(sessions) == 1  # Appends "a" plus a tombstone for "c"
+        print("✅ Incremental append: PASSED")
+
+        # Torn tail from a crash mid-append is ignored
+        with open(path, "ab") as f:
+            f.write(b"\x10\x00\x00")
+
+        # Second process: nothing is decoded until a session is touched
+        restarted = SessionSnapshot(path)
+        assert restarted.open() == 2
+        table = SessionTable(restarted)
+        assert len(table) == 2 and "a" in table and "c" not in table
+        assert table.restored() == {}
+        a = table["a"]
+        assert len(a.messages) == 7 and a.messages[-1].content == "a follow-up"
+        assert list(table.restored()) == ["a"] and restarted.cold_count() == 1
+        print("✅ Lazy mmap restore: PASSED")
+
+        # The first write after a restart rewrites the file, keeping unrestored sessions
+        a.add_message("assistant", "restored answer")
+        await restarted.write(table)
+        third = SessionSnapshot(path)
+        assert third.open() == 2
+        table = SessionTable(third)
+        assert len(table["a"].messages) == 8 and len(table["b"].messages) == 6
+        print("✅ Rewrite keeps cold sessions: PASSED")
+
+        # Aggregates come from the per-record summaries, so nothing is restored for them
+        b = table["b"]
+        b.current_intent = IntentAnalysis(
+            intent_bucket=IntentBucket.COMMERCIAL, struggle_state=StruggleState.MILD,
+            propensity_score=70, detected_entities=["desk"],
+        )
+        b.nudges_shown.append(Nudge(
+            product_name="Desk", vendor_name="Example Shop", relevance_score=0.9,
+            nudge_text="A desk", link="https://shop.example.com/desk",
+        ))
+        b.revenue_events.append(RevenueEvent(amount=2.5, source="nudge_click", session_id="b"))
+        b.total_revenue_generated = 2.5
+        b.add_message("user", "b follow-up")
+        await third.write(table)
+        fourth = SessionSnapshot(path)
+        assert fourth.open() == 2
+        cold = SessionTable(fourth)
+        RedisClient._instance = FakeRedis()
+        original = main.sessions
+        main.sessions = cold
+        try:
+            assert await main.stats() == {"active_sessions": 2, "total_revenue": 2.5}
+            analytics = await main.analytics()
+        finally:
+            main.sessions = original
+        assert cold.restored() == {}
+        assert analytics["metrics"]["active_nudges"] == 1 and analytics["metrics"]["total_revenue"] == 2.5
+        assert analytics["charts"]["intent_distribution"] == [{"name": "Commercial", "value": 1}]
+        assert analytics["charts"]["revenue_over_time"][0]["amount"] == 2.5
+        print("✅ Aggregates without restoring: PASSED")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(scenario(os.path.join(tmp, "sessions.snap")))
+
+
+if __name__ == "__main__":
+    test_session_snapshot()
@@ -0,0 +1,57 @@
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import IntentAnalysis, IntentBucket, Nudge, RevenueEvent, StruggleState
+from backend.session_state import ConversationState, MessageLog, decode_session, encode_session
+
+
+def test_session_state_codec():
+    print("📦 Testing Compact Session State...\n")
+
+    log = MessageLog()
+    log.append("user", "hello", ts=1_700_000_000_000)
+    log.append("assistant", "hi there")
+    log.append("tool", "custom role")
+    assert [m.role for m in log] == ["user", "assistant", "tool"]
+    assert log[0].timestamp.year == 2023 and log[-1].content == "custom role"
+    assert len(log[1:]) == 2 and log[1:][0].role == "assistant"
+    assert log.to_models()[0].content == "hello"
+    print("✅ Array-backed message log: PASSED")
+
+    session = ConversationState(session_id="codec")
+    for i in range(50):
+        session.add_message("user", f"question {i} ∫ x² dx")
+        session.add_message("assistant", f"answer {i}")
+    session.current_intent = IntentAnalysis(
+        intent_bucket=IntentBucket.COMMERCIAL,
+        struggle_state=StruggleState.HIGH,
+        propensity_score=80,
+        detected_entities=["calculus"],
+    )
+    session.nudges_shown.append(Nudge(
+        product_name="Calculus Done Right", vendor_name="Brilliant.org",
+        relevance_score=0.9, nudge_text="Try it",
+    ))
+    session.revenue_events.append(RevenueEvent(
+        amount=2.5, source="nudge_impression", session_id="codec", intent_bucket="commercial",
+    ))
+    session.total_revenue_generated = 2.5
+    session.summary, session.compacted_messages = "Earlier: integrals.", 30
+
+    restored = decode_session(encode_session(session))
+    assert restored.session_id == "codec" and restored.created_at == session.created_at
+    assert [(m.role, m.content, m.ts) for m in restored.messages] == \
+        [(m.role, m.content, m.ts) for m in session.messages]
+    assert restored.current_intent == session.current_intent
+    assert restored.nudges_shown == session.nudges_shown
+    assert restored.revenue_events == session.revenue_events
+    assert restored.summary == session.summary and restored.compacted_messages == 30
+    assert restored.transcript.window("synthesis") == session.transcript.window("synthesis")
+    print("✅ msgpack round trip: PASSED")
+
+
+if __name__ == "__main__":
+    test_session_state_codec()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.json_stream import IncrementalJSONParser
+from backend.models import Message
+from backend.pulse_monitor import PulseMonitor, PULSE_SHORT_CIRCUITS, PULSE_PARSE_ERRORS
+from backend import pulse_monitor as pulse_module
+
+
+def _chunks(text: str, size: int = 7) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_incremental_parser():
+    print("🧩 Testing Incremental JSON Parser...\n")
+
+    document = '```json\n{"is_safe_for_ads": true, "detected_entities": ["calc \\"1\\"", {"a": [1, 2]}], ' \
+               '"propensity_score": 85, "safety_reason": null}\n```'
+    parser = IncrementalJSONParser()
+    seen = []
+    for chunk in _chunks(document, 3):
+        seen.extend(key for key, _ in parser.feed(chunk))
+
+    assert seen == ["is_safe_for_ads", "detected_entities", "propensity_score", "safety_reason"]
+    assert parser.result()["detected_entities"] == ['calc "1"', {"a": [1, 2]}]
+    assert parser.result()["propensity_score"] == 85
+
+    # A number is only emitted once its delimiter arrives
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"score": 8') == []
+    assert parser.feed('5,') == [("score", 85)]
+    for broken in (parser.result, lambda: IncrementalJSONParser().feed('{"a" 1}')):
+        try:
+            broken()
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("truncated/malformed JSON was accepted")
+    print("✅ Incremental parsing: PASSED")
+
+
+def test_pulse_short_circuit():
+    print("🛑 Testing schema-constrained Pulse Monitor...\n")
+    consumed = []
+    closed = []
+
+    def fake_stream(payload):
+        async def generate_stream(**kwargs):
+            assert kwargs["response_schema"] is not None
+            try:
+                for chunk in _chunks(payload):
+                    consumed.append(chunk)
+                    yield chunk
+            finally:
+                closed.append(True)
+        return generate_stream
+
+    original = pulse_module.gemini.generate_stream
+    monitor = PulseMonitor()
+    unsafe = '{"is_safe_for_ads": false, "safety_reason": "medical emergency", ' + \
+             '"intent_bucket": "commercial", "detected_entities": ["bandages", "gauze", "tourniquet"]}'
+
+    async def scenario():
+        before = PULSE_SHORT_CIRCUITS.value("pulse_quick")
+        pulse_module.gemini.generate_stream = fake_stream(unsafe)
+        analysis = await monitor._quick_analyze(Message(role="user", content="I cut my hand badly"))
+        assert not analysis.is_safe_for_ads and analysis.propensity_score == 0
+        assert analysis.safety_reason is None  # cancelled before the reason streamed in full
+        assert len(consumed) < len(_chunks(unsafe)) and closed
+        assert PULSE_SHORT_CIRCUITS.value("pulse_quick") == before + 1
+        print("✅ Unsafe verdict short-circuits the stream: PASSED")
+
+        safe = '{"is_safe_for_ads": true, "safety_reason": null, "intent_bucket": "commercial", ' \
+               '"detected_entities": ["laptop"], "is_question": false, "is_equation_or_problem": false}'
+        pulse_module.gemini.generate_stream = fake_stream(safe)
+        analysis = await monitor._quick_analyze(Message(role="user", content="I want a laptop"))
+        assert analysis.is_safe_for_ads and analysis.detected_entities == ["laptop"]
+        assert analysis.propensity_score == 75
+
+        errors = PULSE_PARSE_ERRORS.value("pulse_quick")
+        pulse_module.gemini.generate_stream = fake_stream('{"intent_bucket": "shopping"}')
+        analysis = await monitor._quick_analyze(Message(role="user", content="hello there"))
+        assert analysis.propensity_score == 0 and "error" in analysis.reasoning
+        assert PULSE_PARSE_ERRORS.value("pulse_quick") == errors + 1
+        print("✅ Validation via TypeAdapter: PASSED")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pulse_module.gemini.generate_stream = original
+
+
+if __name__ == "__main__":
+    test_incremental_parser()
+    test_pulse_short_circuit()
@@ -0,0 +1,137 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from backend.gemini_client import gemini
+from backend.models import IntentBucket, Message, Nudge, StruggleState
+from backend.pulse_monitor import pulse_monitor
+from backend.redis_client import RedisClient
+from backend.search_cache import search_cache
+from backend.serp_client import serp_client
+from backend.synthesizer import UNAVAILABLE_MESSAGE, synthesizer
+from tests.fake_redis import FakeRedis
+
+
+class FakeAPIError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"{code} error")
+        self.code = code
+
+
+class FakeModels:
+    """Stands in for client.aio.models; fails with `error` while it is set."""
+
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    async def generate_content(self, model, contents, config):
+        self.calls += 1
+        raise self.error
+
+
+class FakeGenAI:
+    def __init__(self):
+        self.aio = type("Aio", (), {})()
+        self.aio.models = FakeModels()
+
+
+def test_upstream_fallbacks():
+    print("🔌 Testing Upstream Circuit Breakers...\n")
+    RedisClient._instance = FakeRedis()
+    fake = FakeGenAI()
+    models = fake.aio.models
+    client, gemini_breaker, serp_breaker = gemini._client, gemini.breaker, serp_client.breaker
+    gemini._client = fake
+    gemini.breaker = CircuitBreaker("gemini-test", failure_threshold=2, reset_timeout=60)
+    serp_client.breaker = CircuitBreaker("serp-test", failure_threshold=2, reset_timeout=60)
+
+    async def scenario():
+        # Rejected requests do not count against the upstream; server errors do
+        models.error = FakeAPIError(400)
+        for _ in range(3):
+            try:
+                await gemini.generate("hi")
+            except FakeAPIError:
+                pass
+        assert gemini.available()
+        models.error = FakeAPIError(503)
+        for _ in range(2):
+            try:
+                await gemini.generate("hi")
+            except FakeAPIError:
+                pass
+        assert gemini.breaker.state == OPEN and not gemini.available()
+        calls = models.calls
+        try:
+            await gemini.generate("hi")
+            assert False, "open circuit reached Gemini"
+        except CircuitOpenError:
+            pass
+        print("✅ Gemini breaker: PASSED")
+
+        # Pulse: heuristic analysis instead of a model call
+        analysis = await pulse_monitor.analyze([Message(role="user", content="I want to buy a graphing calculator")])
+        assert analysis.intent_bucket == IntentBucket.COMMERCIAL and pulse_monitor.should_trigger_nudge(analysis)
+        assert "graphing" in analysis.detected_entities and "calculator" in analysis.detected_entities
+
+        unsafe = await pulse_monitor.analyze([Message(role="user", content="My son is bleeding, what should I buy?")])
+        assert not unsafe.is_safe_for_ads
+
+        grinding = [
+            Message(role="user", content="solve the integral of x^2"),
+            Message(role="assistant", content="x^3/3 + C"),
+            Message(role="user", content="now the integral of sin x"),
+            Message(role="assistant", content="-cos x + C"),
+            Message(role="user", content="and the integral of e^x?"),
+        ]
+        analysis = await pulse_monitor.analyze(grinding)
+        assert analysis.struggle_state == StruggleState.HIGH and analysis.topic_repeat_count == 3
+        print("✅ Pulse heuristic tier: PASSED")
+
+        # Synthesizer: fast failure, no nudge on the apology, template instead of a splice
+        nudge = Nudge(
+            product_name="TI-84", vendor_name="Example Shop", relevance_score=0.9,
+            nudge_text="You might also like the [TI-84](https://shop.example.com/ti84)",
+            link="https://shop.example.com/ti84",
+        )
+        start = time.perf_counter()
+        assert await synthesizer.generate_response("What is 2+2?", nudge=nudge, cacheable=False) == UNAVAILABLE_MESSAGE
+        assert await synthesizer.generate_response("x", nudge=nudge, mode="woven") == UNAVAILABLE_MESSAGE
+        assert await synthesizer.splice_nudge("4.", nudge) == "4.\n\n" + nudge.nudge_text
+        assert time.perf_counter() - start < 0.1
+        assert models.calls == calls
+        print("✅ Synthesizer fast failure: PASSED")
+
+        # SERP: failures open the circuit; then stale cache, else an immediate error
+        api_key, base_url = serp_client.api_key, serp_client.BASE_URL
+        serp_client.api_key = "test-key"
+        serp_client.BASE_URL = "http://127.0.0.1:9/search"  # Nothing listens here
+        try:
+            for query in ("desk lamp", "office chair"):
+                assert "error" in await serp_client.search(query, search_type="shopping")
+            assert serp_client.breaker.state == OPEN
+
+            stale = {"shopping_results": [{"title": "Desk Lamp", "source": "Example Shop"}]}
+            search_cache._remember_positive(search_cache._key("pos", "desk lamp", "United States"), -1, stale)
+            start = time.perf_counter()
+            assert await serp_client.search("desk lamp", search_type="shopping") == stale
+            assert (await serp_client.search("bookshelf", search_type="shopping")).get("circuit_open")
+            assert time.perf_counter() - start < 0.1
+        finally:
+            serp_client.api_key, serp_client.BASE_URL = api_key, base_url
+        print("✅ SERP breaker and stale cache: PASSED")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        gemini._client, gemini.breaker, serp_client.breaker = client, gemini_breaker, serp_breaker
+
+
+if __name__ == "__main__":
+    test_upstream_fallbacks()
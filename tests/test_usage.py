@@ -0,0 +1,51 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.usage import UsageTracker
+
+
+def test_usage_rollups():
+    print("🪙 Testing Token Usage Accounting...\n")
+
+    tracker = UsageTracker()
+    tracker.bind("session-1", "key-abc")
+
+    usage = SimpleNamespace(
+        prompt_token_count=1000,
+        cached_content_token_count=400,
+        candidates_token_count=200,
+        thoughts_token_count=None,
+    )
+    tracker.record("pulse_pattern", "gemini-2.0-flash", usage)
+    tracker.record("synthesis", "gemini-2.0-flash", usage)
+    tracker.record("synthesis", "gemini-2.0-flash", None)  # no metadata -> ignored
+
+    snapshot = tracker.snapshot(include_sessions=True)
+    print(snapshot)
+
+    # 600 uncached @ $0.10 + 400 cached @ $0.025 + 200 output @ $0.40 (per 1M)
+    expected_cost = (600 * 0.10 + 400 * 0.025 + 200 * 0.40) / 1_000_000
+    assert snapshot["total"]["calls"] == 2
+    assert snapshot["by_stage"]["pulse_pattern"]["prompt_tokens"] == 1000
+    assert snapshot["by_api_key"]["key-abc"]["calls"] == 2
+    assert abs(tracker.session_cost("session-1") - 2 * expected_cost) < 1e-12
+    print("✅ Rollups per stage/session/key: PASSED")
+
+    # Session rollups are bounded: ended sessions are dropped, idle ones evicted first
+    tracker.max_sessions = 2
+    for session_id in ("session-2", "session-1", "session-3"):
+        tracker.bind(session_id, "key-abc")
+        tracker.record("synthesis", "gemini-2.0-flash", usage)
+    assert list(tracker.by_session) == ["session-1", "session-3"]
+    tracker.forget_session("session-1")
+    assert list(tracker.by_session) == ["session-3"] and tracker.session_cost("session-1") == 0.0
+    assert tracker.snapshot()["by_api_key"]["key-abc"]["calls"] == 5
+    print("✅ Bounded session rollups: PASSED")
+
+
+if __name__ == "__main__":
+    test_usage_rollups()
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import work_queue as work_queue_module
+from backend.models import IntentAnalysis, IntentBucket, StruggleState
+from backend.redis_client import RedisClient
+from backend.session_state import ConversationState
+from backend.usage import usage_tracker
+from backend.work_queue import DeadlineExceeded, WorkQueue, Worker
+from tests.fake_redis import FakeRedis
+
+
+def test_work_queue():
+    print("📬 Testing Distributed Work Queue...\n")
+    redis = RedisClient._instance = FakeRedis()
+    calls = []
+
+    async def fake_analyze(messages, image=None, transcript=None):
+        calls.append([m.content for m in messages])
+        if messages[-1].content == "explode":
+            raise RuntimeError("model unavailable")
+        return IntentAnalysis(
+            intent_bucket=IntentBucket.COMMERCIAL, struggle_state=StruggleState.MILD,
+            propensity_score=60, detected_entities=[messages[-1].content],
+        )
+
+    original = work_queue_module.pulse_monitor.analyze
+    work_queue_module.pulse_monitor.analyze = fake_analyze
+
+    async def scenario():
+        queue = WorkQueue()
+        queue.enabled = True
+        worker = Worker(kinds=["pulse"], consumer="w1")
+        await worker._ensure_group(redis, "pulse")
+
+        session = ConversationState(session_id="q1")
+        session.add_message("user", "gaming laptop")
+
+        # Worker picks the job up and replies through reply:<job id>
+        pending = asyncio.create_task(queue.analyze(session))
+        await asyncio.sleep(0.01)
+        assert await worker.poll_once("pulse") == 1
+        await worker.drain()
+        analysis = await pending
+        assert analysis.detected_entities == ["gaming laptop"] and calls == [["gaming laptop"]]
+        assert (await redis.xinfo_groups("jobs:pulse"))[0]["pending"] == 0
+        print("✅ Queued analysis round trip: PASSED")
+
+        # No worker: once the deadline passes the caller degrades instead of starting the step over
+        queue.timeouts = {"pulse": 0.05}
+        analysis = await queue.analyze(session)
+        assert isinstance(analysis, IntentAnalysis) and len(calls) == 1  # Heuristic, no model call
+        assert work_queue_module.JOBS.value("pulse", "degraded") >= 1
+        # The abandoned job is skipped, not run
+        await asyncio.sleep(0.01)
+        assert await worker.poll_once("pulse") == 1
+        await worker.drain()
+        assert len(calls) == 1 and work_queue_module.JOBS.value("pulse", "expired") >= 1
+        print("✅ Timeout degrades + expired job skipped: PASSED")
+
+        # The request budget bounds every queued /chat step of the turn
+        queue.timeouts, queue.request_budget = {"pulse": 5.0}, 0.05
+        queue.begin_request()
+        start = time.perf_counter()
+        await queue.analyze(session)
+        assert time.perf_counter() - start < 0.5
+        try:
+            await queue.submit("pulse", {"session_id": "q1", "summary": None, "messages": []})
+            assert False, "spent budget still queued a job"
+        except DeadlineExceeded:
+            pass
+        work_queue_module._request_deadline.set(None)
+        await asyncio.sleep(0.01)
+        await worker.poll_once("pulse")
+        await worker.drain()
+        print("✅ Request budget: PASSED")
+
+        # A failing job is retried in the worker, then dead-lettered with an immediate error reply
+        queue.timeouts = {"pulse": 5.0}
+        worker.max_attempts, worker.retry_backoff = 2, 0.01
+        explode = {"session_id": "q1", "summary": None, "messages": [["user", "explode"]]}
+        start = time.perf_counter()
+        pending = asyncio.create_task(queue.submit("pulse", explode))
+        await asyncio.sleep(0.01)
+        assert await worker.poll_once("pulse") == 1
+        await worker.drain()
+        assert await pending is None
+        assert time.perf_counter() - start < 1.0  # Not the 5 s timeout
+        assert calls[-2:] == [["explode"], ["explode"]]
+        dead = await redis.xrevrange("jobs:dead")
+        assert len(dead) == 1 and dead[0][1]["kind"] == "pulse" and "model unavailable" in dead[0][1]["error"]
+        assert (await redis.xinfo_groups("jobs:pulse"))[0]["pending"] == 0
+        print("✅ In-worker retry then dead-letter: PASSED")
+
+        # No time left for a retry: the caller gets the failure at once and falls back
+        worker.max_attempts, worker.retry_backoff = 3, 1.0
+        queue.timeouts = {"pulse": 0.5}
+        failed_fast = work_queue_module.JOBS.value("pulse", "failed_fast")
+        start = time.perf_counter()
+        pending = asyncio.create_task(queue.submit("pulse", explode))
+        await asyncio.sleep(0.01)
+        assert await worker.poll_once("pulse") == 1
+        await worker.drain()
+        assert await pending is None
+        assert time.perf_counter() - start < 0.25
+        assert len(calls) == 4  # One attempt, no retry
+        assert work_queue_module.JOBS.value("pulse", "failed_fast") == failed_fast + 1
+        assert (await redis.xinfo_groups("jobs:pulse"))[0]["pending"] == 0
+        print("✅ Fast failure reply: PASSED")
+
+        # Token usage recorded by the worker is attributed to the caller in the API's tracker
+        async def metered_analyze(messages, image=None, transcript=None):
+            usage_tracker.record("pulse_pattern", "gemini-2.0-flash", SimpleNamespace(
+                prompt_token_count=100, cached_content_token_count=0,
+                candidates_token_count=10, thoughts_token_count=None,
+            ))
+            return await fake_analyze(messages)
+
+        work_queue_module.pulse_monitor.analyze = metered_analyze
+        queue.timeouts = {"pulse": 5.0}
+
+        async def request():
+            usage_tracker.bind("q-usage", "key-queue")
+            return await queue.analyze(session)
+
+        pending = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        entry = (await redis.xrevrange("jobs:pulse"))[0][1]
+        assert entry["s"] == "q-usage" and entry["k"] == "key-queue"
+        assert await worker.poll_once("pulse") == 1
+        await worker.drain()
+        await pending
+        # Worker and API share a process here, so the worker's own binding counts once more
+        assert usage_tracker.by_api_key["key-queue"].calls == 2
+        assert usage_tracker.by_session["q-usage"].prompt_tokens == 200
+        print("✅ Worker usage merged into the caller's accounting: PASSED")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        work_queue_module.pulse_monitor.analyze = original
+
+
+if __name__ == "__main__":
+    test_work_queue()